@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+
+import argparse
+import sys
+from pathlib import Path
+
+from ingest_validation_tools.schema_loader import build_schema_bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="""
+        Pre-process every table and directory schema into a single file
+        that schema_loader reads at startup instead of parsing the YAML.
+        The bundle is ignored (with a warning) once any schema changes,
+        so rebuild it after editing schemas.
+        """
+    )
+    parser.add_argument(
+        "--target",
+        type=Path,
+        help="File to write; defaults to schema-bundle.pickle in the package directory",
+    )
+    args = parser.parse_args()
+
+    counts = build_schema_bundle(args.target)
+    print(f"Bundled {counts['table']} table schemas, {counts['directory']} directory schemas")
+    for skipped in counts["skipped"]:
+        print(f"Skipped {skipped}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())  # pragma: no cover
@@ -1,20 +1,51 @@
 import os
 import re
-from fnmatch import fnmatch
+import threading
+from collections.abc import Iterable
+from contextlib import contextmanager
+from fnmatch import translate
+from functools import lru_cache
 from pathlib import Path
 
+from ingest_validation_tools.tracing import count
+
 
 class DirectoryValidationErrors(Exception):
     def __init__(self, errors):
         self.errors = errors
 
 
+class DirectoryIndex(list):
+    """
+    Relative paths found under one or more dataset directories, as listed by
+    get_files: files are listed by relative path, empty leaf directories with
+    a trailing "/". Build it once per dataset and share it with everything
+    that needs the listing, rather than walking the directory again.
+
+    >>> index = DirectoryIndex([Path("dataset")], ["a.txt", "empty/", "sub/b.txt"])
+    >>> index.files
+    ['a.txt', 'sub/b.txt']
+    """
+
+    def __init__(self, roots: list[Path], entries: Iterable[str] = ()):
+        super().__init__(entries)
+        self.roots = roots
+
+    @property
+    def files(self) -> list[str]:
+        return [entry for entry in self if not entry.endswith("/")]
+
+
 def validate_directory(
-    paths: list[Path], schema_files: list[dict], dataset_ignore_globs: list[str] = []
+    paths: list[Path],
+    schema_files: list[dict],
+    dataset_ignore_globs: list[str] = [],
+    directory_index: DirectoryIndex | None = None,
 ) -> None:
     """
     Given a list of directory paths, and a directory schema,
     raise DirectoryValidationErrors if there are errors.
+    Pass directory_index to skip listing the paths again.
     """
     try:
         required_patterns, allowed_patterns = _get_required_allowed(schema_files)
@@ -22,13 +53,11 @@ def validate_directory(
         raise DirectoryValidationErrors(
             f"Error finding patterns" f" for {','.join([x.as_posix() for x in paths])}: {e}"
         )
-    required_missing_errors: list[str] = []
-    not_allowed_errors: list[str] = []
-    actual_paths = get_files(paths)
-    not_allowed_errors.extend(
-        _get_not_allowed_errors(actual_paths, allowed_patterns, dataset_ignore_globs)
+    actual_paths = directory_index if directory_index is not None else get_files(paths)
+    matcher = get_schema_matcher(tuple(required_patterns), tuple(allowed_patterns))
+    not_allowed_errors, required_missing_errors = matcher.match(
+        actual_paths, tuple(dataset_ignore_globs)
     )
-    required_missing_errors.extend(_get_missing_required_errors(actual_paths, required_patterns))
 
     errors = {}
     if not_allowed_errors:
@@ -39,49 +68,175 @@ def validate_directory(
         raise DirectoryValidationErrors(errors)
 
 
-def get_files(paths: list[Path]) -> list[str]:
-    actual_paths = []
+def get_files(
+    paths: list[Path], index_cache: dict[Path, DirectoryIndex] | None = None
+) -> DirectoryIndex:
+    """
+    List the contents of each path. If index_cache is passed, each path is
+    walked at most once: later calls reuse the cached listing, and threads
+    asking for the same path wait for the first walk rather than repeating it.
+    """
+    actual_paths = DirectoryIndex(paths)
     for path in paths:
-        if not path.exists():
-            raise FileNotFoundError(0, "No such file or directory", str(path))
-
-        for triple in os.walk(path):
-            dir_path, _, file_names = triple
-            # [1:] removes leading '/', if any.
-            prefix = dir_path.replace(str(path), "")[1:]
-            if os.name == "nt":
-                # Convert MS backslashes to forward slashes.
-                prefix = prefix.replace("\\", "/")
-            # If this is not the root of the path and is a leaf directory
-            if not file_names and prefix:
-                actual_paths += [f"{prefix}/"]
-            # Otherwise this should be a branch directory
+        if index_cache is None:
+            actual_paths += _walk(path)
+            continue
+        with _walk_lock(path):
+            if path not in index_cache:
+                index_cache[path] = _walk(path)
             else:
-                actual_paths += (
-                    [f"{prefix}/{name}" for name in file_names] if prefix else file_names
-                )
+                count("cache hits: directory listing")
+        actual_paths += index_cache[path]
     return actual_paths
 
 
-def _get_not_allowed_errors(
-    paths: list[str], allowed_patterns: list[str], ignore_globs: list[str]
-) -> list[str]:
-    not_allowed_errors = []
-    for path in paths:
-        if any(fnmatch(path, glob) for glob in ignore_globs):
-            continue
-        if not any(re.fullmatch(pattern, path) for pattern in allowed_patterns):
-            not_allowed_errors.append(path)
+# Path -> (lock, number of threads holding or waiting for it)
+_walk_locks: dict[Path, tuple[threading.Lock, int]] = {}
+_walk_locks_lock = threading.Lock()
 
-    return not_allowed_errors
+
+@contextmanager
+def _walk_lock(path: Path):
+    """
+    Hold the lock for walking path. A lock only exists while some thread
+    holds or waits for it, so they don't pile up for every path ever walked.
+    """
+    with _walk_locks_lock:
+        lock, users = _walk_locks.get(path, (threading.Lock(), 0))
+        _walk_locks[path] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _walk_locks_lock:
+            lock, users = _walk_locks[path]
+            if users == 1:
+                del _walk_locks[path]
+            else:
+                _walk_locks[path] = (lock, users - 1)
 
 
-def _get_missing_required_errors(paths: list[str], required_patterns: list[str]) -> list[str]:
-    return [
-        pattern
-        for pattern in required_patterns
-        if not any(re.fullmatch(pattern, path) for path in paths)
-    ]
+def _walk(path: Path) -> DirectoryIndex:
+    if not path.exists():
+        raise FileNotFoundError(0, "No such file or directory", str(path))
+    actual_paths = DirectoryIndex([path])
+    for triple in os.walk(path):
+        dir_path, _, file_names = triple
+        # [1:] removes leading '/', if any.
+        prefix = dir_path.replace(str(path), "")[1:]
+        if os.name == "nt":
+            # Convert MS backslashes to forward slashes.
+            prefix = prefix.replace("\\", "/")
+        # If this is not the root of the path and is a leaf directory
+        if not file_names and prefix:
+            actual_paths += [f"{prefix}/"]
+        # Otherwise this should be a branch directory
+        else:
+            actual_paths += [f"{prefix}/{name}" for name in file_names] if prefix else file_names
+    count("files walked", len(actual_paths))
+    return actual_paths
+
+
+class DirectorySchemaMatcher:
+    """
+    The patterns of one directory schema, compiled once. Each path is
+    classified by a single regex that combines every allowed pattern as a
+    named alternative; the name of the matching alternative records which
+    required pattern was hit. Required patterns that were not the first
+    match for any path are then checked individually, so the result is
+    the same as matching every path against every pattern.
+
+    >>> matcher = DirectorySchemaMatcher(
+    ...     required_patterns=("raw/.*", "metadata[.]json"),
+    ...     allowed_patterns=("raw/.*", "metadata[.]json", "extras/.*"),
+    ... )
+    >>> matcher.match(["raw/a.txt", "extras/b.txt", "other.txt", "notes.md"], ("*.md",))
+    (['other.txt'], ['metadata[.]json'])
+    """
+
+    def __init__(self, required_patterns: tuple[str, ...], allowed_patterns: tuple[str, ...]):
+        self.required_patterns = required_patterns
+        self.allowed_patterns = allowed_patterns
+        self.compiled_patterns = {pattern: re.compile(pattern) for pattern in allowed_patterns}
+        self.combined_pattern = _combine_patterns(allowed_patterns)
+
+    def match(
+        self, paths: Iterable[str], ignore_globs: tuple[str, ...] = ()
+    ) -> tuple[list[str], list[str]]:
+        """
+        Return (paths that are not allowed, required patterns that are missing).
+        Ignored paths are never reported as not allowed, but can still
+        satisfy a required pattern.
+        """
+        paths = list(paths)
+        count("regex matches", len(paths))
+        ignore_pattern = _get_ignore_pattern(ignore_globs)
+        not_allowed = []
+        hit_patterns = set()
+        for path in paths:
+            match = self._match_allowed(path)
+            if match:
+                hit_patterns.add(match)
+            elif not (ignore_pattern and ignore_pattern.match(os.path.normcase(path))):
+                not_allowed.append(path)
+        missing_required = [
+            pattern
+            for pattern in self.required_patterns
+            if pattern not in hit_patterns
+            and not any(self.compiled_patterns[pattern].fullmatch(path) for path in paths)
+        ]
+        return not_allowed, missing_required
+
+    def _match_allowed(self, path: str) -> str | None:
+        """
+        Return the first allowed pattern that matches path, if any.
+        """
+        if self.combined_pattern:
+            match = self.combined_pattern.fullmatch(path)
+            if not match or not match.lastgroup:
+                return None
+            return self.allowed_patterns[int(match.lastgroup.removeprefix("_p"))]
+        for pattern in self.allowed_patterns:
+            if self.compiled_patterns[pattern].fullmatch(path):
+                return pattern
+        return None
+
+
+@lru_cache(maxsize=256)
+def get_schema_matcher(
+    required_patterns: tuple[str, ...], allowed_patterns: tuple[str, ...]
+) -> DirectorySchemaMatcher:
+    return DirectorySchemaMatcher(required_patterns, allowed_patterns)
+
+
+def _combine_patterns(patterns: tuple[str, ...]) -> re.Pattern | None:
+    """
+    Join patterns into a single alternation with one named group per pattern.
+    Returns None if that would change their meaning (backreferences) or
+    fail to compile (e.g. group names used twice, inline global flags).
+
+    >>> _combine_patterns(("a", "b+")).pattern
+    '(?P<_p0>a)|(?P<_p1>b+)'
+    >>> _combine_patterns((r"(a)\\1",)) is None
+    True
+    """
+    if not patterns or any(re.search(r"\\\d|\(\?P=", pattern) for pattern in patterns):
+        return None
+    try:
+        return re.compile("|".join(f"(?P<_p{i}>{pattern})" for i, pattern in enumerate(patterns)))
+    except re.error:
+        return None
+
+
+@lru_cache(maxsize=64)
+def _get_ignore_pattern(ignore_globs: tuple[str, ...]) -> re.Pattern | None:
+    """
+    Equivalent to checking fnmatch(path, glob) for each glob.
+    Paths passed to match() should be normalized with os.path.normcase.
+    """
+    if not ignore_globs:
+        return None
+    return re.compile("|".join(translate(os.path.normcase(glob)) for glob in ignore_globs))
 
 
 def _get_required_allowed(dir_schema: list[dict]) -> tuple[list[str], list[str]]:
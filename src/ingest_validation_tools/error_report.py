@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+import json
 import re
 from collections import defaultdict
 from collections.abc import MutableMapping
 from dataclasses import dataclass, field, fields
 from datetime import datetime
+from functools import cached_property, partial
 from pathlib import Path
-from typing import TYPE_CHECKING, DefaultDict, Type
-
-from yaml import Dumper, dump
+from typing import TYPE_CHECKING, Any, Callable, DefaultDict, Iterator, TextIO, Type
+
+from yaml import (
+    DocumentEndEvent,
+    DocumentStartEvent,
+    Dumper,
+    MappingEndEvent,
+    MappingStartEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    dump,
+)
 
 from ingest_validation_tools.local_validation.table_validator import ReportType
 
 if TYPE_CHECKING:
+    from ingest_validation_tools.plugin_validator import PluginStats
     from ingest_validation_tools.upload import Upload
 
 # Force dump not to use alias syntax.
@@ -20,10 +32,106 @@ if TYPE_CHECKING:
 Dumper.ignore_aliases = lambda *args: True
 
 
+def _intern(message, strings: dict[str, str] | None):
+    """
+    The copy of message in strings (added if it is the first), if message
+    is a str and there is a table to intern it in; otherwise message.
+    Unlike sys.intern, the table goes away with the errors it was for.
+    """
+    if strings is None or type(message) is not str:
+        return message
+    return strings.setdefault(message, message)
+
+
+class MessageList(list):
+    """
+    The list of errors under a key of a DictErrorType. The same message
+    often recurs for thousands of rows or files, so each distinct str is
+    kept once (interned in the report's strings) as it is added; anything
+    else is kept as is.
+
+    >>> strings = {}
+    >>> a, b = MessageList(strings=strings), MessageList(strings=strings)
+    >>> a.append("".join(["Not allowed: ", "x"]))
+    >>> b.extend(["".join(["Not allowed: ", "x"])])
+    >>> a == ["Not allowed: x"] and a[0] is b[0]
+    True
+    """
+
+    __slots__ = ("strings",)
+
+    def __init__(self, messages=(), strings: dict[str, str] | None = None):
+        self.strings = strings
+        super().__init__(_intern(message, strings) for message in messages)
+
+    def __reduce__(self):
+        # The intern table belongs to the report, not to each list
+        return MessageList, (list(self),)
+
+    def append(self, message):
+        super().append(_intern(message, self.strings))
+
+    def extend(self, messages):
+        super().extend(_intern(message, self.strings) for message in messages)
+
+    def insert(self, index, message):
+        super().insert(index, _intern(message, self.strings))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = [_intern(message, self.strings) for message in value]
+        else:
+            value = _intern(value, self.strings)
+        super().__setitem__(index, value)
+
+    def __iadd__(self, messages):
+        self.extend(messages)
+        return self
+
+
+Dumper.add_representer(MessageList, Dumper.represent_list)
+
+
+def _compact(value, strings: dict[str, str]):
+    """
+    Intern the strs in value in strings, in place: containers are kept, not
+    copied, so that callers can still add to a list after storing it.
+    Nested containers are compacted too, e.g. the "Not allowed" paths of
+    directory errors, which recur for every dataset with the same layout.
+
+    >>> a, b = ["".join(["raw/", "x.txt"])], {"Not allowed": ["".join(["raw/", "x.txt"])]}
+    >>> strings = {}
+    >>> _compact(a, strings) is a and _compact(b, strings) is b
+    True
+    >>> a[0] is b["Not allowed"][0]
+    True
+    """
+    if isinstance(value, list):
+        for i, item in enumerate(value):
+            compacted = _compact(item, strings)
+            if compacted is not item:
+                list.__setitem__(value, i, compacted)
+    elif type(value) in [dict, defaultdict]:
+        for key, item in value.items():
+            compacted = _compact(item, strings)
+            if compacted is not item:
+                value[key] = compacted
+    else:
+        return _intern(value, strings)
+    return value
+
+
 @dataclass
 class DictErrorType(MutableMapping):
     """
     Dataclass that acts like a defaultdict using self.value.
+
+    The cleaned value is cached until the errors change, i.e. until an
+    item is set, deleted or looked up (since the list looked up may be
+    appended to), or value is replaced. Don't change the contents of value
+    in place: use the mapping interface. cleaned_value, and what
+    ErrorDict.as_dict and errors_by_path return, are copies of the cache
+    that callers are free to change.
     """
 
     name: str = ""
@@ -33,20 +141,94 @@ class DictErrorType(MutableMapping):
     allow_aesthetic_cleanup: bool = True
 
     def __post_init__(self):
-        if type(self.default_factory) is not list:
-            self.value = defaultdict(self.default_factory)
+        self.value = defaultdict(
+            MessageList if self.default_factory is list else self.default_factory
+        )
+
+    def __setattr__(self, name, value):
+        if name == "value":
+            self.changed()
+        super().__setattr__(name, value)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_views", None)
+        state.pop("_strings", None)
+        return state
+
+    @property
+    def strings(self) -> dict[str, str]:
+        """
+        The intern table for messages and keys: one copy of each distinct
+        str. ErrorDict gives all its fields the same table, which is freed
+        with it.
+        """
+        return self.__dict__.setdefault("_strings", {})
+
+    def changed(self):
+        """
+        Drop cached views of value.
+        """
+        self.__dict__.pop("_views", None)
+
+    def get_view(self, name: str, compute: Callable[[], Any]) -> Any:
+        """
+        compute(), cached under name until the errors change. Views are
+        shared, so callers must not modify them; return a copy (see
+        _copy_tree) from anything public.
+        """
+        views = self.__dict__.setdefault("_views", {})
+        if name not in views:
+            views[name] = compute()
+        return views[name]
+
+    def find_path_key(self, path: str, resolved_path: Path, report_type: ReportType):
+        """
+        The first key (of cleaned_value for STR reports, value otherwise)
+        that resolves to resolved_path or contains path, or None. Keys
+        are resolved once per change (see get_view), not per lookup.
+        """
+        keys, resolved, names = self.get_view(
+            f"path index {report_type.name}",
+            partial(
+                _index_paths,
+                self.cleaned_view if report_type == ReportType.STR else self.value,
+            ),
+        )
+        matches = [
+            position
+            for position in [resolved.get(resolved_path), names.get(path)]
+            if position is not None
+        ]
+        # Keys before the indexed match (or all, if none) may still contain path
+        end = min(matches) if matches else len(keys)
+        for key in keys[:end]:
+            if path in str(key):
+                return key
+        return keys[end] if matches else None
 
     def __missing__(self, key):
-        self.value[key] = self.default_factory()
-        return self.value[key]
+        self.changed()
+        if self.value.default_factory is MessageList:
+            value = MessageList(strings=self.strings)
+        else:
+            value = self.value.default_factory()
+        self.value[_intern(key, self.strings)] = value
+        return value
 
     def __getitem__(self, key):
+        self.changed()
+        if key not in self.value:
+            return self.__missing__(key)
         return self.value[key]
 
     def __setitem__(self, key, value):
-        self.value[key] = value
+        self.changed()
+        # Values are compacted as they are stored; see _compact
+        self.value[_intern(key, self.strings)] = _compact(value, self.strings)
 
     def __delitem__(self, key):
+        self.changed()
         del self.value[key]
 
     def __iter__(self):
@@ -71,7 +253,7 @@ class DictErrorType(MutableMapping):
     def list_type_counts(self):
         errors_for_category = 0
         for errors in self.value.values():
-            if type(errors) is list:
+            if isinstance(errors, list):
                 errors_for_category += len(errors)
             elif type(errors) is dict:
                 errors_for_category += len(errors.keys())
@@ -83,7 +265,7 @@ class DictErrorType(MutableMapping):
         counts_by_sub_category = {}
         for error_type, errors in self.value.items():
             for error_sub_type, error in errors.items():
-                if type(error) is list:
+                if isinstance(error, list):
                     value = len(error)
                     counts_by_sub_category[error_type] = value
                 else:
@@ -94,7 +276,14 @@ class DictErrorType(MutableMapping):
 
     @property
     def cleaned_value(self):
-        return self.recursive_cleanup(self.value)
+        return _copy_tree(self.cleaned_view)
+
+    @property
+    def cleaned_view(self):
+        """
+        The cached cleaned value; not to be modified.
+        """
+        return self.get_view("cleaned", lambda: self.recursive_cleanup(self.value))
 
     def recursive_cleanup(self, message_collection):
         """
@@ -164,6 +353,10 @@ class InfoDict:
     dir: str | None = None
     tsvs: dict[str, dict[str, str | None]] = field(default_factory=dict)
     successful_plugins: list[str] = field(default_factory=list)
+    # Only recorded if requested; see Upload._get_plugin_errors
+    plugin_stats: list[PluginStats] = field(default_factory=list)
+    # Only recorded if Upload is given a tracer; see tracing.Tracer.summary
+    trace: dict = field(default_factory=dict)
 
     def as_dict(self):
         as_dict = {
@@ -174,6 +367,10 @@ class InfoDict:
         }
         if self.successful_plugins:
             as_dict["Successful Plugins"] = self.successful_plugins
+        if self.plugin_stats:
+            as_dict["Plugin Stats"] = [stats.as_dict() for stats in self.plugin_stats]
+        if self.trace:
+            as_dict["Trace"] = self.trace
         return as_dict
 
 
@@ -234,6 +431,13 @@ class ErrorDict:
         default_factory=lambda: StrErrorType(name="plugin_skip", display_name="Fatal Errors")
     )
 
+    def __post_init__(self):
+        # One intern table for all of this report's errors, freed with it
+        strings: dict[str, str] = {}
+        for error_field in self:
+            if isinstance(error_field, DictErrorType):
+                error_field.__dict__["_strings"] = strings
+
     def __iter__(self):
         for attr_field in fields(self):
             yield getattr(self, attr_field.name)
@@ -242,12 +446,13 @@ class ErrorDict:
         """
         Return true if any field has errors.
         """
-        return bool(self.as_dict())
+        return any(error_field and error_field.value for error_field in self)
 
     def errors_by_path(
         self, path: str, selected_fields: list = [], report_type: ReportType = ReportType.STR
     ) -> dict[str, str]:
         errors = {}
+        resolved_path = None
         if not selected_fields:
             selected_fields = [error_field for error_field in fields(self)]
         selected_error_type_fields = [field for field in selected_fields]
@@ -255,22 +460,29 @@ class ErrorDict:
             error_field = getattr(self, error_type_field.name, None)
             if not error_field or not error_field.value:
                 continue
-            if error_field.name == "preflight":
-                if report_type == ReportType.JSON:
-                    error_values = [{"error": error_field.cleaned_value}]
-                else:
-                    error_values = [error_field.cleaned_value]
-            else:
-                error_values = (
-                    error_field.cleaned_value if report_type == ReportType.STR else error_field
-                )
             if type(error_field) is StrErrorType:
+                if error_field.name == "preflight":
+                    if report_type == ReportType.JSON:
+                        error_values = [{"error": error_field.cleaned_value}]
+                    else:
+                        error_values = [error_field.cleaned_value]
+                else:
+                    error_values = (
+                        error_field.cleaned_value if report_type == ReportType.STR else error_field
+                    )
                 errors[error_field.display_name] = error_values
             elif type(error_field) is DictErrorType:
-                for key, value in error_values.items():  # type: ignore
-                    if (Path(path).resolve() == Path(key).resolve()) or (str(path) in str(key)):
-                        errors[error_field.display_name] = value
-                        break
+                if resolved_path is None:
+                    resolved_path = Path(path).resolve()
+                key = error_field.find_path_key(str(path), resolved_path, report_type)
+                if key is not None:
+                    # Not error_field[key], which would drop the index
+                    values = (
+                        error_field.cleaned_view
+                        if report_type == ReportType.STR
+                        else error_field.value
+                    )
+                    errors[error_field.display_name] = _copy_tree(values[key])
         return errors
 
     def tsv_only_errors_by_path(
@@ -305,9 +517,14 @@ class ErrorDict:
             error_field = getattr(self, errordict_field.name)
             if not error_field or not error_field.value:
                 continue
-            value = self.sort_val(
-                error_field.cleaned_value if report_type == ReportType.STR else error_field
-            )
+            if report_type != ReportType.STR:
+                value = self.sort_val(error_field)
+            elif isinstance(error_field, DictErrorType):
+                value = _copy_tree(
+                    error_field.get_view("sorted", partial(self._sort_cleaned, error_field))
+                )
+            else:
+                value = error_field.cleaned_value
             if attr_keys:
                 errors[error_field.name] = value
             else:
@@ -323,12 +540,35 @@ class ErrorDict:
             value = {k: self.sort_val(v) for k, v in sorted_str_dict.items()}
         return value
 
+    def _sort_cleaned(self, error_field: DictErrorType):
+        return self.sort_val(error_field.cleaned_view)
+
+    def iter_fields(
+        self, report_type: ReportType = ReportType.STR
+    ) -> Iterator[tuple[str, Any, Callable[[Any], Any]]]:
+        """
+        For the report writers: (display name, value, clean) for each field
+        with errors, in the order of as_dict. The value is not copied;
+        clean(leaf) gives what as_dict would have in place of each
+        non-dict, non-list value in it. Dicts are reported with str keys
+        in sorted order; see _sorted_items.
+        """
+        for error_field in self:
+            if not error_field or not error_field.value:
+                continue
+            if report_type != ReportType.STR:
+                yield error_field.display_name, error_field.value, _unchanged
+            elif isinstance(error_field, StrErrorType):
+                yield error_field.display_name, error_field.cleaned_value, _unchanged
+            else:
+                yield error_field.display_name, error_field.value, error_field.recursive_cleanup
+
 
 class ErrorReport:
-    errors = {}
     info = {}
     raw_errors = ErrorDict()
     raw_info = InfoDict()
+    report_type = ReportType.STR
 
     def __init__(
         self,
@@ -346,17 +586,25 @@ class ErrorReport:
                 self.raw_info = upload.get_info()
             else:
                 self.raw_info = upload.info
-            self.errors = upload.errors.as_dict(report_type=upload.report_type)
+            self.raw_errors = upload.errors
+            self.report_type = upload.report_type
             self.info = upload.info.as_dict()
         # Preserved for backward compatibility for now
         else:
             if errors:
                 self.raw_errors = errors
-                self.errors = errors.as_dict()
             if info:
                 self.raw_info = info
                 self.info = info.as_dict()
 
+    @cached_property
+    def errors(self) -> dict:
+        """
+        All errors, as a dict; for large uploads, prefer the write_* methods,
+        which don't build it.
+        """
+        return self.raw_errors.as_dict(report_type=self.report_type)
+
     @property
     def counts(self) -> dict[str, int | str]:
         """
@@ -403,6 +651,187 @@ class ErrorReport:
     def as_md(self) -> str:
         return f"```\n{self.as_text()}```"
 
+    # The write_* methods write what the corresponding as_* method returns,
+    # walking raw_errors rather than building the whole report in memory
+
+    def write_text_list(self, stream: TextIO) -> None:
+        lines = (
+            line
+            for name, value, clean in self.raw_errors.iter_fields(self.report_type)
+            for line in _iter_list({name: value}, clean)
+        )
+        first = next(lines, None)
+        if first is None:
+            stream.write(self._no_errors())
+            return
+        stream.write(str(first))
+        for line in lines:
+            stream.write(f"\n{line}")
+
+    def write_yaml(self, stream: TextIO) -> None:
+        dumper = Dumper(stream, default_flow_style=False, sort_keys=False)
+        try:
+            dumper.open()
+            dumper.emit(DocumentStartEvent(explicit=False))
+            dumper.emit(MappingStartEvent(None, None, True, flow_style=False))
+            for name, value, clean in self.raw_errors.iter_fields(self.report_type):
+                _emit_yaml(dumper, name, _unchanged)
+                _emit_yaml(dumper, value, clean)
+            dumper.emit(MappingEndEvent())
+            dumper.emit(DocumentEndEvent(explicit=False))
+            dumper.close()
+        finally:
+            dumper.dispose()
+
+    def write_text(self, stream: TextIO) -> None:
+        if not self.raw_errors:
+            stream.write(self._no_errors())
+        else:
+            self.write_yaml(stream)
+
+    def write_jsonl(self, stream: TextIO) -> None:
+        """
+        One JSON object per error: its category ("type"), the keys leading
+        to it ("path"; e.g. TSV path, or data path and problem), and the
+        error. Each item of a list is one error.
+        """
+        for name, value, clean in self.raw_errors.iter_fields(self.report_type):
+            for path, error in _iter_leaves(value, clean, []):
+                stream.write(
+                    json.dumps({"type": name, "path": path, "error": error}, default=str) + "\n"
+                )
+
+
+def _index_paths(values: dict) -> tuple[list, dict[Path, int], dict[str, int]]:
+    """
+    The keys of values, with the position of the first key for each
+    resolved path and for each key name (also without any " (as schema)").
+
+    >>> keys, resolved, names = _index_paths({"a.tsv (as x)": [], "a.tsv": []})
+    >>> resolved[Path("a.tsv").resolve()], names["a.tsv"]
+    (1, 0)
+    """
+    keys = list(values)
+    resolved: dict[Path, int] = {}
+    names: dict[str, int] = {}
+    for position, key in enumerate(keys):
+        resolved.setdefault(Path(key).resolve(), position)
+        names.setdefault(str(key), position)
+        names.setdefault(str(key).split(" (as ")[0], position)
+    return keys, resolved, names
+
+
+def _unchanged(value):
+    return value
+
+
+def _copy_tree(value):
+    """
+    A copy of the dicts and lists in value, sharing everything else (the
+    messages are immutable strs), so that a caller can change it without
+    changing the cached view it came from.
+
+    >>> view = {"a.tsv": ["Missing: x."]}
+    >>> copy = _copy_tree(view)
+    >>> copy["a.tsv"].append("Missing: y.")
+    >>> view
+    {'a.tsv': ['Missing: x.']}
+    """
+    if isinstance(value, dict):
+        return {key: _copy_tree(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_tree(item) for item in value]
+    return value
+
+
+def _sorted_items(mapping: dict) -> list[tuple[str, Any]]:
+    """
+    Items with str keys, sorted, as ErrorDict.sort_val orders them; the
+    values are not copied.
+    """
+    return sorted({str(k): v for k, v in mapping.items()}.items(), key=lambda item: item[0])
+
+
+def _emit_yaml(dumper: Dumper, value, clean: Callable[[Any], Any]) -> None:
+    """
+    Emit the YAML events yaml.dump would for the cleaned value, a piece at
+    a time. Each scalar is represented and serialized as yaml.dump does,
+    so the output is identical.
+    """
+    if isinstance(value, dict):
+        dumper.emit(MappingStartEvent(None, None, True, flow_style=False))
+        for key, item in _sorted_items(value):
+            _emit_yaml(dumper, key, _unchanged)
+            _emit_yaml(dumper, item, clean)
+        dumper.emit(MappingEndEvent())
+    elif isinstance(value, list):
+        dumper.emit(SequenceStartEvent(None, None, True, flow_style=False))
+        for item in value:
+            _emit_yaml(dumper, item, clean)
+        dumper.emit(SequenceEndEvent())
+    else:
+        node = dumper.represent_data(clean(value))
+        dumper.anchor_node(node)
+        dumper.serialize_node(node, None, None)
+        # Nothing is shared between scalars; don't keep them
+        dumper.anchors = {}
+        dumper.serialized_nodes = {}
+
+
+def _iter_list(anything, clean: Callable[[Any], Any], path=None) -> Iterator[str]:
+    """
+    _build_list, for the cleaned value, as a generator.
+
+    >>> errors = {"Local Validation Errors": {"b.tsv": ["x"], "a.tsv": ["y", "z"]}}
+    >>> list(_iter_list(errors, _unchanged)) == _build_list(ErrorDict().sort_val(errors))
+    True
+    """
+    prefix = f"{path}: " if path else ""
+    if isinstance(anything, dict):
+        items = _sorted_items(anything)
+        if all(_is_list_scalar(v, clean) for _, v in items):
+            for k, v in items:
+                yield f"{prefix}{k}: {clean(v)}"
+        else:
+            for k, v in items:
+                yield from _iter_list(v, clean, path=f"{prefix}{k}")
+    elif isinstance(anything, list):
+        if all(_is_list_scalar(v, clean) for v in anything):
+            for v in anything:
+                yield f"{prefix}{clean(v)}"
+        else:
+            for v in anything:
+                yield from _iter_list(v, clean, path=path)
+    else:
+        yield f"{prefix}{clean(anything)}"
+
+
+def _is_list_scalar(value, clean: Callable[[Any], Any]) -> bool:
+    if isinstance(value, (dict, list)):
+        return False
+    return isinstance(clean(value), (float, int, str))
+
+
+def _iter_leaves(
+    value, clean: Callable[[Any], Any], path: list[str]
+) -> Iterator[tuple[list, Any]]:
+    if isinstance(value, dict):
+        for key, item in _sorted_items(value):
+            yield from _iter_leaves(item, clean, path + [key])
+    elif isinstance(value, list):
+        for item in value:
+            yield path, _clean_tree(item, clean)
+    else:
+        yield path, clean(value)
+
+
+def _clean_tree(value, clean: Callable[[Any], Any]):
+    if isinstance(value, dict):
+        return {key: _clean_tree(item, clean) for key, item in _sorted_items(value)}
+    if isinstance(value, list):
+        return [_clean_tree(item, clean) for item in value]
+    return clean(value)
+
 
 def _build_list(anything, path=None) -> list[str]:
     """
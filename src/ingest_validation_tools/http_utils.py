@@ -0,0 +1,176 @@
+"""
+Pooled HTTP sessions for every remote call made during validation
+(entity-api, ingest-api, CEDAR, ORCID, URL constraint checks).
+
+Connections are pooled and kept alive, every request has a timeout,
+and 429/5xx responses and connection errors of idempotent requests are
+retried with capped backoff. Settings can be overridden via
+app_context["http"], e.g.:
+
+    Upload(path, app_context={"http": {"timeout": [5, 30], "retries": 1}})
+
+Each Upload uses the client for its settings (one per distinct settings,
+shared between Uploads) while it validates, so concurrent Uploads with
+different settings don't affect each other. The client in use is held in
+a ContextVar, as the tracer is; see tracing.with_tracer for thread pools.
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ingest_validation_tools.tracing import count, span
+
+DEFAULT_HTTP_CONFIG: dict = {
+    # (connect, read) timeout in seconds
+    "timeout": (5, 60),
+    # URL prefix -> timeout, for endpoints that need longer (or shorter)
+    "timeouts": {
+        # Spreadsheet Validator can take minutes on large TSVs
+        "https://api.metadatavalidator.metadatacenter.org/": (5, 300),
+    },
+    "retries": 3,
+    "backoff_factor": 0.5,
+    # Longest wait between retries, and longest Retry-After honoured, in seconds
+    "backoff_max": 30,
+    "max_retry_after": 60,
+    "retry_statuses": [429, 500, 502, 503, 504],
+    # POSTs aren't retried: a Spreadsheet Validator call can take minutes
+    "retry_methods": sorted(Retry.DEFAULT_ALLOWED_METHODS),
+    # Open connections kept per host, and requests in flight per host
+    "pool_maxsize": 10,
+    "max_per_host": 10,
+}
+
+
+class CappedRetry(Retry):
+    """
+    Retry that waits at most max_retry_after seconds when a response has
+    a Retry-After header, however long the server asks for.
+    """
+
+    def __init__(self, *args, max_retry_after: float = 60, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kwargs) -> "CappedRetry":
+        kwargs.setdefault("max_retry_after", self.max_retry_after)
+        return super().new(**kwargs)  # type: ignore
+
+    def get_retry_after(self, response) -> float | None:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.max_retry_after)
+
+
+class HttpClient:
+    def __init__(self, config: dict | None = None):
+        self.config = DEFAULT_HTTP_CONFIG | (config if config else {})
+        self.config["timeouts"] = DEFAULT_HTTP_CONFIG["timeouts"] | self.config["timeouts"]
+        self.session = requests.Session()
+        retry = CappedRetry(
+            total=self.config["retries"],
+            backoff_factor=self.config["backoff_factor"],
+            backoff_max=self.config["backoff_max"],
+            max_retry_after=self.config["max_retry_after"],
+            status_forcelist=self.config["retry_statuses"],
+            allowed_methods=self.config["retry_methods"],
+            # Hand the last response back so callers' raise_for_status/status checks still apply
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=self.config["pool_maxsize"],
+            pool_maxsize=self.config["pool_maxsize"],
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._host_limits: dict[str, threading.BoundedSemaphore] = {}
+        self._host_limits_lock = threading.Lock()
+
+    def get_timeout(self, url: str) -> tuple | float:
+        """
+        >>> client = HttpClient({"timeout": 10, "timeouts": {"https://a.org/slow": 60}})
+        >>> client.get_timeout("https://a.org/slow/thing")
+        60
+        >>> client.get_timeout("https://a.org/fast")
+        10
+        """
+        matches = [prefix for prefix in self.config["timeouts"] if url.startswith(prefix)]
+        if not matches:
+            return _as_timeout(self.config["timeout"])
+        return _as_timeout(self.config["timeouts"][max(matches, key=len)])
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.get_timeout(url))
+        count("HTTP calls")
+        with self._get_host_limit(urlsplit(url).netloc), span(f"HTTP {method}", url=url):
+            return self.session.request(method, url, **kwargs)
+
+    def _get_host_limit(self, host: str) -> threading.BoundedSemaphore:
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.config["max_per_host"])
+            return self._host_limits[host]
+
+
+def _as_timeout(timeout):
+    # JSON/YAML config gives lists; requests wants a number or a tuple
+    return tuple(timeout) if isinstance(timeout, list) else timeout
+
+
+_clients: dict[str, HttpClient] = {}
+_clients_lock = threading.Lock()
+_client: ContextVar[HttpClient | None] = ContextVar("http_client", default=None)
+
+
+def get_http_client(config: dict | None = None) -> HttpClient:
+    """
+    The client for config (None or empty for the defaults), created once
+    per process for each distinct config.
+    """
+    key = json.dumps(config if config else {}, sort_keys=True, default=str)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = HttpClient(config)
+        return _clients[key]
+
+
+@contextmanager
+def use_http_client(client: HttpClient) -> Iterator[None]:
+    """
+    Make remote calls in this context with client.
+    """
+    token = _client.set(client)
+    try:
+        yield
+    finally:
+        _client.reset(token)
+
+
+def get_current_http_client() -> HttpClient:
+    """
+    The client set by use_http_client, or the default client outside one.
+    """
+    client = _client.get()
+    return client if client is not None else get_http_client()
+
+
+def http_get(url: str, client: HttpClient | None = None, **kwargs) -> requests.Response:
+    return (client if client is not None else get_current_http_client()).request(
+        "GET", url, **kwargs
+    )
+
+
+def http_post(url: str, client: HttpClient | None = None, **kwargs) -> requests.Response:
+    return (client if client is not None else get_current_http_client()).request(
+        "POST", url, **kwargs
+    )
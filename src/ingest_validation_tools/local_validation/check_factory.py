@@ -1,18 +1,37 @@
+import atexit
 import json
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from string import Template
 from sys import stderr
-from typing import Any, Callable, Iterator
+from typing import Any, Callable, Iterable, Iterator
 
-import frictionless
-import requests
+from ingest_validation_tools.http_utils import http_get
+from ingest_validation_tools.tracing import count, with_tracer
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, writes are still atomic
+    fcntl = None  # type: ignore
 
 cache_path = Path(__file__).parent / "url-status-cache.json"
 
-ErrorIterator = Iterator[frictionless.errors.CellError]
+# frictionless CellErrors
+ErrorIterator = Iterator[dict]
 Row = dict[str, Any]
 Check = Callable[[Row], ErrorIterator]
+# Typed values of each field, by name, in row order
+Columns = dict[str, list]
+# (row index, field name, note)
+Hit = tuple[int, str, str]
+ColumnCheck = Callable[[Columns], Iterator[Hit]]
+
+PREFIX_NUMBER_RE = re.compile(r"(?P<prefix>.*?)(?P<number>\d+)$")
 
 
 def make_checks(schema) -> list[Check]:
@@ -25,6 +44,49 @@ def make_checks(schema) -> list[Check]:
     ]
 
 
+def make_column_checks(schema) -> list[ColumnCheck]:
+    """
+    The same checks, in the same order, run over a whole table at once:
+    each takes every column and yields a Hit for each cell that fails.
+
+    >>> schema = {
+    ...     "fields": [
+    ...         {"name": "id", "custom_constraints": {"sequence_limit": 3}},
+    ...         {"name": "size"},
+    ...         {"name": "size_unit", "custom_constraints": {"units_for": "size"}},
+    ...         {"name": "notes", "custom_constraints": {"forbid_na": True}},
+    ...     ]
+    ... }
+    >>> columns = {
+    ...     "id": ["a1", "a2", "a3", "b1"],
+    ...     "size": [1, None, 0, 2],
+    ...     "size_unit": ["mm", None, None, "mm"],
+    ...     "notes": [None, "N/A", "na", "fine"],
+    ... }
+    >>> for check in make_column_checks(schema):
+    ...     for hit in check(columns):
+    ...         print(hit)
+    (2, 'id', 'there is a run of 3 sequential items: Limit is 3. If correct, reorder rows.')
+    (2, 'size_unit', 'it requires a value when size is filled')
+    (1, 'notes', '"N/A" fields should just be left empty')
+    (2, 'notes', '"N/A" fields should just be left empty')
+    """
+    factory = _CheckFactory(schema)
+    return [
+        factory.make_url_column_check(),
+        factory.make_sequence_limit_column_check(),
+        factory.make_units_column_check(),
+        factory.make_forbid_na_column_check(),
+    ]
+
+
+def _make_cell_error(row, note: str, field_name: str) -> dict:
+    # Imported here so the native validator doesn't pay for frictionless
+    import frictionless
+
+    return frictionless.errors.CellError.from_row(row, note=note, field_name=field_name)
+
+
 class _CheckFactory:
     def __init__(self, schema):
         self.schema = schema
@@ -38,20 +100,6 @@ class _CheckFactory:
             if c_c in f and constraint in f[c_c]
         }
 
-    def _check_url_status_cache(self, url: str) -> str:
-        if not cache_path.exists():
-            cache_path.write_text("{}")
-        url_status_cache = json.loads(cache_path.read_text())
-        if url not in url_status_cache:
-            print(f"Fetching un-cached url: {url}", file=stderr)
-            try:
-                response = requests.get(url)
-                url_status_cache[url] = response.status_code
-            except Exception as e:
-                url_status_cache[url] = str(e)
-            cache_path.write_text(json.dumps(url_status_cache, sort_keys=True, indent=2))
-        return url_status_cache[url]
-
     def make_url_check(self, template=Template('URL returned $status: "$url"')) -> Check:
         url_constrained_fields = self._get_constrained_fields("url")
 
@@ -62,10 +110,10 @@ class _CheckFactory:
                 if k in url_constrained_fields:
                     prefix = url_constrained_fields[k]["prefix"]
                     url = f"{prefix}{v}"
-                    status = self._check_url_status_cache(url)
+                    status = get_url_status_cache().check(url)
                     if status != 200:
                         note = template.substitute(status=status, url=url)
-                        yield frictionless.errors.CellError.from_row(row, note=note, field_name=k)
+                        yield _make_cell_error(row, note=note, field_name=k)
 
         return url_check
 
@@ -79,7 +127,6 @@ class _CheckFactory:
         sequence_limit_fields = self._get_constrained_fields("sequence_limit")
 
         def sequence_limit_check(row):
-            prefix_number_re = r"(?P<prefix>.*?)(?P<number>\d+)$"
             for k, v in row.items():
                 # If the schema declares the field as datetime,
                 # "v" will be a python object, and regexes will error.
@@ -88,7 +135,7 @@ class _CheckFactory:
                 if k not in sequence_limit_fields or not v:
                     continue
 
-                match = re.search(prefix_number_re, v)
+                match = PREFIX_NUMBER_RE.search(v)
                 if not match:
                     if k in self._prev_value_run_length:
                         del self._prev_value_run_length[k]
@@ -99,7 +146,7 @@ class _CheckFactory:
                     continue
 
                 prev_value, run_length = self._prev_value_run_length[k]
-                prev_match = re.search(prefix_number_re, prev_value)
+                prev_match = PREFIX_NUMBER_RE.search(prev_value)
                 if (
                     match.group("prefix") != prev_match.group("prefix")
                     or int(match.group("number")) != int(prev_match.group("number")) + 1
@@ -114,7 +161,7 @@ class _CheckFactory:
                 assert limit > 1, "The lowest allowed limit is 2"
                 if run_length >= limit:
                     note = template.substitute(run_length=run_length, limit=limit)
-                    yield frictionless.errors.CellError.from_row(row, note=note, field_name=k)
+                    yield _make_cell_error(row, note=note, field_name=k)
 
         return sequence_limit_check
 
@@ -129,7 +176,7 @@ class _CheckFactory:
                     units_for = units_constrained_fields[k]
                     if (row[units_for] or row[units_for] == 0) and not row[k]:
                         note = template.substitute(units_for=units_for)
-                        yield frictionless.errors.CellError.from_row(row, note=note, field_name=k)
+                        yield _make_cell_error(row, note=note, field_name=k)
 
         return units_check
 
@@ -146,6 +193,268 @@ class _CheckFactory:
                     and v.upper() in ["NA", "N/A"]
                 ):
                     note = template.substitute()
-                    yield frictionless.errors.CellError.from_row(row, note=note, field_name=k)
+                    yield _make_cell_error(row, note=note, field_name=k)
 
         return forbid_na_check
+
+    def make_url_column_check(
+        self, template=Template('URL returned $status: "$url"')
+    ) -> ColumnCheck:
+        url_constrained_fields = self._get_constrained_fields("url")
+
+        def url_column_check(columns):
+            for k, url_constraint in url_constrained_fields.items():
+                url_status_cache = get_url_status_cache()
+                prefix = url_constraint["prefix"]
+                urls = [None if v is None else f"{prefix}{v}" for v in columns[k]]
+                url_status_cache.check_all(url for url in urls if url is not None)
+                for i, url in enumerate(urls):
+                    if url is None:
+                        continue
+                    status = url_status_cache.check(url)
+                    if status != 200:
+                        yield i, k, template.substitute(status=status, url=url)
+
+        return url_column_check
+
+    def make_sequence_limit_column_check(
+        self,
+        template=Template(
+            "there is a run of $run_length sequential items: Limit is $limit. "
+            "If correct, reorder rows."
+        ),
+    ) -> ColumnCheck:
+        sequence_limit_fields = self._get_constrained_fields("sequence_limit")
+
+        def sequence_limit_column_check(columns):
+            for k, limit in sequence_limit_fields.items():
+                values = [str(v) for v in columns[k]]
+                # One pass down the column, carrying (prefix, number, run length)
+                # of the last value that matched; empty values don't break a run
+                prev = None
+                for i, (v, match) in enumerate(zip(values, map(PREFIX_NUMBER_RE.search, values))):
+                    if not v:
+                        continue
+                    if not match:
+                        prev = None
+                        continue
+                    prefix, number = match.group("prefix"), int(match.group("number"))
+                    if prev is None or prefix != prev[0] or number != prev[1] + 1:
+                        prev = (prefix, number, 1)
+                        continue
+                    run_length = prev[2] + 1
+                    prev = (prefix, number, run_length)
+                    assert limit > 1, "The lowest allowed limit is 2"
+                    if run_length >= limit:
+                        yield i, k, template.substitute(run_length=run_length, limit=limit)
+
+        return sequence_limit_column_check
+
+    def make_units_column_check(
+        self, template=Template("it requires a value when $units_for is filled")
+    ) -> ColumnCheck:
+        units_constrained_fields = self._get_constrained_fields("units_for")
+
+        def units_column_check(columns):
+            for k, units_for in units_constrained_fields.items():
+                note = template.substitute(units_for=units_for)
+                for i, (units_for_v, v) in enumerate(zip(columns[units_for], columns[k])):
+                    if (units_for_v or units_for_v == 0) and not v:
+                        yield i, k, note
+
+        return units_column_check
+
+    def make_forbid_na_column_check(
+        self, template=Template('"N/A" fields should just be left empty')
+    ) -> ColumnCheck:
+        forbid_na_constrained_fields = self._get_constrained_fields("forbid_na")
+
+        def forbid_na_column_check(columns):
+            note = template.substitute()
+            for k in forbid_na_constrained_fields:
+                for i, v in enumerate(columns[k]):
+                    if isinstance(v, str) and v.upper() in ["NA", "N/A"]:
+                        yield i, k, note
+
+        return forbid_na_column_check
+
+
+class URLStatusCache:
+    """
+    HTTP status (or error message) of each URL named in a URL-constrained
+    field, kept in memory and shared between processes through a JSON file.
+
+    The file maps URL to status and nothing else, as it always has; expiry
+    times for entries live in a sidecar file (expires_path), and entries
+    without one never expire. Entries fetched by this process are written
+    back by flush(), merged with whatever other processes have written in
+    the meantime.
+    """
+
+    # Where expiry times were kept inside the status map; read for migration
+    LEGACY_EXPIRES_KEY = "__expires__"
+    TTL = 30 * 24 * 60 * 60
+    # Failures are rechecked sooner: the DOI may have been published since
+    ERROR_TTL = 24 * 60 * 60
+
+    def __init__(self, path: Path, max_workers: int = 8):
+        self.path = path
+        self.expires_path = path.with_name(f"{path.name}.expires")
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._statuses, self._expires = self._read()
+        self._unflushed: set[str] = set()
+
+    def get(self, url: str) -> int | str | None:
+        """
+        Cached status, or None if url is not cached or has expired.
+        """
+        with self._lock:
+            if url not in self._statuses:
+                return None
+            if url in self._expires and self._expires[url] < time.time():
+                return None
+            return self._statuses[url]
+
+    def check(self, url: str) -> int | str:
+        status = self.get(url)
+        if status is not None:
+            count("cache hits: URL status")
+            return status
+        print(f"Fetching un-cached url: {url}", file=stderr)
+        try:
+            response = http_get(url)
+            status = response.status_code
+        except Exception as e:
+            status = str(e)
+        with self._lock:
+            self._statuses[url] = status
+            self._expires[url] = time.time() + (self.TTL if status == 200 else self.ERROR_TTL)
+            self._unflushed.add(url)
+        return status
+
+    def check_all(self, urls: Iterable[str]) -> None:
+        """
+        Fetch every url that isn't cached, concurrently.
+        """
+        missing = sorted({url for url in urls if self.get(url) is None})
+        if len(missing) < 2:
+            for url in missing:
+                self.check(url)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(with_tracer(self.check), missing))
+
+    def flush(self) -> None:
+        """
+        Write new entries to the file, atomically, keeping entries other
+        processes have added; also picks up those entries in memory.
+        """
+        with self._lock:
+            if not self._unflushed:
+                return
+            updates = {
+                url: (self._statuses[url], self._expires.get(url)) for url in self._unflushed
+            }
+            self._unflushed = set()
+        try:
+            with _locked(self.path):
+                statuses, expires = self._read()
+                for url, (status, expiry) in updates.items():
+                    statuses[url] = status
+                    if expiry is not None:
+                        expires[url] = expiry
+                # Expiry first: a reader between the two replaces sees new
+                # entries as never expiring at worst, never stale as fresh
+                _write_json(self.expires_path, expires)
+                _write_json(self.path, statuses)
+        except OSError as e:
+            # e.g. installed read-only: the cache still works for this process
+            print(f"Unable to write URL status cache {self.path}: {e}", file=stderr)
+            return
+        with self._lock:
+            for url, status in statuses.items():
+                if url not in self._unflushed:
+                    self._statuses[url] = status
+                    if url in expires:
+                        self._expires[url] = expires[url]
+
+    def _read(self) -> tuple[dict[str, int | str], dict[str, float]]:
+        statuses = _read_json(self.path)
+        expires = statuses.pop(self.LEGACY_EXPIRES_KEY, {})
+        expires.update(_read_json(self.expires_path))
+        return statuses, expires
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        print(f"Ignoring unreadable URL status cache {path}: {e}", file=stderr)
+        return {}
+
+
+def _write_json(path: Path, contents: dict) -> None:
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temp_path.write_text(json.dumps(contents, sort_keys=True, indent=2))
+    os.replace(temp_path, path)
+
+
+@contextmanager
+def _locked(path: Path):
+    """
+    Hold an exclusive lock on a sidecar file next to path, so processes
+    sharing the cache don't lose each other's entries.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path.with_name(f"{path.name}.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_url_status_caches: dict[Path, URLStatusCache] = {}
+_url_status_caches_lock = threading.Lock()
+
+
+def get_url_status_cache() -> URLStatusCache:
+    """
+    The cache for the current cache_path, read from disk once per process.
+    """
+    with _url_status_caches_lock:
+        if cache_path not in _url_status_caches:
+            _url_status_caches[cache_path] = URLStatusCache(cache_path)
+        return _url_status_caches[cache_path]
+
+
+def prefetch_url_statuses(rows: list[dict], schema: dict) -> None:
+    """
+    Look up the distinct URLs a TSV's URL-constrained fields point to,
+    concurrently, so url_check only reads from the cache.
+    """
+    prefixes = {
+        field["name"]: field["custom_constraints"]["url"]["prefix"]
+        for field in schema["fields"]
+        if "url" in field.get("custom_constraints", {})
+    }
+    if not prefixes:
+        return
+    urls = {
+        f"{prefixes[name]}{value}"
+        for row in rows
+        for name, value in row.items()
+        if name in prefixes and value
+    }
+    get_url_status_cache().check_all(urls)
+
+
+@atexit.register
+def _flush_url_status_caches():
+    for url_status_cache in list(_url_status_caches.values()):
+        url_status_cache.flush()
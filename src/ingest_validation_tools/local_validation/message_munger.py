@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from re import sub
+import re
+from functools import lru_cache
+from typing import Callable
 
 pat_reps = [
     (r'constraint "pattern" is (".*")', "it does not match the expected pattern"),
@@ -56,6 +58,79 @@ pat_reps = [
 ]
 
 
+class Rule:
+    """
+    One of pat_reps, compiled. Every match of the pattern contains the
+    anchor, if it has one, so a message without it can be skipped
+    without running the regex.
+
+    >>> Rule(r"is no such file or directory", r"does not exist").anchor
+    'is no such file or directory'
+    >>> Rule(r'type is "datetime/.*"', "").anchor
+    'type is "datetime/'
+    >>> Rule(r"\\<.*?\\>", "").anchor
+    '<'
+    >>> Rule(r"(,|is) [A-Z]", "").anchor
+    ' '
+    >>> Rule(r"([^.\\d])$", "").anchor is None
+    True
+    """
+
+    def __init__(self, pattern: str, replacement: str | Callable[[re.Match], str]):
+        self.regex = re.compile(pattern)
+        self.replacement = replacement
+        self.anchor = None if self.regex.flags & re.IGNORECASE else _get_anchor(pattern)
+
+    def apply(self, message: str) -> str:
+        if self.anchor is not None and self.anchor not in message:
+            return message
+        return self.regex.sub(self.replacement, message)
+
+
+def _get_anchor(pattern: str) -> str | None:
+    """
+    The longest run of literal characters outside any group, class or
+    repetition: text that must appear in every match. None if there is
+    none, or if the pattern has a top-level alternation.
+    """
+    runs = [""]
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        literal = None
+        if char == "\\":
+            escaped = pattern[i + 1]
+            # \d, \S, \1 and so on are classes or references, not literals
+            if not escaped.isalnum():
+                literal = escaped
+            i += 2
+        elif char == "[":
+            i = pattern.index("]", i + 2) + 1
+        else:
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif char == "|" and depth == 0:
+                return None
+            elif char not in ".^$*+?{}" and depth == 0:
+                literal = char
+            i += 1
+        if i < len(pattern) and pattern[i] in "*+?{":
+            # Repeated (or optional): only what came before is certain
+            literal = None
+        if literal is None:
+            runs.append("")
+        else:
+            runs[-1] += literal
+    anchor = max(runs, key=len)
+    return anchor if anchor else None
+
+
+rules = [Rule(pattern, replacement) for pattern, replacement in pat_reps]
+
+
 def munge(message: str | int) -> str | int:
     """
     Make the error message less informative.
@@ -64,13 +139,19 @@ def munge(message: str | int) -> str | int:
     'In the dataset examples/dataset/fake, in field fake_path referenced on row 2, the file "nope.txt" is not allowed.'
 
     """
-    for pattern, replacement in pat_reps:
-        if message is None:
-            message = ""
-        elif isinstance(message, int):
-            message = int(sub(pattern, replacement, str(message)))
-        else:
-            message = sub(pattern, replacement, str(message))
+    if message is None:
+        return ""
+    if isinstance(message, int):
+        return int(_munge(str(message)))
+    return _munge(str(message))
+
+
+@lru_cache(maxsize=4096)
+def _munge(message: str) -> str:
+    # Reports repeat the same notes many times over; the rules are applied
+    # in order, each to the output of the last, as pat_reps lists them
+    for rule in rules:
+        message = rule.apply(message)
     return message
 
 
@@ -0,0 +1,422 @@
+"""
+Validate TSV rows without frictionless, for the schemas we actually write:
+any/string/email/number/integer/boolean/date/datetime fields with
+required, enum, pattern, min/max and min/max length constraints, plus
+the custom checks from check_factory. Each schema is compiled into one
+closure per column, and errors match frictionless' own, field for field
+and in the same order, so the messages built from them are unchanged.
+
+Anything else (other types or formats, other schema properties, non-ASCII
+files, rows of the wrong length, blank rows, dialects other than plain
+TSV) raises Unsupported, and table_validator uses frictionless instead.
+"""
+
+import csv
+import decimal
+import io
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Callable
+
+from dateutil import parser as dateutil_parser
+
+from ingest_validation_tools.local_validation.check_factory import make_column_checks
+from ingest_validation_tools.parsed_tsv import ParsedTSV
+
+# frictionless defaults, which our schemas don't override
+LIMIT_ERRORS = 1000
+MISSING_VALUES = [""]
+TRUE_VALUES = ["true", "True", "TRUE", "1"]
+FALSE_VALUES = ["false", "False", "FALSE", "0"]
+DEFAULT_DATE_PATTERN = "%Y-%m-%d"
+SNIFF_LINES = 100
+SNIFF_DELIMITERS = ",\t;|"
+
+# Properties that don't affect validation; anything else is left to frictionless
+SCHEMA_KEYS = frozenset(
+    [
+        "fields",
+        "title",
+        "description",
+        "description_md",
+        "doc_url",
+        "deprecated",
+        "draft",
+        "exclude_from_index",
+        "release_date",
+    ]
+)
+FIELD_KEYS = frozenset(
+    [
+        "name",
+        "type",
+        "format",
+        "constraints",
+        "custom_constraints",
+        "title",
+        "description",
+        "example",
+        "notes",
+    ]
+)
+
+FieldValidator = Callable[[str], tuple[Any, list[tuple[str, str]]]]
+
+
+class Unsupported(Exception):
+    """
+    The schema or TSV needs something only frictionless handles.
+    """
+
+
+def get_native_errors(parsed_tsv: ParsedTSV, schema: dict) -> list[dict]:
+    """
+    The errors frictionless.validate would report for this TSV and schema,
+    with our custom checks, as dicts with the keys _get_message reads.
+
+    >>> import tempfile
+    >>> from pathlib import Path
+    >>> schema = {
+    ...     "fields": [
+    ...         {"name": "id", "constraints": {"required": True}},
+    ...         {"name": "n", "type": "integer", "constraints": {"minimum": 1}},
+    ...     ]
+    ... }
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     path = Path(tmp) / "example.tsv"
+    ...     _ = path.write_text("id\\tn\\na\\t1\\n\\t0\\nc\\tx\\n")
+    ...     errors = get_native_errors(ParsedTSV(path), schema)
+    >>> [(e["rowPosition"], e["fieldName"], e["cell"], e["note"]) for e in errors]
+    [(3, 'id', '', 'constraint "required" is "True"'), \
+(3, 'n', '0', 'constraint "minimum" is "1"'), \
+(4, 'n', 'x', 'type is "integer/default"')]
+    """
+    fields = compile_schema(schema)
+    raw = parsed_tsv.raw
+    # frictionless detects the encoding itself; ASCII is the one case we can be sure of
+    if not raw.isascii():
+        raise Unsupported("non-ASCII file")
+    text = raw.decode("ascii")
+    _check_dialect(text)
+    names = [name for name, _ in fields]
+    reader = csv.reader(io.StringIO(text, newline=""), dialect="excel-tab")
+    try:
+        if next(reader, None) != names:
+            raise Unsupported("header does not match schema")
+        rows = list(reader)
+    except csv.Error as e:
+        raise Unsupported(f"CSV error: {e}")
+    for row_position, cells in enumerate(rows, start=2):
+        if len(cells) != len(fields):
+            raise Unsupported(f"row {row_position} has {len(cells)} cells")
+        if all(cell in MISSING_VALUES for cell in cells):
+            raise Unsupported(f"row {row_position} is blank")
+
+    # Work a column at a time, then put the errors back in the order
+    # frictionless finds them: by row, then type and constraint errors
+    # by field, then each custom check in turn, by field.
+    cell_columns = list(zip(*rows)) if rows else [() for _ in fields]
+    columns: dict[str, list] = {}
+    keyed_errors: list[tuple[tuple[int, int, int], dict]] = []
+    for field_number, ((name, validate), cells) in enumerate(zip(fields, cell_columns), start=1):
+        values = columns[name] = []
+        for i, cell in enumerate(cells):
+            value, notes = validate(cell)
+            values.append(value)
+            for code, note in notes:
+                keyed_errors.append(
+                    (
+                        (i, 0, field_number),
+                        _make_error(code, note, cell, name, field_number, i + 2),
+                    )
+                )
+    field_numbers = {name: field_number for field_number, name in enumerate(names, start=1)}
+    try:
+        for check_number, check in enumerate(make_column_checks(schema), start=1):
+            for i, name, note in check(columns):
+                cell = str(columns[name][i])
+                keyed_errors.append(
+                    (
+                        (i, check_number, field_numbers[name]),
+                        _make_error("cell-error", note, cell, name, field_numbers[name], i + 2),
+                    )
+                )
+    except Exception as e:
+        raise Unsupported(f"custom check failed: {e}")
+    # Stable, so the notes on any one cell keep their order. frictionless
+    # stops after the row that reaches the limit, and keeps only LIMIT_ERRORS
+    keyed_errors.sort(key=itemgetter(0))
+    return [error for _, error in keyed_errors[:LIMIT_ERRORS]]
+
+
+def compile_schema(schema: dict) -> list[tuple[str, FieldValidator]]:
+    """
+    (name, validator) for each field, in order; raises Unsupported if any
+    part of the schema needs frictionless.
+    """
+    if unsupported := set(schema) - SCHEMA_KEYS:
+        raise Unsupported(f"schema properties {sorted(unsupported)}")
+    if not isinstance(schema.get("fields"), list):
+        raise Unsupported("schema has no list of fields")
+    fields = []
+    for field in schema["fields"]:
+        if not isinstance(field, dict) or not isinstance(field.get("name"), str):
+            raise Unsupported(f"field {field}")
+        if unsupported := set(field) - FIELD_KEYS:
+            raise Unsupported(f"field {field['name']} properties {sorted(unsupported)}")
+        fields.append((field["name"], _compile_field(field)))
+    names = [name for name, _ in fields]
+    if len(set(names)) != len(names):
+        raise Unsupported("duplicate field names")
+    # frictionless rejects the schema if an example is invalid, but (as of 4.40)
+    # it checks examples only if the last field has one, and then checks every
+    # field, treating a missing example as empty
+    if fields and "example" in schema["fields"][-1]:
+        for field, (name, validate) in zip(schema["fields"], fields):
+            try:
+                _, notes = validate(field.get("example"))
+            except Exception:
+                notes = [("", "")]
+            if notes:
+                raise Unsupported(f'example value for field "{name}" is not valid')
+    return fields
+
+
+def _compile_field(field: dict) -> FieldValidator:
+    field_type = field.get("type", "any")
+    field_format = field.get("format", "default")
+    read, constraint_names = _get_reader(field_type, field_format)
+    constraints = field.get("constraints") or {}
+    if not isinstance(constraints, dict):
+        raise Unsupported(f"field {field['name']} constraints")
+    if unsupported := set(constraints) - set(constraint_names):
+        raise Unsupported(f"field {field['name']} constraints {sorted(unsupported)}")
+    # Same order, and same notes, as frictionless
+    checks = [
+        (name, check, f'constraint "{name}" is "{constraints[name]}"')
+        for name in constraint_names
+        if constraints.get(name) is not None
+        for check in [_compile_constraint(name, constraints[name], read)]
+    ]
+    type_note = f'type is "{field_type}/{field_format}"'
+
+    def validate(cell: str) -> tuple[Any, list[tuple[str, str]]]:
+        if cell in MISSING_VALUES or cell is None:
+            value = None
+        else:
+            value = read(cell)
+            if value is None:
+                return None, [("type-error", type_note)]
+        return value, [("constraint-error", note) for _, check, note in checks if not check(value)]
+
+    return validate
+
+
+def _get_reader(field_type: str, field_format: str) -> tuple[Callable[[Any], Any], list[str]]:
+    """
+    The function frictionless uses to read a cell of this type, and the
+    constraints it checks, in order.
+    """
+    if field_type == "any" and field_format == "default":
+        return (lambda cell: cell), ["required", "enum"]
+    if field_type == "string" and field_format == "default":
+        return _read_string, ["required", "minLength", "maxLength", "pattern", "enum"]
+    if field_type == "string" and field_format == "email":
+        try:
+            import validators
+        except ImportError:
+            raise Unsupported("email validation needs the validators package")
+
+        def read_email(cell):
+            if not isinstance(cell, str) or not validators.email(cell):
+                return None
+            return cell
+
+        return read_email, ["required", "minLength", "maxLength", "pattern", "enum"]
+    if field_type == "number" and field_format == "default":
+        return _read_number, ["required", "minimum", "maximum", "enum"]
+    if field_type == "integer" and field_format == "default":
+        return _read_integer, ["required", "minimum", "maximum", "enum"]
+    if field_type == "boolean" and field_format == "default":
+        return _read_boolean, ["required", "enum"]
+    if field_type == "datetime" and field_format != "any":
+        return _make_datetime_reader(field_format), ["required", "minimum", "maximum", "enum"]
+    if field_type == "date" and field_format != "any":
+        return _make_date_reader(field_format), ["required", "minimum", "maximum", "enum"]
+    raise Unsupported(f'type "{field_type}/{field_format}"')
+
+
+def _compile_constraint(name: str, constraint: Any, read: Callable[[Any], Any]) -> Callable:
+    if name == "required":
+        if not isinstance(constraint, bool):
+            raise Unsupported(f"required: {constraint}")
+        return lambda value: not (constraint and value is None)
+    if name in ["minLength", "maxLength"]:
+        if not isinstance(constraint, int) or isinstance(constraint, bool):
+            raise Unsupported(f"{name}: {constraint}")
+        if name == "minLength":
+            return lambda value: value is None or len(value) >= constraint
+        return lambda value: value is None or len(value) <= constraint
+    if name == "pattern":
+        if not isinstance(constraint, str):
+            raise Unsupported(f"pattern: {constraint}")
+        try:
+            pattern = re.compile(f"^{constraint}$")
+        except re.error:
+            raise Unsupported(f"pattern: {constraint}")
+        return lambda value: value is None or bool(pattern.match(value))
+    if name == "enum":
+        if not isinstance(constraint, list) or not constraint:
+            raise Unsupported(f"enum: {constraint}")
+        options = [read(option) for option in constraint]
+        try:
+            options_set = frozenset(options)
+        except TypeError:
+            raise Unsupported(f"enum: {constraint}")
+        return lambda value: value is None or value in options_set
+    if name in ["minimum", "maximum"]:
+        bound = read(constraint)
+        if bound is None:
+            raise Unsupported(f"{name}: {constraint}")
+        is_minimum = name == "minimum"
+
+        def check_bound(value):
+            if value is None:
+                return True
+            try:
+                return value >= bound if is_minimum else value <= bound
+            except decimal.InvalidOperation:
+                # NaN and infinities never satisfy a bound
+                return False
+            except TypeError:
+                raise Unsupported(f"{name}: cannot compare {value!r} with {bound!r}")
+
+        return check_bound
+    raise Unsupported(f"constraint {name}")
+
+
+def _read_string(cell):
+    return cell if isinstance(cell, str) else None
+
+
+def _read_number(cell):
+    if isinstance(cell, str):
+        try:
+            return Decimal(cell)
+        except Exception:
+            return None
+    if isinstance(cell, Decimal):
+        return cell
+    if cell is True or cell is False:
+        return None
+    if isinstance(cell, int):
+        return cell
+    if isinstance(cell, float):
+        return Decimal(str(cell))
+    return None
+
+
+def _read_integer(cell):
+    if isinstance(cell, str):
+        try:
+            return int(cell)
+        except Exception:
+            return None
+    if cell is True or cell is False:
+        return None
+    if isinstance(cell, int):
+        return cell
+    if isinstance(cell, float) and cell.is_integer():
+        return int(cell)
+    if isinstance(cell, Decimal) and cell % 1 == 0:
+        return int(cell)
+    return None
+
+
+_BOOLEANS = {value: True for value in TRUE_VALUES} | {value: False for value in FALSE_VALUES}
+
+
+def _read_boolean(cell):
+    if cell is True or cell is False:
+        return cell
+    try:
+        return _BOOLEANS.get(cell)
+    except TypeError:
+        return None
+
+
+def _make_datetime_reader(field_format: str) -> Callable[[Any], Any]:
+    def read_datetime(cell):
+        if isinstance(cell, datetime):
+            return cell
+        if not isinstance(cell, str):
+            return None
+        try:
+            if field_format == "default":
+                # Guard against shorter formats supported by dateutil
+                assert cell[16] == ":"
+                assert len(cell) >= 19
+                return dateutil_parser.isoparse(cell)
+            return datetime.strptime(cell, field_format)
+        except Exception:
+            return None
+
+    return read_datetime
+
+
+def _make_date_reader(field_format: str) -> Callable[[Any], Any]:
+    pattern = DEFAULT_DATE_PATTERN if field_format == "default" else field_format
+
+    def read_date(cell):
+        if isinstance(cell, datetime):
+            value_time = cell.time()
+            if value_time.hour == 0 and value_time.minute == 0 and value_time.second == 0:
+                return cell.date()
+            return None
+        if isinstance(cell, date):
+            return cell
+        if not isinstance(cell, str):
+            return None
+        try:
+            return datetime.strptime(cell, pattern).date()
+        except Exception:
+            return None
+
+    return read_date
+
+
+def _check_dialect(text: str):
+    """
+    frictionless sniffs the dialect from the first lines, whatever
+    pre-flight decided; only go ahead if it will read plain TSV too.
+    """
+    sample = "".join(islice(io.StringIO(text, newline=""), SNIFF_LINES))
+    try:
+        dialect = csv.Sniffer().sniff(sample, SNIFF_DELIMITERS)
+    except csv.Error:
+        raise Unsupported("dialect could not be sniffed")
+    if (
+        dialect.delimiter != "\t"
+        or dialect.quotechar not in ['"', "'"]
+        or dialect.escapechar is not None
+        or dialect.skipinitialspace
+    ):
+        raise Unsupported("dialect is not plain TSV")
+
+
+def _make_error(
+    code: str, note: str, cell: str, field_name: str, field_number: int, row_position: int
+) -> dict:
+    return {
+        "code": code,
+        "note": note,
+        "cell": cell,
+        "fieldName": field_name,
+        "fieldNumber": field_number,
+        "fieldPosition": field_number,
+        "rowNumber": row_position - 1,
+        "rowPosition": row_position,
+    }
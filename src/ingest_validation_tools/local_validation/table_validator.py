@@ -1,18 +1,39 @@
 import csv
+import io
+import logging
 from pathlib import Path
-
-import frictionless
+from typing import Iterator, Literal
 
 from ingest_validation_tools.enums import ReportType
-from ingest_validation_tools.local_validation.check_factory import make_checks
+from ingest_validation_tools.local_validation.check_factory import (
+    get_url_status_cache,
+    make_checks,
+    prefetch_url_statuses,
+)
 from ingest_validation_tools.local_validation.message_munger import munge
+from ingest_validation_tools.local_validation.native_validator import (
+    Unsupported,
+    get_native_errors,
+)
+from ingest_validation_tools.parsed_tsv import ParsedTSV
 
 
 def get_table_errors(
-    tsv: Path | str, schema: dict, report_type: ReportType = ReportType.STR
+    tsv: Path | str,
+    schema: dict,
+    report_type: ReportType = ReportType.STR,
+    parsed_tsv: ParsedTSV | None = None,
+    engine: Literal["auto", "native", "frictionless"] = "auto",
 ) -> list:
+    """
+    By default, rows are checked by native_validator, falling back to
+    frictionless for schemas or files it doesn't handle; engine forces one
+    or the other ("native" raises Unsupported rather than falling back).
+    """
     tsv_path = Path(tsv)
-    pre_flight_errors = _get_pre_flight_errors(tsv_path, schema=schema)
+    if parsed_tsv is None:
+        parsed_tsv = ParsedTSV(tsv_path)
+    pre_flight_errors = _get_pre_flight_errors(parsed_tsv, schema=schema)
     if pre_flight_errors:
         return pre_flight_errors
 
@@ -20,8 +41,30 @@ def get_table_errors(
     #     frictionless.__version__ == "4.0.0"
     # ), 'Upgrade dependencies: "pip install -r requirements.txt"'
 
+    prefetch_url_statuses(parsed_tsv.rows, schema)
+    errors = None
+    if engine != "frictionless":
+        try:
+            errors = get_native_errors(parsed_tsv, schema)
+        except Unsupported as e:
+            if engine == "native":
+                raise
+            logging.info(f"Validating {tsv_path} with frictionless: {e}")
+    if errors is None:
+        errors = _get_frictionless_errors(parsed_tsv, schema)
+    get_url_status_cache().flush()
+
+    schema_fields_dict = {field["name"]: field for field in schema["fields"]}
+
+    return [_get_message(error, schema_fields_dict, report_type) for error in errors]
+
+
+def _get_frictionless_errors(parsed_tsv: ParsedTSV, schema: dict) -> list:
+    import frictionless
+
+    # frictionless reads the bytes already in memory rather than re-opening the file
     report = frictionless.validate(
-        tsv_path, schema=schema, format="csv", checks=make_checks(schema)
+        parsed_tsv.raw, schema=schema, format="csv", checks=make_checks(schema)
     )
 
     assert len(report["errors"]) == 0, f"report has errors: {report}"
@@ -30,15 +73,91 @@ def get_table_errors(
     assert len(tasks) == 1, f'"tasks" not single: {report}'
     task = tasks[0]
     assert "errors" in task, f'"tasks" missing "errors": {report}'
+    return task["errors"]
+
+
+def iter_table_errors(
+    tsv: Path | str,
+    schema: dict,
+    report_type: ReportType = ReportType.STR,
+    max_errors: int | None = None,
+    parsed_tsv: ParsedTSV | None = None,
+) -> Iterator[str | dict | int]:
+    """
+    Streaming version of get_table_errors, for very large TSVs: rows are
+    read and checked a batch at a time, each error is yielded as soon as
+    it is found, and validation stops after max_errors. Unless parsed_tsv
+    is given, only the start of the file is held for pre-flight checks.
+    Unlike get_table_errors, errors are not capped at frictionless'
+    default of 1000.
+    """
+    tsv_path = Path(tsv)
+    head = parsed_tsv if parsed_tsv is not None else ParsedTSV.from_head(tsv_path)
+    pre_flight_errors = _get_pre_flight_errors(head, schema=schema)
+    if pre_flight_errors:
+        yield from pre_flight_errors[:max_errors]
+        return
 
     schema_fields_dict = {field["name"]: field for field in schema["fields"]}
+    errors = _iter_frictionless_errors(
+        parsed_tsv.raw if parsed_tsv is not None else tsv_path, schema
+    )
+    try:
+        for count, error in enumerate(errors, start=1):
+            yield _get_message(error, schema_fields_dict, report_type)
+            if max_errors is not None and count >= max_errors:
+                break
+    finally:
+        errors.close()
+        get_url_status_cache().flush()
+
 
-    return [_get_message(error, schema_fields_dict, report_type) for error in task["errors"]]
+# Rows held at once while streaming; their URLs are looked up together
+STREAM_BATCH_SIZE = 100
 
 
-def _get_pre_flight_errors(tsv_path: Path, schema: dict) -> list[str] | None:
+def _iter_frictionless_errors(source: Path | bytes, schema: dict) -> Iterator[dict]:
+    """
+    The data validation loop of frictionless.validate (baseline check
+    plus our custom checks), without collecting the errors into a report.
+    """
+    import frictionless
+
+    checks = [
+        frictionless.checks.baseline(),
+        *(frictionless.Check(function=check) for check in make_checks(schema)),
+    ]
+    resource = frictionless.Resource(source, schema=schema, format="csv")
     try:
-        dialect = csv.Sniffer().sniff(tsv_path.read_text())
+        resource.open()
+    except frictionless.FrictionlessException as exception:
+        yield exception.error
+        return
+    with resource:
+        for check in checks:
+            check.connect(resource)
+            yield from check.validate_start()
+        batch = []
+        for row in resource.row_stream:
+            batch.append(row)
+            if len(batch) >= STREAM_BATCH_SIZE:
+                yield from _check_rows(batch, checks, schema)
+                batch = []
+        yield from _check_rows(batch, checks, schema)
+        for check in checks:
+            yield from check.validate_end()
+
+
+def _check_rows(rows: list, checks: list, schema: dict) -> Iterator[dict]:
+    prefetch_url_statuses(rows, schema)
+    for row in rows:
+        for check in checks:
+            yield from check.validate_row(row)
+
+
+def _get_pre_flight_errors(parsed_tsv: ParsedTSV, schema: dict) -> list[str] | None:
+    try:
+        dialect = parsed_tsv.dialect
     except csv.Error as e:
         return [str(e)]
     delimiter = dialect.delimiter
@@ -46,28 +165,26 @@ def _get_pre_flight_errors(tsv_path: Path, schema: dict) -> list[str] | None:
     if delimiter != expected_delimiter:
         return [f"Delimiter is {repr(delimiter)}, rather than expected {repr(expected_delimiter)}"]
 
-    # Re-reading the file is ugly, but creating a stream seems gratuitous.
-    with tsv_path.open() as tsv_handle:
-        reader = csv.DictReader(tsv_handle, dialect=dialect)
-        fields = reader.fieldnames or []
-        expected_fields = [f["name"] for f in schema["fields"]]
-        if fields != expected_fields:
-            errors = []
-            fields_set = set(fields)
-            expected_fields_set = set(expected_fields)
-            extra_fields = fields_set - expected_fields_set
-
-            if extra_fields:
-                errors.append(f"Unexpected fields: {extra_fields}")
-            missing_fields = expected_fields_set - fields_set
-            if missing_fields:
-                errors.append(f"Missing fields: {sorted(missing_fields)}")
-
-            for i_pair in enumerate(zip(fields, expected_fields)):
-                i, (actual, expected) = i_pair
-                if actual != expected:
-                    errors.append(f'In column {i + 1}, found "{actual}", expected "{expected}"')
-            return errors
+    # Header as read with the sniffed dialect, which may differ from excel-tab
+    fields = next(csv.reader(io.StringIO(parsed_tsv.text), dialect=dialect), [])
+    expected_fields = [f["name"] for f in schema["fields"]]
+    if fields != expected_fields:
+        errors = []
+        fields_set = set(fields)
+        expected_fields_set = set(expected_fields)
+        extra_fields = fields_set - expected_fields_set
+
+        if extra_fields:
+            errors.append(f"Unexpected fields: {extra_fields}")
+        missing_fields = expected_fields_set - fields_set
+        if missing_fields:
+            errors.append(f"Missing fields: {sorted(missing_fields)}")
+
+        for i_pair in enumerate(zip(fields, expected_fields)):
+            i, (actual, expected) = i_pair
+            if actual != expected:
+                errors.append(f'In column {i + 1}, found "{actual}", expected "{expected}"')
+        return errors
 
     return None
 
@@ -129,8 +246,19 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser("CLI just for testing")
     parser.add_argument("--fixture", type=Path, required=True)
+    parser.add_argument(
+        "--max-errors",
+        type=int,
+        help="Stream: print each error as it is found, and stop after this many",
+    )
     args = parser.parse_args()
     tsv_path = args.fixture / "input.tsv"
     schema_path = args.fixture / "schema.yaml"
-    errors = get_table_errors(tsv_path, safe_load(schema_path.read_text()))
-    print("\n".join(errors))
+    if args.max_errors is None:
+        errors = get_table_errors(tsv_path, safe_load(schema_path.read_text()))
+        print("\n".join(errors))
+    else:
+        for error in iter_table_errors(
+            tsv_path, safe_load(schema_path.read_text()), max_errors=args.max_errors
+        ):
+            print(error, flush=True)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import csv
+import io
+from functools import cached_property
+from pathlib import Path
+
+
+class ParsedTSV:
+    """
+    A TSV read from disk once, and parsed lazily. SchemaVersion keeps
+    one so that schema detection, local and online validation, and URL
+    checks all share the same read instead of each re-opening the file.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     path = Path(tmp) / "example.tsv"
+    ...     _ = path.write_bytes(b"a\\tb\\r\\n1\\t2\\r\\n")
+    ...     parsed = ParsedTSV(path)
+    ...     parsed.raw
+    b'a\\tb\\r\\n1\\t2\\r\\n'
+    >>> parsed.header
+    ['a', 'b']
+    >>> parsed.rows
+    [{'a': '1', 'b': '2'}]
+    >>> parsed.dialect.delimiter
+    '\\t'
+    """
+
+    def __init__(self, path: Path | str, encoding: str = "utf-8"):
+        self.path = Path(path)
+        self.encoding = encoding
+
+    @classmethod
+    def from_head(cls, path: Path | str, encoding: str = "utf-8", size: int = 2**16) -> ParsedTSV:
+        """
+        Just the first size bytes of path, cut back to the last complete
+        line: enough to sniff the dialect and read the header of a file
+        that is too big to hold in memory.
+        """
+        parsed_tsv = cls(path, encoding)
+        with parsed_tsv.path.open("rb") as f:
+            head = f.read(size + 1)
+        if len(head) > size:
+            head = head[: head.rfind(b"\n", 0, size) + 1] or head[:size]
+        parsed_tsv.raw = head
+        return parsed_tsv
+
+    @cached_property
+    def raw(self) -> bytes:
+        return self.path.read_bytes()
+
+    @cached_property
+    def text(self) -> str:
+        # Same decoding and newline translation as open(path, encoding=encoding)
+        return io.TextIOWrapper(io.BytesIO(self.raw), encoding=self.encoding).read()
+
+    @cached_property
+    def header(self) -> list[str] | None:
+        return next(csv.reader(io.StringIO(self.text), dialect="excel-tab"), None)
+
+    @cached_property
+    def rows(self) -> list[dict]:
+        return list(csv.DictReader(io.StringIO(self.text), dialect="excel-tab"))
+
+    @cached_property
+    def dialect(self) -> type[csv.Dialect]:
+        """
+        Raises csv.Error if the delimiter can't be determined.
+        """
+        return csv.Sniffer().sniff(self.text)
+
+    def __repr__(self):
+        return f"ParsedTSV({str(self.path)!r}, encoding={self.encoding!r})"
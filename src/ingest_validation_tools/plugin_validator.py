@@ -1,10 +1,25 @@
+import json
+import logging
+import os
+import pickle
+import sys
+import time
 from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import TypeVar
+from typing import Any, Callable, TypeVar
 
+from ingest_validation_tools.directory_validator import DirectoryIndex, get_files
 from ingest_validation_tools.schema_loader import SchemaVersion
+from ingest_validation_tools.tracing import get_tracer, span
 from ingest_validation_tools.validation_utils import add_path
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
 # KeyValuePair type hint is robust, but Validator is not available here; use generic
 ValidatorGeneric = TypeVar("ValidatorGeneric")
 KeyValuePair = Iterator[tuple[ValidatorGeneric, list[str | None]]]
@@ -15,6 +30,53 @@ class ValidatorError(Exception):
     pass
 
 
+@dataclass
+class PluginStats:
+    """
+    What one run of a plugin over paths used. cpu_time includes subprocesses
+    the plugin waited for; peak_rss is the high-water mark of the process the
+    plugin ran in, so in a serial run it also covers earlier plugins. files
+    and bytes are the contents of paths.
+    """
+
+    plugin: str
+    paths: list[str]
+    ran: bool = False
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_rss: int | None = None
+    files: int = 0
+    bytes: int = 0
+    errors: int = 0
+    # When (seconds since the epoch) and in which process it ran
+    started: float = 0.0
+    pid: int = 0
+
+    def as_dict(self) -> dict:
+        """
+        >>> PluginStats("GZValidator", ["ds"], True, 2.0, 1.5, None, 3, 2**21, 1).as_dict()
+        ... # doctest: +NORMALIZE_WHITESPACE
+        {'Plugin': 'GZValidator', 'Paths': ['ds'], 'Ran': True, 'Wall time (s)': 2.0,
+         'CPU time (s)': 1.5, 'Files': 3, 'Bytes': 2097152, 'Errors': 1,
+         'Throughput (MiB/s)': 1.0}
+        """
+        as_dict: dict[str, Any] = {
+            "Plugin": self.plugin,
+            "Paths": self.paths,
+            "Ran": self.ran,
+            "Wall time (s)": round(self.wall_time, 3),
+            "CPU time (s)": round(self.cpu_time, 3),
+            "Files": self.files,
+            "Bytes": self.bytes,
+            "Errors": self.errors,
+        }
+        if self.peak_rss is not None:
+            as_dict["Peak RSS (MiB)"] = round(self.peak_rss / 2**20, 1)
+        if self.ran and self.wall_time:
+            as_dict["Throughput (MiB/s)"] = round(self.bytes / 2**20 / self.wall_time, 2)
+        return as_dict
+
+
 def run_plugin_validators_iter(
     metadata_path: PathOrStr,
     sv: SchemaVersion,
@@ -32,6 +94,9 @@ def run_plugin_validators_iter(
 
     metadata_path: path to a metadata.tsv file
     plugin_dir: path to a directory containing validator classes
+    kwargs: passed through to each plugin; this includes directory_indexes,
+        the {dataset_path: DirectoryIndex} listings already made by directory
+        validation, so plugins can avoid walking the same trees again
 
     returns: Iterator[Tuple[Validator, list[str | None]]]
          - Ran, no errors: (<ValidatorSubclassInstance>, [None])
@@ -89,6 +154,10 @@ def validation_error_iter(
     schema_rows: list[dict] = [],
     globus_token: str = "",
     app_context: dict[str, str] = {},
+    plugin_workers: int | None = None,
+    plugin_parallel_paths: bool = False,
+    plugin_stats: list[PluginStats] | None = None,
+    plugin_timing_log: PathOrStr | None = None,
     **kwargs,
 ) -> KeyValuePair:
     """
@@ -100,6 +169,14 @@ def validation_error_iter(
     assay_type: the assay type which produced the data in the directory tree
     plugin_dir: path to a directory containing validator classes
     contains: list of component assay types (empty if not multi-assay)
+    plugin_workers: if more than 1, run the validator classes in this many
+        processes; results are still yielded in validation_class_iter order
+    plugin_parallel_paths: with plugin_workers, also run each validator on
+        each path separately (only for plugins that check paths independently)
+    plugin_stats: if a list, a PluginStats is appended for each validator run
+        (each validator, or with plugin_parallel_paths each validator and path)
+    plugin_timing_log: if set, the same figures are appended to this file as
+        JSON lines
 
     returns an iterator the values of which are key value pairs representing
     error messages
@@ -111,16 +188,247 @@ def validation_error_iter(
             print(f"Found plugins at {plugin_dir}")
         except Exception as e:
             raise ValidatorError(f"Could not import from plugin_dir {plugin_dir}: {e}")
-        for val_class in validation_class_iter():
-            validator = val_class(
+        args = (assay_type, contains, verbose, schema_rows, globus_token, app_context)
+        record = None
+        if plugin_stats is not None or plugin_timing_log:
+            record = _get_stats_recorder(
+                plugin_stats, plugin_timing_log, kwargs.get("directory_indexes")
+            )
+        if plugin_workers and plugin_workers > 1 and _can_pickle(args, kwargs):
+            yield from _parallel_validation_error_iter(
+                list(validation_class_iter()),
                 paths,
-                assay_type,
-                contains,
-                verbose,
-                schema_rows,
-                globus_token,
-                app_context,
-                **kwargs,
+                plugin_dir,
+                args,
+                kwargs,
+                plugin_workers,
+                plugin_parallel_paths,
+                record,
             )
-            for err in validator.collect_errors():
+            return
+        for val_class in validation_class_iter():
+            with span("plugin", plugin=val_class.__name__):
+                if record is None:
+                    validator = val_class(paths, *args, **kwargs)
+                    for err in validator.collect_errors():
+                        yield val_class, err
+                    continue
+                errors, stats = _run_validator(val_class, paths, args, kwargs)
+            record(stats, paths)
+            for err in errors:
+                yield val_class, err
+
+
+def _parallel_validation_error_iter(
+    val_classes: list,
+    paths: list[Path],
+    plugin_dir: PathOrStr,
+    args: tuple,
+    kwargs: dict[str, Any],
+    plugin_workers: int,
+    plugin_parallel_paths: bool,
+    record: Callable[[PluginStats, list[Path]], None] | None,
+) -> KeyValuePair:
+    """
+    Everything is submitted at once; results are yielded per validator class,
+    in order, as they become available. A validator that raises gets that
+    exception as its error, rather than stopping the others.
+    """
+    path_groups = [[path] for path in paths] if plugin_parallel_paths else [paths]
+    kwargs_by_group = [_kwargs_for_paths(kwargs, path_group) for path_group in path_groups]
+    executor = ProcessPoolExecutor(
+        max_workers=plugin_workers, initializer=_add_plugin_dir, initargs=(str(plugin_dir),)
+    )
+    try:
+        futures = [
+            [
+                executor.submit(
+                    _collect_errors,
+                    val_class.__module__,
+                    val_class.__qualname__,
+                    path_group,
+                    args,
+                    group_kwargs,
+                )
+                for path_group, group_kwargs in zip(path_groups, kwargs_by_group)
+            ]
+            for val_class in val_classes
+        ]
+        for val_class, class_futures in zip(val_classes, futures):
+            results = []
+            failures: list[str] = []
+            for path_group, future in zip(path_groups, class_futures):
+                try:
+                    errors, stats = future.result()
+                except Exception as e:
+                    logging.exception(f"Plugin {val_class.__name__} failed: {e}")
+                    # Reported once, however many paths it failed on
+                    failure = f"{val_class.__name__} failed: {type(e).__name__}: {e}"
+                    if failure not in failures:
+                        failures.append(failure)
+                    continue
+                results.append(errors)
+                if record is not None:
+                    record(stats, path_group)
+                if tracer := get_tracer():
+                    tracer.add_span(
+                        "plugin",
+                        stats.started,
+                        stats.wall_time,
+                        pid=stats.pid,
+                        plugin=val_class.__name__,
+                        paths=stats.paths,
+                    )
+            for err in _merge_path_results(results + [failures]):
                 yield val_class, err
+    finally:
+        # If iteration stops early, don't wait for plugins that haven't started
+        executor.shutdown(cancel_futures=True)
+
+
+def _merge_path_results(results: list[list]) -> list:
+    """
+    Combine the results of running one validator on each path separately
+    into what a single run over all the paths would have returned.
+
+    >>> _merge_path_results([[None], ["error"], [None]])
+    ['error']
+    >>> _merge_path_results([[None], [None]])
+    [None]
+    >>> _merge_path_results([[], []])
+    []
+    """
+    errors = [err for result in results for err in result if err is not None]
+    if errors:
+        return errors
+    if any(None in result for result in results):
+        return [None]
+    return []
+
+
+def _kwargs_for_paths(kwargs: dict[str, Any], paths: list[Path]) -> dict[str, Any]:
+    """
+    kwargs for a worker running on paths: each worker is sent the
+    directory listings of its own paths, not every listing in the upload.
+
+    >>> kwargs = {"directory_indexes": {Path("a"): ["x"], Path("b"): ["y"]}, "n": 1}
+    >>> _kwargs_for_paths(kwargs, [Path("b")])
+    {'directory_indexes': {PosixPath('b'): ['y']}, 'n': 1}
+    """
+    directory_indexes = kwargs.get("directory_indexes")
+    if not directory_indexes:
+        return kwargs
+    return kwargs | {
+        "directory_indexes": {
+            path: directory_indexes[path] for path in paths if path in directory_indexes
+        }
+    }
+
+
+def _can_pickle(args: tuple, kwargs: dict[str, Any]) -> bool:
+    try:
+        pickle.dumps((args, kwargs))
+    except Exception as e:
+        logging.warning(f"Running plugins serially; arguments can't be sent to workers: {e}")
+        return False
+    return True
+
+
+def _add_plugin_dir(plugin_dir: str) -> None:
+    sys.path.insert(0, plugin_dir)
+
+
+def _collect_errors(
+    module_name: str, class_name: str, paths: list[Path], args: tuple, kwargs: dict[str, Any]
+) -> tuple[list, PluginStats]:
+    """
+    Run in a worker process: find the validator class by name, since
+    plugin modules may be loaded in ways that pickle can't follow, and run it.
+    """
+    from validator import validation_class_iter  # type: ignore
+
+    for val_class in validation_class_iter():
+        if val_class.__module__ == module_name and val_class.__qualname__ == class_name:
+            return _run_validator(val_class, paths, args, kwargs)
+    raise ValidatorError(f"Plugin {module_name}.{class_name} not found in worker")
+
+
+def _run_validator(
+    val_class: Any, paths: list[Path], args: tuple, kwargs: dict[str, Any]
+) -> tuple[list, PluginStats]:
+    stats = PluginStats(val_class.__name__, [str(path) for path in paths])
+    stats.started, stats.pid = time.time(), os.getpid()
+    start_wall, start_cpu = time.perf_counter(), _get_cpu_time()
+    errors = list(val_class(paths, *args, **kwargs).collect_errors())
+    stats.wall_time = time.perf_counter() - start_wall
+    stats.cpu_time = _get_cpu_time() - start_cpu
+    stats.peak_rss = _get_peak_rss()
+    stats.ran = bool(errors)
+    stats.errors = len([err for err in errors if err is not None])
+    return errors, stats
+
+
+def _get_stats_recorder(
+    plugin_stats: list[PluginStats] | None,
+    plugin_timing_log: PathOrStr | None,
+    directory_indexes: dict[Path, DirectoryIndex] | None,
+) -> Callable[[PluginStats, list[Path]], None]:
+    """
+    Returns a function that fills in the size of the paths a plugin ran on
+    (each path is listed and sized once) and records its stats.
+    """
+    sizes: dict[Path, tuple[int, int]] = {}
+
+    def get_size(path: Path) -> tuple[int, int]:
+        if path not in sizes:
+            files, total = 0, 0
+            try:
+                for file in get_files([path], directory_indexes).files:
+                    files += 1
+                    total += (path / file).stat().st_size
+            except OSError as e:
+                logging.warning(f"Unable to size {path} for plugin stats: {e}")
+            sizes[path] = (files, total)
+        return sizes[path]
+
+    def record(stats: PluginStats, paths: list[Path]) -> None:
+        for path in paths:
+            files, total = get_size(Path(path))
+            stats.files += files
+            stats.bytes += total
+        if plugin_stats is not None:
+            plugin_stats.append(stats)
+        if plugin_timing_log:
+            try:
+                with open(plugin_timing_log, "a") as f:
+                    f.write(json.dumps({"time": time.time(), **asdict(stats)}) + "\n")
+            except OSError as e:
+                logging.warning(f"Unable to write plugin timing log {plugin_timing_log}: {e}")
+
+    return record
+
+
+def _get_cpu_time() -> float:
+    """
+    CPU time of this process, and of subprocesses it has waited for.
+    """
+    cpu_time = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu_time += children.ru_utime + children.ru_stime
+    return cpu_time
+
+
+def _get_peak_rss() -> int | None:
+    """
+    Peak resident set size, in bytes, of this process or any subprocess
+    it has waited for.
+    """
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,176 @@
+"""
+Results of get_tsv_errors, keyed on the TSV's content and everything else
+that affects them, so a spreadsheet validated again (e.g. re-uploaded
+through the portal) isn't re-validated from scratch:
+
+    result_cache = SQLiteResultCache(Path("/var/cache/tsv-results.sqlite"))
+    errors = get_tsv_errors(path, schema_name, result_cache=result_cache)
+
+Results are stored as JSON. Those that depend on online checks expire
+after online_ttl seconds; offline results last until evicted, or until
+the schemas or this package are upgraded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+# Entity-api records, ORCIDs and CEDAR templates change; an hour is long
+# enough to cover re-submissions of the same spreadsheet
+DEFAULT_ONLINE_TTL = 60 * 60
+
+
+def get_result_key(
+    content: bytes,
+    schema_name: str,
+    report_type: str,
+    offline: bool,
+    schema_version: str,
+    **options,
+) -> str:
+    """
+    Digest of the TSV content and the options that affect its errors.
+
+    >>> a = get_result_key(b"a\\tb\\n", "sample", "STR", True, "digest")
+    >>> a == get_result_key(b"a\\tb\\n", "sample", "STR", True, "digest")
+    True
+    >>> a == get_result_key(b"a\\tb\\n", "sample", "JSON", True, "digest")
+    False
+    """
+    key = {
+        "content": hashlib.sha256(content).hexdigest(),
+        "schema_name": schema_name,
+        "report_type": report_type,
+        "offline": offline,
+        "schema_version": schema_version,
+        **options,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache(ABC):
+    """
+    Subclasses store a JSON string and an expiry time (or None) by key.
+    """
+
+    def __init__(self, online_ttl: float = DEFAULT_ONLINE_TTL):
+        self.online_ttl = online_ttl
+
+    def get(self, key: str) -> Any | None:
+        entry = self._get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires < time.time():
+            self._delete(key)
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> bool:
+        """
+        Returns False, and stores nothing, if value can't be stored as JSON.
+        """
+        try:
+            encoded = json.dumps(value)
+        except (TypeError, ValueError):
+            return False
+        self._set(key, encoded, None if ttl is None else time.time() + ttl)
+        return True
+
+    @abstractmethod
+    def _get(self, key: str) -> tuple[str, float | None] | None:
+        pass
+
+    @abstractmethod
+    def _set(self, key: str, value: str, expires: float | None) -> None:
+        pass
+
+    @abstractmethod
+    def _delete(self, key: str) -> None:
+        pass
+
+
+class MemoryResultCache(ResultCache):
+    """
+    The maxsize most recently used results, in this process.
+
+    >>> result_cache = MemoryResultCache(maxsize=2)
+    >>> for key in ["a", "b", "c"]:
+    ...     _ = result_cache.set(key, [f"error in {key}"])
+    >>> result_cache.get("a") is None, result_cache.get("c")
+    (True, ['error in c'])
+    >>> result_cache.set("d", [ValueError()])
+    False
+    """
+
+    def __init__(self, maxsize: int = 1024, online_ttl: float = DEFAULT_ONLINE_TTL):
+        super().__init__(online_ttl)
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[str, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def _set(self, key, value, expires):
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteResultCache(ResultCache):
+    """
+    Results in an SQLite database, shared by every process that opens it
+    and kept across restarts. Expired results are purged on open.
+    """
+
+    def __init__(self, path: Path, online_ttl: float = DEFAULT_ONLINE_TTL):
+        super().__init__(online_ttl)
+        self.path = Path(path)
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)"
+            )
+            self._connection.execute("DELETE FROM results WHERE expires < ?", (time.time(),))
+
+    def _get(self, key):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT value, expires FROM results WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _set(self, key, value, expires):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, expires),
+            )
+
+    def _delete(self, key):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
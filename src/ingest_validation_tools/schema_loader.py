@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import pickle
 import re
 from collections import defaultdict
 from copy import deepcopy
 from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from functools import lru_cache
 from pathlib import Path
 from typing import Sequence
 
@@ -15,15 +20,21 @@ from ingest_validation_tools.enums import (
     Sample,
     shared_enums,
 )
+from ingest_validation_tools.parsed_tsv import ParsedTSV
 from ingest_validation_tools.yaml_include_loader import load_yaml
 
 _table_schemas_path = Path(__file__).parent / "table-schemas"
 _directory_schemas_path = Path(__file__).parent / "directory-schemas"
 _pipeline_infos_path = Path(__file__).parent / "pipeline-infos/pipeline-infos.yaml"
+# Built by src/generate_schema_bundle.py; optional
+_schema_bundle_path = Path(__file__).parent / "schema-bundle.pickle"
+_schema_bundle_format = 1
 
 
 def get_pipeline_infos(name: str) -> list[str]:
-    infos = load_yaml(_pipeline_infos_path)
+    infos = _get_bundled("pipeline-infos", "")
+    if infos is None:
+        infos = load_yaml(_pipeline_infos_path)
     return infos.get(name, [])
 
 
@@ -59,6 +70,8 @@ class SchemaVersion:
     contains: list = field(default_factory=list)
     entity_type_info: EntityTypeInfo | None = None
     ancestor_entities: list[AncestorTypeInfo] = field(default_factory=list)
+    # The file behind path/rows, read once and shared by every validation stage
+    parsed_tsv: ParsedTSV | None = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         if type(self.path) is str:
@@ -269,17 +282,35 @@ def get_table_schema(
     no_url_checks: bool = False,
     keep_headers: bool = False,
 ) -> dict:
-    try:
-        schema = load_yaml(
-            Path(
-                _table_schemas_path
-                / schema_version.metadata_type
-                / f"{schema_version.table_schema}.yaml"
-            )
+    schema = _get_bundled("table", f"{schema_version.metadata_type}/{schema_version.table_schema}")
+    if schema is None:
+        return _load_table_schema(
+            schema_version.metadata_type,
+            schema_version.table_schema,
+            no_url_checks=no_url_checks,
+            keep_headers=keep_headers,
         )
+    # Bundled schemas were processed with headers and URL checks;
+    # the same field dicts are processed either way, so just drop them.
+    if not keep_headers:
+        schema["fields"] = get_fields_wo_headers(schema)
+    if no_url_checks:
+        for schema_field in get_fields_wo_headers(schema):
+            schema_field.get("custom_constraints", {}).pop("url", None)
+    return schema
+
+
+def _load_table_schema(
+    metadata_type: str,
+    table_schema: str,
+    no_url_checks: bool = False,
+    keep_headers: bool = False,
+) -> dict:
+    try:
+        schema = load_yaml(Path(_table_schemas_path / metadata_type / f"{table_schema}.yaml"))
     except FileNotFoundError:
         raise FileNotFoundError(
-            f"No such file or directory: {_table_schemas_path}/{schema_version.metadata_type}/{schema_version.table_schema}.yaml"  # noqa: E501
+            f"No such file or directory: {_table_schemas_path}/{metadata_type}/{table_schema}.yaml"  # noqa: E501
         )
     fields_wo_headers = get_fields_wo_headers(schema)
     if not keep_headers:
@@ -289,11 +320,11 @@ def get_table_schema(
     for schema_field in schema["fields"]:
         if isinstance(schema_field, str):
             continue
-        if schema_version.metadata_type == "assays":
+        if metadata_type == "assays":
             _add_level_1_description(schema_field)
             _validate_level_1_enum(schema_field)
         _add_constraints(schema_field, no_url_checks=no_url_checks, names=names)
-        if schema_version.metadata_type == "assays":
+        if metadata_type == "assays":
             _validate_field(schema_field)
 
     return schema
@@ -308,6 +339,13 @@ def get_directory_schema(
         dir_schema = _get_schema_filename(directory_type, version_number)
     if not dir_schema:
         raise Exception("Not enough information to retrieve directory schema.")
+    bundle = _get_schema_bundle()
+    if bundle is not None:
+        if dir_schema not in bundle["directory"]:
+            return {}
+        schema = pickle.loads(bundle["directory"][dir_schema])
+        schema["files"] += []
+        return schema
     directory_schema_path = _directory_schemas_path / f"{dir_schema}.yaml"
     if not directory_schema_path.exists():
         return {}
@@ -319,6 +357,14 @@ def get_directory_schema(
 def get_possible_directory_schemas(dir_schema: str) -> dict:
     schemas = {}
     # this assumes that versions are numbered starting at x.0, no whole numbers
+    bundle = _get_schema_bundle()
+    if bundle is not None:
+        for stem, pickled in bundle["directory"].items():
+            if fnmatch(f"{stem}.yaml", f"{dir_schema}*.yaml"):
+                schema = pickle.loads(pickled)
+                schema["files"] += []
+                schemas[stem] = schema
+        return schemas
     directory_schema_minor_versions = list(_directory_schemas_path.glob(f"{dir_schema}*.yaml"))
     if not directory_schema_minor_versions:
         return {}
@@ -329,6 +375,118 @@ def get_possible_directory_schemas(dir_schema: str) -> dict:
     return schemas
 
 
+def schema_sources_digest() -> str:
+    """
+    Digest of every schema YAML file and of the code that processes them.
+    A schema bundle is only used if it was built from the same sources.
+    """
+    package_path = Path(__file__).parent
+    # (source, what its name is relative to): the schema directories may
+    # be elsewhere, e.g. in tests, but are named as in the package
+    sources = [
+        *[
+            (path, _table_schemas_path.parent)
+            for path in sorted(_table_schemas_path.rglob("*.yaml"))
+        ],
+        *[
+            (path, _directory_schemas_path.parent)
+            for path in sorted(_directory_schemas_path.rglob("*.yaml"))
+        ],
+        (_pipeline_infos_path, _pipeline_infos_path.parent.parent),
+        (package_path / "schema_loader.py", package_path),
+        (package_path / "enums.py", package_path),
+        (package_path / "yaml_include_loader.py", package_path),
+    ]
+    digest = hashlib.sha256()
+    for source, base_path in sources:
+        digest.update(source.relative_to(base_path).as_posix().encode() + b"\0")
+        digest.update(source.read_bytes() + b"\0")
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def get_schema_bundle_version() -> str:
+    """
+    Identifies the schemas in use, for keying cached validation results.
+    Computed once per process.
+    """
+    bundle = _get_schema_bundle()
+    return bundle["digest"] if bundle is not None else schema_sources_digest()
+
+
+def build_schema_bundle(bundle_path: Path | None = None) -> dict:
+    """
+    Load and process every table and directory schema and write them,
+    pickled, to a single file that schema_loader reads instead of the YAML.
+    Table schemas are stored as get_table_schema(keep_headers=True) returns
+    them. Schemas that fail to load are left out, so they still raise the
+    same errors at runtime. Returns counts of what was bundled.
+    """
+    bundle: dict = {
+        "format": _schema_bundle_format,
+        "digest": schema_sources_digest(),
+        "table": {},
+        "directory": {},
+        "pipeline-infos": {"": pickle.dumps(load_yaml(_pipeline_infos_path))},
+    }
+    skipped = []
+    for metadata_type in ["assays", "others"]:
+        for path in sorted((_table_schemas_path / metadata_type).glob("*.yaml")):
+            try:
+                schema = _load_table_schema(metadata_type, path.stem, keep_headers=True)
+            except Exception as e:
+                skipped.append(f"{metadata_type}/{path.stem}: {e}")
+                continue
+            bundle["table"][f"{metadata_type}/{path.stem}"] = pickle.dumps(schema)
+    for path in sorted(_directory_schemas_path.glob("*.yaml")):
+        bundle["directory"][path.stem] = pickle.dumps(load_yaml(path))
+    bundle_path = bundle_path if bundle_path else _schema_bundle_path
+    temp_path = bundle_path.with_suffix(".tmp")
+    temp_path.write_bytes(pickle.dumps(bundle, protocol=pickle.HIGHEST_PROTOCOL))
+    temp_path.replace(bundle_path)
+    _get_schema_bundle.cache_clear()
+    return {
+        "table": len(bundle["table"]),
+        "directory": len(bundle["directory"]),
+        "skipped": skipped,
+    }
+
+
+@lru_cache(maxsize=None)
+def _get_schema_bundle() -> dict | None:
+    """
+    The schema bundle, if one has been built and matches the schemas on disk.
+    Read once per process.
+    """
+    if not _schema_bundle_path.exists():
+        return None
+    try:
+        bundle = pickle.loads(_schema_bundle_path.read_bytes())
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable schema bundle {_schema_bundle_path}: {e}")
+        return None
+    if (
+        bundle.get("format") != _schema_bundle_format
+        or bundle.get("digest") != schema_sources_digest()
+    ):
+        logging.warning(
+            f"Ignoring out-of-date schema bundle {_schema_bundle_path}; "
+            "rebuild with src/generate_schema_bundle.py"
+        )
+        return None
+    return bundle
+
+
+def _get_bundled(kind: str, key: str) -> dict | None:
+    """
+    A fresh copy of a bundled schema, or None to fall back to the YAML.
+    """
+    bundle = _get_schema_bundle()
+    if bundle is None or key not in bundle[kind]:
+        return None
+    return pickle.loads(bundle[kind][key])
+
+
 def _validate_field(field: dict) -> None:
     if field["name"].endswith("_unit") and "enum" not in field["constraints"]:
         raise Exception('"_unit" fields must have enum constraints', field)
@@ -0,0 +1,196 @@
+"""
+Timing of validation stages, and counts of the work done in them, for
+finding hot paths:
+
+    tracer = Tracer()
+    upload = Upload(directory_path=path, tracer=tracer)
+    upload.get_errors()
+    tracer.write_chrome_trace(Path("trace.json"))  # chrome://tracing or ui.perfetto.dev
+
+Code marks a stage with `with span("name", key=value):` and a count with
+`count("name")`. Both do nothing unless a tracer is in use (see use_tracer).
+The tracer in use is held in a ContextVar, so concurrent validations can
+be traced separately; functions run on other threads should be wrapped
+with with_tracer.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_tracer: ContextVar[Tracer | None] = ContextVar("tracer", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    # Seconds since the epoch, so spans from other processes line up
+    start: float
+    duration: float
+    pid: int
+    tid: int
+    args: dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    """
+    Records spans and counts; subclass to send them elsewhere.
+
+    >>> tracer = Tracer()
+    >>> with use_tracer(tracer):
+    ...     with span("validate_metadata", tsv="a.tsv"):
+    ...         count("HTTP calls", 2)
+    >>> tracer.summary()["Counts"]
+    {'HTTP calls': 2}
+    >>> [event["name"] for event in tracer.as_chrome_trace()["traceEvents"]]
+    ['validate_metadata', 'HTTP calls']
+    """
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self.counts: Counter[str] = Counter()
+        # (time, name, running total), for the counter tracks of the trace
+        self.count_events: list[tuple[float, str, int]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **args) -> Iterator[None]:
+        start, start_counter = time.time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter() - start_counter, **args)
+
+    def add_span(
+        self,
+        name: str,
+        start: float,
+        duration: float,
+        pid: int | None = None,
+        tid: int | None = None,
+        **args,
+    ) -> None:
+        """
+        Record a span timed elsewhere, e.g. in a worker process.
+        """
+        span = Span(
+            name,
+            start,
+            duration,
+            pid if pid is not None else os.getpid(),
+            tid if tid is not None else threading.get_ident(),
+            {key: str(value) for key, value in args.items()},
+        )
+        with self._lock:
+            self.spans.append(span)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counts[name] += n
+            self.count_events.append((time.time(), name, self.counts[name]))
+
+    def summary(self) -> dict:
+        """
+        Total seconds per stage name, in the order stages first finished,
+        and counts. Nested and concurrent stages overlap, so the totals
+        can add up to more than the elapsed time.
+        """
+        with self._lock:
+            stages: dict[str, float] = {}
+            for span in self.spans:
+                stages[span.name] = stages.get(span.name, 0) + span.duration
+            return {
+                "Stages (s)": {name: round(total, 3) for name, total in stages.items()},
+                "Counts": dict(self.counts),
+            }
+
+    def as_chrome_trace(self) -> dict:
+        """
+        The spans and counts as Chrome trace events (JSON object format).
+        """
+        with self._lock:
+            events: list[dict[str, Any]] = [
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": span.start * 1e6,
+                    "dur": span.duration * 1e6,
+                    "pid": span.pid,
+                    "tid": span.tid,
+                    "args": span.args,
+                }
+                for span in self.spans
+            ]
+            events += [
+                {
+                    "name": name,
+                    "ph": "C",
+                    "ts": timestamp * 1e6,
+                    "pid": os.getpid(),
+                    "args": {name: total},
+                }
+                for timestamp, name, total in self.count_events
+            ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.as_chrome_trace()))
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer.get()
+
+
+@contextmanager
+def use_tracer(tracer: Tracer | None) -> Iterator[None]:
+    """
+    Record spans and counts in this context with tracer; if None, leave
+    whatever tracer is in use (if any) in place.
+    """
+    if tracer is None:
+        yield
+        return
+    token = _tracer.set(tracer)
+    try:
+        yield
+    finally:
+        _tracer.reset(token)
+
+
+def span(name: str, **args) -> ContextManager[None]:
+    tracer = _tracer.get()
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, **args)
+
+
+def count(name: str, n: int = 1) -> None:
+    tracer = _tracer.get()
+    if tracer is not None:
+        tracer.count(name, n)
+
+
+def with_tracer(function: Callable[..., T]) -> Callable[..., T]:
+    """
+    function, run with the current tracer wherever it is called; for
+    functions passed to thread pools, which don't inherit context. The
+    rest of the context (e.g. the HTTP client in use) is carried too.
+    """
+    context = copy_context()
+
+    def run(*args, **kwargs) -> T:
+        # A copy per call: one context can't be entered by two threads at once
+        return context.copy().run(function, *args, **kwargs)
+
+    return run
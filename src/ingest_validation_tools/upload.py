@@ -1,19 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import subprocess
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from fnmatch import fnmatch
-from functools import cached_property
+from functools import cached_property, lru_cache
+from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
-from typing import DefaultDict
+from typing import Any, Callable, DefaultDict
 from urllib.parse import urlsplit
 
 import requests
 
-from ingest_validation_tools.directory_validator import get_files
+from ingest_validation_tools.directory_validator import DirectoryIndex, get_files
 from ingest_validation_tools.enums import (
     UNIQUE_FIELDS_MAP,
     DatasetType,
@@ -21,23 +24,34 @@ from ingest_validation_tools.enums import (
     Sample,
 )
 from ingest_validation_tools.error_report import ErrorDict, InfoDict
+from ingest_validation_tools.http_utils import (
+    get_http_client,
+    http_get,
+    http_post,
+    use_http_client,
+)
 from ingest_validation_tools.local_validation.table_validator import (
     ReportType,
     get_table_errors,
 )
+from ingest_validation_tools.parsed_tsv import ParsedTSV
 from ingest_validation_tools.plugin_validator import (
     ValidatorError as PluginValidatorError,
 )
 from ingest_validation_tools.plugin_validator import (
     run_plugin_validators_iter,
 )
+from ingest_validation_tools.result_cache import DEFAULT_ONLINE_TTL
 from ingest_validation_tools.schema_loader import (
     AncestorTypeInfo,
     EntityTypeInfo,
     PreflightError,
     SchemaVersion,
+    get_schema_bundle_version,
     get_table_schema,
 )
+from ingest_validation_tools.tracing import Tracer, span, use_tracer, with_tracer
+from ingest_validation_tools.upload_manifest import UploadManifest
 from ingest_validation_tools.validation_utils import (
     TSVError,
     cedar_validation_call,
@@ -47,7 +61,8 @@ from ingest_validation_tools.validation_utils import (
     get_entity_type_vals,
     get_message,
     get_schema_version,
-    read_rows,
+    read_tsv,
+    run_async,
 )
 
 TSV_SUFFIX = "metadata.tsv"
@@ -58,6 +73,40 @@ CHECK_FIELDS = [
     "source_id",
     "sample_id",
 ]
+# TSVs checked against remote APIs at once, if max_workers is not set
+ONLINE_CHECK_CONCURRENCY = 8
+# ErrorDict fields that _online_checks adds to
+ONLINE_ERROR_TYPES = [
+    "metadata_validation_api",
+    "metadata_url_errors",
+    "metadata_constraint_errors",
+]
+DISTRIBUTION_NAME = "ingest-validation-tools"
+
+
+@lru_cache(maxsize=None)
+def get_version() -> str | None:
+    """
+    The version reported as "Git version": that of the installed package
+    (from setuptools-git-versioning, so untagged builds include the commit
+    hash) or, if this code isn't installed, the short hash of the checkout
+    it is in. Resolved once per process; None if neither is available,
+    e.g. in a container without git.
+    """
+    try:
+        return version(DISTRIBUTION_NAME)
+    except PackageNotFoundError:
+        pass
+    try:
+        return subprocess.check_output(
+            "git rev-parse --short HEAD".split(" "),
+            encoding="ascii",
+            stderr=subprocess.STDOUT,
+            cwd=Path(__file__).parent,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError) as e:
+        logging.warning(f"Unable to determine version: {e}")
+        return None
 
 
 class Upload:
@@ -77,6 +126,9 @@ class Upload:
         app_context: dict = {},
         verbose: bool = True,
         report_type: ReportType = ReportType.STR,
+        max_workers: int | None = None,
+        manifest_path: Path | None = None,
+        tracer: Tracer | None = None,
         **kwargs,  # prevent blowing up if passed deprecated kwarg
     ):
         del kwargs
@@ -90,13 +142,42 @@ class Upload:
         self.encoding = encoding
         self.offline_only = offline_only
         self.ignore_deprecation = ignore_deprecation
+        # Passed through to each plugin, except plugin_workers,
+        # plugin_parallel_paths and plugin_timing_log (see
+        # plugin_validator.validation_error_iter) and plugin_stats, which
+        # records PluginStats in self.info if true
         self.plugin_kwargs = plugin_kwargs if plugin_kwargs else {}
         self.globus_token = globus_token
         self.run_plugins = run_plugins
         self.verbose = verbose
         self.report_type = report_type
+        # Number of threads used to validate data_path directories and to
+        # look up entity IDs/ORCIDs; None uses the ThreadPoolExecutor default,
+        # 1 runs serially
+        self.max_workers = max_workers
+        # Results of the last validation, if any, reused for stages whose
+        # inputs haven't changed, and then updated; see upload_manifest.
+        # Discarded after an upgrade of this package or the schemas
+        self.manifest = (
+            UploadManifest(
+                manifest_path, {"code": get_version(), "schemas": get_schema_bundle_version()}
+            )
+            if manifest_path
+            else None
+        )
+        # Records the time taken by each stage, and counts of the work done;
+        # summarized by get_info. See tracing
+        self.tracer = tracer
 
         self.dataset_metadata: dict[Path, SchemaVersion] = {}
+        # Each TSV, read from disk once per validation; see get_parsed_tsv
+        self.parsed_tsvs: dict[Path, ParsedTSV] = {}
+        # Listing of each dataset directory, walked at most once per validation
+        self.directory_indexes: dict[Path, DirectoryIndex] = {}
+        # Entity-api responses and ORCID checks, by (kind, value); see _get_url_lookup
+        self.url_lookups: dict[tuple[str, str], Any] = {}
+        # (tsv_path, schema) pairs waiting for online checks; see get_errors
+        self._queued_online_checks: list[tuple[Path, SchemaVersion]] | None = None
         self.errors = ErrorDict()
         self.info = InfoDict()
         self.get_errors_called: bool = False
@@ -104,21 +185,22 @@ class Upload:
 
         self.get_app_context(app_context)
 
-        try:
-            """
-            Get TSVs, set up or rule out multi-assay/
-            shared uploads, ensure only single type for
-            single-assay upload.
-            """
-            self.get_metadata_tsvs(tsv_paths)
-            self._check_multi_assay()
-            if not self.is_multi_assay:
-                self._check_single_assay()
-            self.is_shared_upload
-            self.shared_upload_non_global_paths
-
-        except PreflightError as e:
-            self.errors.preflight.value = str(e)
+        with use_tracer(self.tracer), use_http_client(self.http_client), span("preflight"):
+            try:
+                """
+                Get TSVs, set up or rule out multi-assay/
+                shared uploads, ensure only single type for
+                single-assay upload.
+                """
+                self.get_metadata_tsvs(tsv_paths)
+                self._check_multi_assay()
+                if not self.is_multi_assay:
+                    self._check_single_assay()
+                self.is_shared_upload
+                self.shared_upload_non_global_paths
+
+            except PreflightError as e:
+                self.errors.preflight.value = str(e)
 
     ###################################
     #
@@ -132,13 +214,7 @@ class Upload:
         """
         self.info.time = datetime.now()
         self.info.dir = str(self.directory_path)
-
-        git_version = subprocess.check_output(
-            "git rev-parse --short HEAD".split(" "),
-            encoding="ascii",
-            stderr=subprocess.STDOUT,
-        ).strip()
-        self.info.git = git_version
+        self.info.git = get_version()
 
         tsvs = {
             Path(path).name: {
@@ -149,6 +225,8 @@ class Upload:
             for path, sv in self.dataset_metadata.items()
         }
         self.info.tsvs = tsvs
+        if self.tracer:
+            self.info.trace = self.tracer.summary()
 
         self.get_info_called = True
         return self.info
@@ -162,12 +240,27 @@ class Upload:
         if self.errors:
             return self.errors
 
-        # Collect errors
-        self.get_upload_errors()
-        self.validate_metadata()
-        self.get_directory_errors()
-        self.get_reference_errors()
-        self.get_file_errors()
+        with use_tracer(self.tracer), use_http_client(self.http_client):
+            # Collect errors; online checks for every TSV are queued
+            # while the metadata is read, then run together
+            self._queued_online_checks = []
+            try:
+                with span("get_upload_errors"):
+                    self.get_upload_errors()
+                with span("validate_metadata"):
+                    self.validate_metadata()
+            finally:
+                online_checks, self._queued_online_checks = self._queued_online_checks, None
+            with span("run_online_checks"):
+                self.run_online_checks(online_checks)
+            with span("get_directory_errors"):
+                self.get_directory_errors()
+            with span("get_reference_errors"):
+                self.get_reference_errors()
+            with span("get_file_errors"):
+                self.get_file_errors()
+            if self.manifest:
+                self.manifest.save()
 
         self.get_errors_called = True
         return self.errors
@@ -211,6 +304,9 @@ class Upload:
             "constraints_url": None,
             "uuid_url": "https://uuid.api.hubmapconsortium.org/uuid/",
         } | submitted_app_context
+        # Timeouts, retries and connection limits for this Upload's remote calls;
+        # see http_utils. Other Uploads' settings don't apply
+        self.http_client = get_http_client(self.app_context.get("http"))
 
     def get_schema_from_path(self, path: Path):
         return get_schema_version(
@@ -220,8 +316,42 @@ class Upload:
             self.app_context["ingest_url"],
             self.globus_token,
             self.directory_path,
+            self.get_parsed_tsv(path),
         )
 
+    def get_parsed_tsv(self, path: Path, schema: SchemaVersion | None = None) -> ParsedTSV:
+        """
+        The schema's ParsedTSV if it has one, otherwise the one shared by
+        every SchemaVersion created for this path (e.g. a contributors TSV
+        referenced by several metadata TSVs).
+        """
+        if schema is not None and schema.parsed_tsv is not None:
+            return schema.parsed_tsv
+        path = Path(path)
+        if path not in self.parsed_tsvs:
+            self.parsed_tsvs[path] = ParsedTSV(path, self.encoding)
+        return self.parsed_tsvs[path]
+
+    def _reuse_or_run(
+        self,
+        stage: str,
+        get_inputs: Callable[[], Any],
+        run: Callable[[], Any],
+        ttl: float | None = None,
+    ):
+        """
+        run(), or its result from the last validation if there is a
+        manifest, get_inputs() hasn't changed since and (if ttl is set)
+        the result is less than ttl seconds old.
+        """
+        if self.manifest is None:
+            return run()
+        return self.manifest.reuse_or_run(stage, get_inputs(), run, ttl)
+
+    def _get_tsv_sha256(self, path: Path, schema: SchemaVersion | None = None) -> str:
+        assert self.manifest
+        return self.manifest.get_sha256(Path(path), lambda: self.get_parsed_tsv(path, schema).raw)
+
     def get_upload_errors(self):
         """
         Check non-metadata/data dir elements required for uploads (contributors.tsv),
@@ -246,8 +376,10 @@ class Upload:
         and any internal checks.
         """
         tsvs_to_evaluate = tsv_paths if tsv_paths else self.dataset_metadata
+        online_checks = []
         for tsv_path, schema_version in tsvs_to_evaluate.items():
-            if empty := find_empty_tsv_columns(tsv_path):
+            parsed_tsv = self.get_parsed_tsv(tsv_path, schema_version)
+            if empty := find_empty_tsv_columns(tsv_path, parsed_tsv):
                 # TODO: not currently returned by get_tsv_errors
                 self.errors.upload_metadata[tsv_path] = (
                     f"Empty columns: {', '.join([str(i) for i in empty])}"
@@ -257,9 +389,73 @@ class Upload:
                     f"""TSV {tsv_path} does not contain a metadata_schema_id,
                     sending for local validation"""
                 )
-                self._local_validation(tsv_path, schema_version)
+                with span("local validation", tsv=tsv_path):
+                    self._local_validation(tsv_path, schema_version)
             elif not self.offline_only:
+                online_checks.append((tsv_path, schema_version))
+        if self._queued_online_checks is not None:
+            self._queued_online_checks.extend(online_checks)
+        else:
+            self.run_online_checks(online_checks)
+
+    def run_online_checks(self, online_checks: list[tuple[Path, SchemaVersion]]):
+        """
+        Synchronous wrapper around validate_online.
+        """
+        if not online_checks:
+            return
+        if self.max_workers == 1 or len(online_checks) == 1:
+            for tsv_path, schema_version in online_checks:
                 self._online_checks(tsv_path, schema_version)
+            return
+        run_async(self.validate_online(online_checks))
+
+    async def validate_online(self, online_checks: list[tuple[Path, SchemaVersion]]):
+        """
+        Run _online_checks (Spreadsheet Validator, entity-api/ORCID lookups,
+        constraint checks) for each (tsv_path, schema) concurrently, at most
+        max_workers (or ONLINE_CHECK_CONCURRENCY) TSVs at a time. Each TSV
+        collects its errors separately; they are added to self.errors in
+        the order given, so reports are the same as a serial run. If a
+        check raises, errors up to and including that TSV are kept and the
+        exception is re-raised, as in a serial run.
+        """
+        limit = asyncio.Semaphore(
+            self.max_workers if self.max_workers else ONLINE_CHECK_CONCURRENCY
+        )
+        results: list[tuple[ErrorDict, Exception | None]] = [
+            (ErrorDict(), None) for _ in online_checks
+        ]
+        # A schema checked more than once accumulates ancestor_entities,
+        # so its checks run one after another, in order
+        chains: DefaultDict[int, list[int]] = defaultdict(list)
+        for i, (_, schema_version) in enumerate(online_checks):
+            chains[id(schema_version)].append(i)
+
+        async def run_chain(indexes: list[int]):
+            for i in indexes:
+                tsv_path, schema_version = online_checks[i]
+                errors = results[i][0]
+                async with limit:
+                    try:
+                        await asyncio.to_thread(
+                            self._online_checks, tsv_path, schema_version, errors
+                        )
+                    except Exception as e:
+                        results[i] = (errors, e)
+                        return
+
+        await asyncio.gather(*[run_chain(indexes) for indexes in chains.values()])
+        for errors, exception in results:
+            for error_type in [
+                errors.metadata_validation_api,
+                errors.metadata_url_errors,
+                errors.metadata_constraint_errors,
+            ]:
+                for key, value in error_type.items():
+                    getattr(self.errors, error_type.name)[key].extend(value)
+            if exception:
+                raise exception
 
     def get_directory_errors(self):
         """
@@ -290,11 +486,20 @@ class Upload:
         are referenced multiple times (not in a shared/multi-assay upload),
         or errors with global/non_global shared file structure are reported.
         """
-        if no_ref_errors := self.__get_no_ref_errors():
+        no_ref_errors, multi_ref_errors, shared_dir_errors = self._reuse_or_run(
+            "reference",
+            self.__get_reference_inputs,
+            lambda: (
+                self.__get_no_ref_errors(),
+                self.__get_multi_ref_errors(),
+                self.__get_shared_dir_errors(),
+            ),
+        )
+        if no_ref_errors:
             self.errors.reference.update({"No References": no_ref_errors})
-        if multi_ref_errors := self.__get_multi_ref_errors():
+        if multi_ref_errors:
             self.errors.reference.update({"Multiple References": multi_ref_errors})
-        if shared_dir_errors := self.__get_shared_dir_errors():
+        if shared_dir_errors:
             self.errors.reference.update({"Shared Directory References": shared_dir_errors})
 
     def get_file_errors(self):
@@ -418,16 +623,66 @@ class Upload:
         self,
         tsv_path: Path,
         schema: SchemaVersion,
+        errors: ErrorDict | None = None,
     ):
+        """
+        Errors are added to self.errors unless another ErrorDict is passed.
+        """
+        if errors is None:
+            errors = self.errors
+        if self.manifest is None:
+            self._get_online_errors(tsv_path, schema, errors)
+            return
+        online_errors = ErrorDict()
+
+        def get_results() -> dict[str, dict]:
+            return {name: dict(getattr(online_errors, name)) for name in ONLINE_ERROR_TYPES}
+
+        def run_checks() -> dict[str, dict]:
+            self._get_online_errors(tsv_path, schema, online_errors)
+            return get_results()
+
+        results = None
         try:
-            if api_errors := self._api_validation(schema):
-                self.errors.metadata_validation_api[tsv_path].extend(api_errors)
-        except Exception as e:
-            self.errors.metadata_validation_api[tsv_path].extend([e])
-        self._get_url_errors(tsv_path, schema)
-        constraint_errors = self._constraint_checks(schema)
-        if constraint_errors:
-            self.errors.metadata_constraint_errors[tsv_path].extend(constraint_errors)
+            results = self._reuse_or_run(
+                f"online:{tsv_path}",
+                lambda: {
+                    "tsv": self._get_tsv_sha256(tsv_path, schema),
+                    "schema": [schema.schema_name, schema.version, schema.is_cedar],
+                    "app_context": self.app_context,
+                    "has_token": bool(self.globus_token),
+                    "report_type": self.report_type.name,
+                },
+                run_checks,
+                # Entities and ORCIDs may since have been created or removed
+                ttl=DEFAULT_ONLINE_TTL,
+            )
+        finally:
+            if results is None:
+                # Keep whatever was found before the exception, as without a manifest
+                results = get_results()
+            for name, errors_by_path in results.items():
+                for key, value in errors_by_path.items():
+                    getattr(errors, name)[key].extend(value)
+
+    def _get_online_errors(self, tsv_path: Path, schema: SchemaVersion, errors: ErrorDict):
+        with span("online checks", tsv=tsv_path):
+            # The Spreadsheet Validator call doesn't depend on the URL checks; overlap them
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                api_validation = executor.submit(with_tracer(self._api_validation), schema)
+                try:
+                    with span("URL checks", tsv=tsv_path):
+                        self._get_url_errors(tsv_path, schema, errors)
+                finally:
+                    try:
+                        if api_errors := api_validation.result():
+                            errors.metadata_validation_api[tsv_path].extend(api_errors)
+                    except Exception as e:
+                        errors.metadata_validation_api[tsv_path].extend([e])
+            with span("constraint checks", tsv=tsv_path):
+                constraint_errors = self._constraint_checks(schema)
+            if constraint_errors:
+                errors.metadata_constraint_errors[tsv_path].extend(constraint_errors)
 
     def _local_validation(self, tsv_path: Path, schema_version: SchemaVersion):
         try:
@@ -450,7 +705,15 @@ class Upload:
             )
             return
 
-        local_errors = get_table_errors(tsv_path, schema)
+        local_errors = self._reuse_or_run(
+            f"local:{tsv_path}",
+            lambda: {"tsv": self._get_tsv_sha256(tsv_path, schema_version), "schema": schema},
+            lambda: get_table_errors(
+                tsv_path, schema, parsed_tsv=self.get_parsed_tsv(tsv_path, schema_version)
+            ),
+            # Unless offline, values are also checked against remote URLs
+            ttl=None if self.offline_only else DEFAULT_ONLINE_TTL,
+        )
         if local_errors:
             self.errors.metadata_validation_local.update(
                 {f"{tsv_path} (as {schema_version.table_schema})": local_errors}
@@ -461,7 +724,7 @@ class Upload:
         schema: SchemaVersion,
     ) -> list[str | dict]:
         errors = []
-        response = cedar_validation_call(schema.path)
+        response = cedar_validation_call(schema.path, self.get_parsed_tsv(schema.path, schema))
         if response.status_code != 200:
             raise Exception(response.json())
         elif response.json().get("reporting") and len(response.json().get("reporting")) > 0:
@@ -478,7 +741,9 @@ class Upload:
     #
     ###################################
 
-    def _get_url_errors(self, tsv_path: Path, schema: SchemaVersion):
+    def _get_url_errors(
+        self, tsv_path: Path, schema: SchemaVersion, errors: ErrorDict | None = None
+    ):
         """
         Check provided values for parent_sample_id and orcid_id; additionally
         check sample_id, organ_id, and source_id values in single TSV validation
@@ -486,33 +751,97 @@ class Upload:
         """
         constrained_fields = self._get_constrained_fields(schema)
 
-        rows = read_rows(Path(tsv_path), self.encoding)
+        if errors is None:
+            errors = self.errors
+        rows = read_tsv(Path(tsv_path), self.encoding, self.get_parsed_tsv(tsv_path, schema)).rows
         if url_errors := self._find_and_check_url_fields(rows, constrained_fields, schema):
-            self.errors.metadata_url_errors[tsv_path].extend(url_errors)
+            errors.metadata_url_errors[tsv_path].extend(url_errors)
 
     def _find_and_check_url_fields(
         self, rows: list, constrained_fields: list, schema: SchemaVersion
     ) -> list[dict[str, str]]:
         errors = []
+        checks = []
         for i, row in enumerate(rows):
             url_fields = self._get_url_fields(row, constrained_fields)
             for field_name, field_value in url_fields.items():
                 for value in field_value:
-                    try:
-                        entity_type = self._check_url(field_name, i, value, schema)
-                        if entity_type:
-                            schema.ancestor_entities.append(entity_type)
-                    except Exception as e:
-                        error = {
-                            "errorType": type(e).__name__,
-                            "column": field_name,
-                            "row": i,
-                            "value": value,
-                            "error_text": e.__str__(),
-                        }
-                        errors.append(get_message(error, self.report_type))
+                    checks.append((field_name, i, value))
+        # Each distinct value is looked up once; rows are then checked in order
+        self._prefetch_url_lookups({(field_name, value) for field_name, _, value in checks})
+        for field_name, i, value in checks:
+            try:
+                entity_type = self._check_url(field_name, i, value, schema)
+                if entity_type:
+                    schema.ancestor_entities.append(entity_type)
+            except Exception as e:
+                error = {
+                    "errorType": type(e).__name__,
+                    "column": field_name,
+                    "row": i,
+                    "value": value,
+                    "error_text": e.__str__(),
+                }
+                errors.append(get_message(error, self.report_type))
         return errors
 
+    def _prefetch_url_lookups(self, field_values: set[tuple[str, str]]):
+        """
+        Run the remote lookups for any (field, value) pairs not already
+        cached, concurrently. Results (or the exception raised) are kept
+        in self.url_lookups, so a value referenced by many rows or TSVs
+        costs one request.
+        """
+        keys = {
+            key
+            for key in (self._get_url_lookup_key(field, value) for field, value in field_values)
+            if key and key not in self.url_lookups
+        }
+        if not keys:
+            return
+        if self.max_workers == 1 or len(keys) < 2:
+            for key in keys:
+                self._fetch_url_lookup(key)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(with_tracer(self._fetch_url_lookup), keys))
+
+    def _get_url_lookup_key(self, field: str, value: str) -> tuple[str, str] | None:
+        if not value:
+            return None
+        if field in CHECK_FIELDS:
+            return ("entity", value)
+        elif field in ["orcid_id", "orcid"]:
+            return (field, value)
+        return None
+
+    def _get_url_lookup(self, kind: str, value: str):
+        """
+        Cached entity-api response for kind "entity", else the result of
+        _check_orcid. Raises whatever the original call raised.
+        """
+        key = (kind, value)
+        if key not in self.url_lookups:
+            self._fetch_url_lookup(key)
+        result = self.url_lookups[key]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _fetch_url_lookup(self, key: tuple[str, str]):
+        kind, value = key
+        try:
+            if kind == "entity":
+                headers = self.app_context.get("request_header", {})
+                result = get_entity_api_data(
+                    self.app_context["entities_url"], value, self.globus_token, headers
+                )
+            else:
+                result = self._check_orcid(kind, value)
+        except Exception as e:
+            result = e
+        self.url_lookups[key] = result
+
     def _check_url(
         self, field: str, row: int, value: str, schema: SchemaVersion
     ) -> AncestorTypeInfo | None:
@@ -524,10 +853,7 @@ class Upload:
         assert value, f"Unable to check URL for column '{field}' on row {row + 2}: empty value."
 
         if field in CHECK_FIELDS:
-            headers = self.app_context.get("request_header", {})
-            response = get_entity_api_data(
-                self.app_context["entities_url"], value, self.globus_token, headers
-            )
+            response = self._get_url_lookup("entity", value)
             if schema.schema_name == DatasetType.DATASET and field == "parent_sample_id":
                 self._check_for_organ_other(response.json())
                 self._check_parent_sample_entity_type(response.json())
@@ -544,7 +870,7 @@ class Upload:
                     *get_entity_type_vals(response.json()),
                 )
         elif field in ["orcid_id", "orcid"]:
-            self._check_orcid(field, value)
+            self._get_url_lookup(field, value)
 
     def _check_for_organ_other(self, response: dict):
         origin_samples = response.get("origin_samples")
@@ -580,7 +906,9 @@ class Upload:
         else:
             url = "https://pub.orcid.org/v3.0/expanded-search/"
         headers = {"Accept": "application/json"}
-        response = requests.get(url, headers=headers, params={"q": f"orcid:{value}"})
+        response = http_get(
+            url, client=self.http_client, headers=headers, params={"q": f"orcid:{value}"}
+        )
         num_found = response.json().get("num-found")
         if num_found == 1:
             return
@@ -621,8 +949,12 @@ class Upload:
             "Content-Type": "application/json",
         }
         params = {"match": True, "order": CONSTRAINTS_CHECK_METHOD}
-        response = requests.post(
-            self.app_context["constraints_url"], headers=headers, data=data, params=params
+        response = http_post(
+            self.app_context["constraints_url"],
+            client=self.http_client,
+            headers=headers,
+            data=data,
+            params=params,
         )
         if self.verbose:
             print("Ancestor-Descendant pairs sent:")
@@ -725,25 +1057,22 @@ class Upload:
         if not dir_schema:
             self.errors.directory.update({schema_version.path: "No directory schema found"})
             return
-        # Check dir schema of every data_path value in TSV
-        for data_path in data_paths:
+        # Check dir schema of every data_path value in TSV; directories are
+        # walked concurrently, results are merged in TSV order
+        for data_path, result in zip(
+            data_paths, self._map_data_dir_errors(dir_schema, data_paths)
+        ):
             print_path = self.get_error_path(data_path)
-            try:
-                ref_errors = get_data_dir_errors(
-                    dir_schema,
-                    root_path=self.directory_path,
-                    data_dir_path=data_path,
-                    dataset_ignore_globs=self.dataset_ignore_globs,
-                ).popitem()
-            except FileNotFoundError:
+            if isinstance(result, FileNotFoundError):
                 self.errors.directory[str(metadata_path)].append(
                     f'On row {data_path_refs[data_path][0][1]}, column "data_path", value "{data_path}" points to non-existent directory "{print_path}".'
                 )
                 continue
             # After this point dir can be assumed to exist, use actual path (print_path) for logging
-            except Exception as e:
-                self.errors.directory[print_path] = e
+            if isinstance(result, Exception):
+                self.errors.directory[print_path] = result
                 continue
+            ref_errors = result
             if ref_errors[1]:
                 self.errors.directory[f"{print_path} (as {ref_errors[0]})"] = ref_errors[1]
             # TODO: Different dataset dirs within an upload could validate against
@@ -752,6 +1081,54 @@ class Upload:
             print(f"Dir schema {ref_errors[0]} used for {print_path}")
             schema_version.dir_schema = ref_errors[0]
 
+    def _map_data_dir_errors(
+        self, dir_schema: str, data_paths: list[str]
+    ) -> list[tuple[str, dict] | Exception]:
+        """
+        Run get_data_dir_errors for each data_path, returning either
+        (schema name, errors) or the exception raised, in data_paths order.
+        """
+
+        def get_errors(data_path: str) -> tuple[str, dict] | Exception:
+            try:
+                with span("directory schema check", data_path=data_path):
+                    return self._reuse_or_run(
+                        f"directory:{data_path}",
+                        lambda: {
+                            "dir_schema": dir_schema,
+                            "dataset_ignore_globs": self.dataset_ignore_globs,
+                            "files": self._get_data_path_files(data_path),
+                        },
+                        lambda: get_data_dir_errors(
+                            dir_schema,
+                            root_path=self.directory_path,
+                            data_dir_path=data_path,
+                            dataset_ignore_globs=self.dataset_ignore_globs,
+                            index_cache=self.directory_indexes,
+                        ).popitem(),
+                    )
+            except Exception as e:
+                return e
+
+        if self.max_workers == 1 or len(data_paths) < 2:
+            return [get_errors(data_path) for data_path in data_paths]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(with_tracer(get_errors), data_paths))
+
+    def _get_data_path_files(self, data_path: str) -> list[str] | None:
+        """
+        The listing get_data_dir_errors checks for data_path, from the shared
+        directory_indexes (an upload with global and non_global directories
+        is checked as a whole for every data_path), or None if it can't be read.
+        """
+        data_dirs = [self.directory_path / data_path]
+        if self.is_shared_upload:
+            data_dirs = [self.directory_path / "global", self.directory_path / "non_global"]
+        try:
+            return get_files(data_dirs, self.directory_indexes)
+        except OSError:
+            return None
+
     def get_error_path(self, data_path: Path) -> str:
         dir = self.directory_path
         if data_path in self.shared_upload_non_global_paths:
@@ -766,6 +1143,27 @@ class Upload:
     #
     ###################################
 
+    def __get_reference_inputs(self) -> dict:
+        """
+        Everything the reference checks read: the TSVs, the top level of
+        the upload, and the non_global directory of a shared upload.
+        """
+        inputs = {
+            "tsvs": {
+                str(path): self._get_tsv_sha256(path, schema)
+                for path, schema in self.dataset_metadata.items()
+            },
+            "top_level": sorted(
+                (path.name, path.is_dir()) for path in self.directory_path.iterdir()
+            ),
+            "upload_ignore_globs": self.upload_ignore_globs,
+        }
+        if self.is_shared_upload:
+            inputs["non_global"] = get_files(
+                [self.directory_path / "non_global"], self.directory_indexes
+            )
+        return inputs
+
     def __get_no_ref_errors(self) -> dict:
         """
         Files at the top level that are not referenced in any metadata TSV.
@@ -852,11 +1250,7 @@ class Upload:
         not_allowed = []
         shared_paths = list(self.shared_upload_non_global_paths.keys())
         # Remove dirs, directory validation should have caught any that don't belong
-        non_global_files = [
-            file
-            for file in get_files([non_global_dir])
-            if not (non_global_dir).joinpath(file).is_dir()
-        ]
+        non_global_files = get_files([non_global_dir], self.directory_indexes).files
         # Check each file found in non_global dir to see if it has a match in the referenced files
         for file in non_global_files:
             if (
@@ -911,6 +1305,9 @@ class Upload:
         if not plugin_path:
             return
         errors: DefaultDict[str, list] = defaultdict(list)
+        plugin_kwargs = dict(self.plugin_kwargs)
+        if plugin_kwargs.pop("plugin_stats", False):
+            plugin_kwargs["plugin_stats"] = self.info.plugin_stats
         for metadata_path, sv in self.dataset_metadata.items():
             try:
                 # If this is not a multi-assay upload, check all files;
@@ -926,7 +1323,8 @@ class Upload:
                         verbose=self.verbose,
                         globus_token=self.globus_token,
                         app_context=self.app_context,
-                        **self.plugin_kwargs,
+                        directory_indexes=self.directory_indexes,
+                        **plugin_kwargs,
                     ):
                         if v is None:
                             self.info.successful_plugins.append(k.__name__)
@@ -1026,7 +1424,7 @@ class Upload:
         extra_errors = []
         for path in extra_tsvs:
             try:
-                rows = read_rows(path, self.encoding)
+                rows = read_tsv(path, self.encoding, self.get_parsed_tsv(path)).rows
             except TSVError as e:
                 extra_errors.append(str(e))
                 continue
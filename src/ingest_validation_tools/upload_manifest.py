@@ -0,0 +1,186 @@
+"""
+Results of an earlier validation of an upload, so that re-running it after
+a fix repeats only the stages whose inputs changed. See Upload(manifest_path=...).
+
+The manifest is JSON: the versions of the code and schemas that wrote it,
+the size, mtime and SHA-256 of each TSV read, and for each stage (e.g.
+"local:<tsv path>") a hash of its inputs, its result and, for stages that
+depend on remote state, when it expires. A manifest written by other
+versions is ignored, since any stage's results may differ.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from ingest_validation_tools.tracing import count
+
+MANIFEST_VERSION = 3
+# A file modified this soon after it was hashed may have changed again
+# within the same mtime tick, so its size and mtime can't be trusted
+MTIME_MARGIN_NS = 2 * 10**9
+
+
+class UploadManifest:
+    """
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as tmp:
+    ...     path = Path(tmp) / "manifest.json"
+    ...     manifest = UploadManifest(path, {"code": "1.0"})
+    ...     manifest.reuse_or_run("stage", {"tsv": "abc"}, lambda: ["an error"])
+    ...     manifest.save()
+    ...     manifest = UploadManifest(path, {"code": "1.0"})
+    ...     manifest.reuse_or_run("stage", {"tsv": "abc"}, lambda: ["rerun"])
+    ...     manifest.reuse_or_run("stage", {"tsv": "def"}, lambda: ["rerun"])
+    ...     manifest = UploadManifest(path, {"code": "1.1"})
+    ...     manifest.reuse_or_run("stage", {"tsv": "abc"}, lambda: ["rerun"])
+    ['an error']
+    ['an error']
+    ['rerun']
+    ['rerun']
+    """
+
+    def __init__(self, path: Path, versions: dict[str, str | None] | None = None):
+        """
+        versions identify what produced the results, e.g. the code and
+        schema versions; the manifest is only read if they are unchanged.
+        """
+        self.path = Path(path)
+        self.versions = versions if versions else {}
+        self._lock = threading.Lock()
+        previous = self._read()
+        self._previous_files: dict[str, dict] = previous.get("files", {})
+        self._previous_stages: dict[str, dict] = previous.get("stages", {})
+        # Only what this run used is saved, so stale entries drop out
+        self.files: dict[str, dict] = {}
+        self.stages: dict[str, dict] = {}
+
+    def get_sha256(self, path: Path, read: Callable[[], bytes]) -> str:
+        """
+        SHA-256 of the file at path; read is only called if its size or
+        mtime differ from the last run, or it was modified just before it
+        was last hashed.
+        """
+        stat = path.stat()
+        fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        with self._lock:
+            previous = self._previous_files.get(str(path), {})
+        if {k: previous.get(k) for k in fingerprint} == fingerprint and previous.get(
+            "hashed_ns", 0
+        ) - stat.st_mtime_ns > MTIME_MARGIN_NS:
+            sha256, hashed_ns = previous["sha256"], previous["hashed_ns"]
+        else:
+            sha256, hashed_ns = hashlib.sha256(read()).hexdigest(), time.time_ns()
+        with self._lock:
+            self.files[str(path)] = fingerprint | {"sha256": sha256, "hashed_ns": hashed_ns}
+        return sha256
+
+    def reuse_or_run(
+        self, stage: str, inputs: Any, run: Callable[[], Any], ttl: float | None = None
+    ) -> Any:
+        """
+        The result saved for stage if inputs are unchanged, otherwise the
+        result of run(). Inputs must be JSON-serializable (anything else
+        is compared as str). Results that can't be saved, e.g. because
+        they hold exceptions, are returned but run again next time. If
+        ttl is set, the result is only reused for that many seconds.
+        """
+        inputs_hash = hashlib.sha256(
+            json.dumps(inputs, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        with self._lock:
+            previous = self._previous_stages.get(stage)
+        if (
+            previous
+            and previous["inputs"] == inputs_hash
+            and previous.get("expires", float("inf")) > time.time()
+        ):
+            logging.info(f"Reusing {stage} results from {self.path}")
+            count("cache hits: manifest")
+            with self._lock:
+                self.stages[stage] = previous
+            return _decode(previous["result"])
+        result = run()
+        try:
+            encoded = _encode(result)
+        except TypeError as e:
+            logging.info(f"Not saving {stage} results: {e}")
+            with self._lock:
+                self.stages.pop(stage, None)
+            return result
+        entry = {"inputs": inputs_hash, "result": encoded}
+        if ttl is not None:
+            entry["expires"] = time.time() + ttl
+        with self._lock:
+            self.stages[stage] = entry
+        return result
+
+    def save(self) -> None:
+        contents = {
+            "version": MANIFEST_VERSION,
+            "versions": self.versions,
+            "files": self.files,
+            "stages": self.stages,
+        }
+        temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            temp_path.write_text(json.dumps(contents, sort_keys=True, indent=2))
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Unable to write upload manifest {self.path}: {e}")
+
+    def _read(self) -> dict:
+        try:
+            contents = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logging.warning(f"Ignoring unreadable upload manifest {self.path}: {e}")
+            return {}
+        if not isinstance(contents, dict) or contents.get("version") != MANIFEST_VERSION:
+            logging.warning(f"Ignoring upload manifest {self.path} from another version")
+            return {}
+        if contents.get("versions", {}) != self.versions:
+            logging.info(f"Ignoring upload manifest {self.path} from other code or schemas")
+            return {}
+        return contents
+
+
+def _encode(value: Any) -> Any:
+    """
+    JSON-ready form of a stage result. Paths, tuples and dicts (whose
+    keys may be Paths) are tagged so that _decode can restore them.
+
+    >>> _decode(_encode({Path("a.tsv"): [("x", 1)], "b": None}))
+    {PosixPath('a.tsv'): [('x', 1)], 'b': None}
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Path):
+        return {"__path__": str(value)}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(v) for v in value]}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {"__items__": [[_encode(k), _encode(v)] for k, v in value.items()]}
+    raise TypeError(f"can't save {type(value).__name__}")
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "__path__" in value:
+        return Path(value["__path__"])
+    if "__tuple__" in value:
+        return tuple(_decode(v) for v in value["__tuple__"])
+    return {_decode(k): _decode(v) for k, v in value["__items__"]}
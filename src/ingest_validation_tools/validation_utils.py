@@ -1,14 +1,24 @@
+import asyncio
+import hashlib
 import json
 import logging
+import re
 import sys
-from csv import DictReader
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from dataclasses import fields
 from pathlib import Path, PurePath
+from typing import TYPE_CHECKING
 from urllib.parse import quote, urlencode, urljoin
 
 import requests
 
 from ingest_validation_tools.directory_validator import (
+    DirectoryIndex,
     DirectoryValidationErrors,
+    get_files,
     validate_directory,
 )
 from ingest_validation_tools.enums import (
@@ -20,13 +30,22 @@ from ingest_validation_tools.enums import (
     OtherTypes,
     Sample,
 )
+from ingest_validation_tools.error_report import ErrorDict
+from ingest_validation_tools.http_utils import http_get, http_post, use_http_client
 from ingest_validation_tools.local_validation.table_validator import ReportType
+from ingest_validation_tools.parsed_tsv import ParsedTSV
+from ingest_validation_tools.result_cache import ResultCache, get_result_key
 from ingest_validation_tools.schema_loader import (
     EntityTypeInfo,
     PreflightError,
     SchemaVersion,
     get_possible_directory_schemas,
+    get_schema_bundle_version,
 )
+from ingest_validation_tools.tracing import count, with_tracer
+
+if TYPE_CHECKING:
+    from ingest_validation_tools.upload import Upload
 
 # TSV Metadata Validator
 CEDAR_VALIDATION_URL = "https://api.metadatavalidator.metadatacenter.org/service/validate-tsv"
@@ -34,6 +53,14 @@ CEDAR_VALIDATION_URL = "https://api.metadatavalidator.metadatacenter.org/service
 CEDAR_VERSIONS_URL_BASE = "https://resource.metadatacenter.org/templates/"
 # Single template base URL
 CEDAR_SINGLE_TEMPLATE_URL_BASE = "https://repo.metadatacenter.org/templates/"
+# How long an assayclassifier answer is reused for
+ASSAYTYPE_CACHE_TTL = 60 * 60
+# Per-dataset values (paths, identifiers, DOIs, dates) that assayclassifier
+# rules don't match on; rows differing only in these share a cached answer
+ASSAYTYPE_IGNORED_FIELDS_RE = re.compile(r".*_(path|id|doi|date|datetime)$")
+
+_assaytype_cache: dict[tuple, tuple[float, dict]] = {}
+_assaytype_cache_lock = threading.Lock()
 
 
 def match_field_in_unique_fields(
@@ -63,13 +90,6 @@ class TSVError(Exception):
         self.errors = error
 
 
-def dict_reader_wrapper(path, encoding: str) -> list:
-    with open(path, encoding=encoding) as f:
-        rows = list(DictReader(f, dialect="excel-tab"))
-        f.close()
-    return rows
-
-
 def get_schema_version(
     path: Path,
     encoding: str,
@@ -77,13 +97,17 @@ def get_schema_version(
     ingest_url: str = "",
     globus_token: str = "",
     directory_path: Path | None = None,
+    parsed_tsv: ParsedTSV | None = None,
 ) -> SchemaVersion:
     try:
-        rows = read_rows(path, encoding)
+        parsed_tsv = read_tsv(path, encoding, parsed_tsv)
     except TSVError as e:
         raise PreflightError(e.errors)
+    rows = parsed_tsv.rows
     # Don't want to send contrib/organ/sample/antibody to soft assay endpoint
-    other_type = get_other_type_schema(rows, str(path), entity_url, globus_token, directory_path)
+    other_type = get_other_type_schema(
+        rows, str(path), entity_url, globus_token, directory_path, parsed_tsv
+    )
     if other_type:
         return other_type
     message = []
@@ -115,6 +139,7 @@ def get_schema_version(
         rows=rows,
         soft_assay_data=assay_type_data,
         entity_type_info=EntityTypeInfo(DatasetType.DATASET, dataset_type),
+        parsed_tsv=parsed_tsv,
     )
 
 
@@ -124,6 +149,7 @@ def get_other_type_schema(
     entity_url: str,
     globus_token: str,
     directory_path: Path | None = None,
+    parsed_tsv: ParsedTSV | None = None,
 ) -> SchemaVersion | None:
     # Assumes that an entire TSV only represents a single entity_type.
     match_pair = match_field_in_unique_fields(rows[0].keys(), path, dataset=False)
@@ -139,6 +165,7 @@ def get_other_type_schema(
                 path=Path(path),
                 rows=rows,
                 entity_type_info=other_type_info,
+                parsed_tsv=parsed_tsv,
             )
             return sv
 
@@ -165,10 +192,19 @@ def get_other_schema_data(
 def get_assaytype_data(row: dict, ingest_url: str, globus_token: str) -> dict:
     if not ingest_url:
         ingest_url = "https://ingest.api.hubmapconsortium.org/"
-    # The assaytype endpoint checks sample IDs but will not return a verbose error if one is invalid
+    # The assaytype endpoint checks sample IDs but will not return a verbose error if one is invalid;
+    # drop it from a copy, since the row is shared with later checks
     if row.get("parent_sample_id"):
-        row.pop("parent_sample_id")
-    response = requests.post(
+        row = {key: value for key, value in row.items() if key != "parent_sample_id"}
+    key = get_assaytype_key(row, ingest_url)
+    with _assaytype_cache_lock:
+        expires, assay_type_data = _assaytype_cache.get(key, (0, {}))
+    if expires > time.monotonic():
+        count("cache hits: assaytype")
+        logging.info(f"Reusing soft assay endpoint response: {assay_type_data}")
+        # Callers keep and may modify the result
+        return deepcopy(assay_type_data)
+    response = http_post(
         urljoin(ingest_url, "assaytype"),
         headers={
             "Content-Type": "application/json",
@@ -177,20 +213,60 @@ def get_assaytype_data(row: dict, ingest_url: str, globus_token: str) -> dict:
         data=json.dumps(row),
     )
     response.raise_for_status()
-    logging.info(f"Soft assay endpoint response: {response.json()}")
-    return response.json()
+    assay_type_data = response.json()
+    logging.info(f"Soft assay endpoint response: {assay_type_data}")
+    with _assaytype_cache_lock:
+        _assaytype_cache[key] = (
+            time.monotonic() + ASSAYTYPE_CACHE_TTL,
+            deepcopy(assay_type_data),
+        )
+    return assay_type_data
+
+
+def get_assaytype_key(row: dict, ingest_url: str) -> tuple:
+    """
+    The fields of row that can affect its assay type, in a fixed order.
+
+    >>> a = get_assaytype_key({"dataset_type": "RNAseq", "lab_id": "a"}, "url")
+    >>> a == get_assaytype_key({"lab_id": "b", "dataset_type": "RNAseq"}, "url")
+    True
+    >>> a == get_assaytype_key({"dataset_type": "ATACseq"}, "url")
+    False
+    """
+    # Values beyond the header are listed under None
+    relevant = {
+        str(name): value
+        for name, value in row.items()
+        if not ASSAYTYPE_IGNORED_FIELDS_RE.match(str(name))
+    }
+    return (ingest_url, json.dumps(relevant, sort_keys=True))
+
+
+def clear_assaytype_cache():
+    with _assaytype_cache_lock:
+        _assaytype_cache.clear()
 
 
 def read_rows(path: Path, encoding: str) -> list:
+    return read_tsv(path, encoding).rows
+
+
+def read_tsv(path: Path, encoding: str, parsed_tsv: ParsedTSV | None = None) -> ParsedTSV:
+    """
+    Read and check a TSV as read_rows does, but return the ParsedTSV
+    (parsed_tsv, if one was already made for this path) so later
+    stages can reuse it.
+    """
     message = None
     if not Path(path).exists():
         raise TSVError(f"File does not exist: {str(path)}")
+    if parsed_tsv is None:
+        parsed_tsv = ParsedTSV(path, encoding)
     try:
-        rows = dict_reader_wrapper(path, encoding)
-        if not rows:
+        if not parsed_tsv.rows:
             message = f"File has no data rows: {path}"
         else:
-            return rows
+            return parsed_tsv
     except IsADirectoryError:
         message = f"Expected a TSV, but found a directory: {path}"
     except UnicodeDecodeError as e:
@@ -203,9 +279,12 @@ def get_data_dir_errors(
     root_path: Path,
     data_dir_path: Path,
     dataset_ignore_globs: list[str] = [],
+    index_cache: dict[Path, DirectoryIndex] | None = None,
 ) -> dict[str, dict | str]:
     """
-    Validate a single data_path.
+    Validate a single data_path. The dataset is listed from disk once
+    (or not at all, if index_cache already has it) and that listing
+    is checked against every minor version of the directory schema.
     """
     expected_shared_directories = {"global", "non_global"}
     # Create the most common data_path
@@ -232,7 +311,17 @@ def get_data_dir_errors(
     errors = []
 
     # Make sure possible_schemas is sorted by key (descending) to evaluate highest minor version first
-    for schema_name, schema in sorted(possible_schemas.items(), reverse=True):
+    sorted_schemas = sorted(possible_schemas.items(), reverse=True)
+    if sorted_schemas:
+        try:
+            directory_index = get_files(data_paths, index_cache)
+        except FileNotFoundError:
+            raise FileNotFoundError()
+        except OSError as e:
+            # Report against the highest minor version, as if validation had failed.
+            return {sorted_schemas[0][0]: f"{e.strerror}: {e.filename}"}
+
+    for schema_name, schema in sorted_schemas:
         schema_warning_fields = [field for field in schema if field in ["deprecated", "draft"]]
         schema_warning = (
             f"{schema_warning_fields[0].title()} directory schema: {schema_name}"
@@ -242,7 +331,10 @@ def get_data_dir_errors(
 
         try:
             validate_directory(
-                data_paths, schema["files"], dataset_ignore_globs=dataset_ignore_globs
+                data_paths,
+                schema["files"],
+                dataset_ignore_globs=dataset_ignore_globs,
+                directory_index=directory_index,
             )
         except DirectoryValidationErrors as e:
             # If there are DirectoryValidationErrors and the schema is deprecated/draft...
@@ -252,13 +344,6 @@ def get_data_dir_errors(
             else:
                 errors.append({schema_name: e.errors})
             continue
-        except OSError as e:
-            # If there are OSErrors and the schema is deprecated/draft...
-            #    the OSErrors are more important.
-            if isinstance(e, FileNotFoundError):
-                raise FileNotFoundError()
-            errors.append({schema_name: f"{e.strerror}: {e.filename}"})
-            continue
         # Found a schema with no problems!
         # Throw away any found errors.
         return {schema_name: {}}
@@ -354,7 +439,7 @@ def get_latest_schema_version(
 def get_schema_details(schema_version: str, cedar_api_key: str) -> dict:
     logging.debug(f"======get_schema_details: {schema_version}======")
     encoded_template_url = quote(f"{CEDAR_SINGLE_TEMPLATE_URL_BASE}{schema_version}", safe="")
-    response = requests.get(
+    response = http_get(
         url=urljoin(CEDAR_VERSIONS_URL_BASE, f"{encoded_template_url}/versions"),
         headers={
             "Accept": "application/json",
@@ -372,7 +457,71 @@ def get_tsv_errors(
     report_type: ReportType = ReportType.STR,
     globus_token: str = "",
     app_context: dict = {},
+    result_cache: ResultCache | None = None,
 ) -> list:
+    """
+    If result_cache is given, errors for TSV content already validated with
+    the same options, schemas and version of this package are returned from
+    it; see result_cache.py.
+    """
+    from ingest_validation_tools.upload import get_version
+
+    # Missing paths and directories get their usual errors, uncached
+    if result_cache is None or not Path(tsv_path).is_file():
+        return _get_tsv_errors(
+            tsv_path,
+            schema_name,
+            no_url_checks,
+            ignore_deprecation,
+            report_type,
+            globus_token,
+            app_context,
+        )[0]
+    key = get_result_key(
+        Path(tsv_path).read_bytes(),
+        schema_name,
+        report_type.name,
+        no_url_checks,
+        get_schema_bundle_version(),
+        # The schema version doesn't cover validator code or message wording
+        code_version=get_version(),
+        ignore_deprecation=ignore_deprecation,
+        app_context=app_context,
+        # Entity lookups depend on what the token can see; never store the token itself
+        globus_token=hashlib.sha256(globus_token.encode()).hexdigest(),
+    )
+    cached = result_cache.get(key)
+    if cached is not None:
+        logging.info(f"Using cached results for {tsv_path}")
+        return cached
+    errors, upload = _get_tsv_errors(
+        tsv_path,
+        schema_name,
+        no_url_checks,
+        ignore_deprecation,
+        report_type,
+        globus_token,
+        app_context,
+    )
+    if _holds_exception(upload.errors):
+        # Probably a transient failure of a remote API; check again next time
+        return errors
+    # Assay type lookups are online even with no_url_checks, and their
+    # failures are preflight errors
+    offline = no_url_checks and not upload.errors.preflight
+    result_cache.set(key, errors, ttl=None if offline else result_cache.online_ttl)
+    return errors
+
+
+def _get_tsv_errors(
+    tsv_path: str | Path,
+    schema_name: str,
+    no_url_checks: bool,
+    ignore_deprecation: bool,
+    report_type: ReportType,
+    globus_token: str,
+    app_context: dict,
+) -> tuple[list, "Upload"]:
     from ingest_validation_tools.upload import Upload
 
     logging.info(f"Validating {schema_name} TSV...")
@@ -389,41 +538,64 @@ def get_tsv_errors(
     )
     # Return preflight errors to prevent uncaught exceptions downstream
     if upload.errors.preflight:
-        return upload.errors.tsv_only_errors_by_path(str(tsv_path), report_type=report_type)
-    if schema_name in OtherTypes.with_sample_subtypes():
-        try:
-            schema = upload.get_schema_from_path(Path(tsv_path))
-        except Exception as e:
-            if upload.errors:
-                upload.errors.upload_metadata[tsv_path].append(str(e))
+        return (
+            upload.errors.tsv_only_errors_by_path(str(tsv_path), report_type=report_type),
+            upload,
+        )
+    # Remote calls use this upload's HTTP settings, whatever other
+    # validations running at the same time use
+    with use_http_client(upload.http_client):
+        if schema_name in OtherTypes.with_sample_subtypes():
+            try:
+                schema = upload.get_schema_from_path(Path(tsv_path))
+            except Exception as e:
+                if upload.errors:
+                    upload.errors.upload_metadata[tsv_path].append(str(e))
+            else:
+                upload.validate_metadata(tsv_paths={schema.path: schema})
         else:
-            upload.validate_metadata(tsv_paths={schema.path: schema})
-    else:
-        upload.validate_metadata()
-    return upload.errors.tsv_only_errors_by_path(str(tsv_path), report_type=report_type)
+            upload.validate_metadata()
+    return upload.errors.tsv_only_errors_by_path(str(tsv_path), report_type=report_type), upload
 
 
-def cedar_validation_call(tsv_path: str | Path) -> requests.models.Response:
-    with open(tsv_path, "rb") as f:
-        try:
-            response = requests.post(
-                CEDAR_VALIDATION_URL,
-                files={"input_file": f},
-            )
-            response.raise_for_status()
-            response_json = response.json()
-            logging.info(f"Response: {response_json}")
-        except Exception as e:
-            raise RuntimeError(
-                f"Spreadsheet Validator API request for {tsv_path} failed! Exception: {e}"
-            ) from e
-        logging.info(
-            f"""
-            CEDAR response for {tsv_path}:
-            Schema: {response_json.get('schema', {}).get('name')}
-            Reporting: {response_json.get('reporting')}
-            """
+def _holds_exception(errors: ErrorDict) -> bool:
+    def search(value) -> bool:
+        if isinstance(value, Exception):
+            return True
+        if isinstance(value, dict):
+            return any(search(v) for v in value.values())
+        if isinstance(value, (list, tuple)):
+            return any(search(v) for v in value)
+        return False
+
+    return any(search(getattr(errors, f.name).value) for f in fields(errors))
+
+
+def cedar_validation_call(
+    tsv_path: str | Path, parsed_tsv: ParsedTSV | None = None
+) -> requests.models.Response:
+    if parsed_tsv is None:
+        parsed_tsv = ParsedTSV(tsv_path)
+    data = parsed_tsv.raw
+    try:
+        response = http_post(
+            CEDAR_VALIDATION_URL,
+            files={"input_file": (Path(tsv_path).name, data)},
         )
+        response.raise_for_status()
+        response_json = response.json()
+        logging.info(f"Response: {response_json}")
+    except Exception as e:
+        raise RuntimeError(
+            f"Spreadsheet Validator API request for {tsv_path} failed! Exception: {e}"
+        ) from e
+    logging.info(
+        f"""
+        CEDAR response for {tsv_path}:
+        Schema: {response_json.get('schema', {}).get('name')}
+        Reporting: {response_json.get('reporting')}
+        """
+    )
     return response
 
 
@@ -443,7 +615,7 @@ def get_entity_api_data(
     url = urljoin(entity_api_url, entity_id)
     encoded_params = urlencode({"exclude": "direct_ancestors.files"})
     url += f"?{encoded_params}"
-    response = requests.get(url, headers=headers)
+    response = http_get(url, headers=headers)
     response.raise_for_status()
     return response
 
@@ -538,19 +710,19 @@ def get_message(error: dict[str, str], report_type: ReportType = ReportType.STR)
     return error
 
 
-def find_empty_tsv_columns(tsv_path: Path) -> list[str]:
+def find_empty_tsv_columns(tsv_path: Path, parsed_tsv: ParsedTSV | None = None) -> list[str]:
     empty = []
-    with open(tsv_path) as f:
-        try:
-            dr = DictReader(f, dialect="excel-tab")
-            assert dr.fieldnames
-        except Exception:
-            # Errors in TSV should have been caught already, but just to be safe.
-            return [f"Error opening {tsv_path}."]
-        for index, column in enumerate(dr.fieldnames):
-            if column in ["", " "]:
-                empty.append(str(index))
-        f.close()
+    if parsed_tsv is None:
+        parsed_tsv = ParsedTSV(tsv_path)
+    try:
+        fieldnames = parsed_tsv.header
+        assert fieldnames
+    except Exception:
+        # Errors in TSV should have been caught already, but just to be safe.
+        return [f"Error opening {tsv_path}."]
+    for index, column in enumerate(fieldnames):
+        if column in ["", " "]:
+            empty.append(str(index))
     return empty
 
 
@@ -572,3 +744,17 @@ class add_path:
             sys.path.remove(self.path)
         except ValueError:
             pass
+
+
+def run_async(coroutine):
+    """
+    asyncio.run, also from code that is already running an event loop
+    (e.g. an async web service or a notebook): there the coroutine runs
+    in its own loop on a separate thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(with_tracer(asyncio.run), coroutine).result()
@@ -9,20 +9,140 @@
 #
 # So, instead, we handle includes as a pre-processing step,
 # rather than after the YAML parse.
+#
+# Expanding and parsing is slow, and long-lived processes load the same
+# schemas over and over, so parsed results are cached in memory. An entry
+# is reused only while the file and everything it includes are unchanged
+# on disk; callers always get their own copy.
 
+import os
+import pickle
 import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Callable
+from typing import Callable, NamedTuple
 
 import yaml
 
 
+class YamlCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+    bytes: int
+
+
+class ParsedYamlCache:
+    """
+    LRU cache of parsed YAML, keyed by path. Each entry records the mtime and
+    size of the file and of every file it includes, and is discarded if any
+    of them change. Values are stored pickled, so every hit returns a fresh
+    copy that the caller is free to mutate.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Path, tuple[tuple[Path, ...], tuple, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path):
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and _stat_all(entry[0]) == entry[1]:
+            with self._lock:
+                self.hits += 1
+                if path in self._entries:
+                    self._entries.move_to_end(path)
+            return pickle.loads(entry[2])
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, path: Path, dependencies: list[tuple[Path, tuple | None]], value) -> None:
+        """
+        dependencies: (path, stat) of the file and each file it includes,
+        taken before they were read.
+        """
+        paths = tuple(dependency for dependency, _ in dependencies)
+        stats = tuple(stat for _, stat in dependencies)
+        pickled = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[path] = (paths, stats, pickled)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def info(self) -> YamlCacheInfo:
+        with self._lock:
+            return YamlCacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                entries=len(self._entries),
+                bytes=sum(len(pickled) for _, _, pickled in self._entries.values()),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def _stat(path: Path) -> tuple | None:
+    """
+    (mtime, size) of path; None if it can't be read,
+    which never matches a cached entry.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _stat_all(paths: tuple[Path, ...]) -> tuple:
+    return tuple(_stat(path) for path in paths)
+
+
+_cache = ParsedYamlCache()
+
+
 def load_yaml(path: Path) -> dict:
-    expanded_text = _load_includes(path)
-    return yaml.safe_load(expanded_text)
+    key = Path(path).absolute()
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    dependencies: list[tuple[Path, tuple | None]] = []
+    expanded_text = _load_includes(path, dependencies=dependencies)
+    loaded = yaml.safe_load(expanded_text)
+    _cache.put(key, dependencies, loaded)
+    return loaded
+
+
+def cache_info() -> YamlCacheInfo:
+    """
+    Hits, misses, number of entries, and total size in bytes
+    of the pickled entries in the parsed YAML cache.
+    """
+    return _cache.info()
+
+
+def cache_clear() -> None:
+    """
+    Drop every cached schema, e.g. after editing schema files in place
+    in a way that leaves their mtime and size unchanged.
+    """
+    _cache.clear()
 
 
-def _load_includes(path: Path, indent: int = 0) -> str:
+def _load_includes(
+    path: Path, indent: int = 0, dependencies: list[tuple[Path, tuple | None]] | None = None
+) -> str:
+    if dependencies is not None:
+        dependencies.append((Path(path).absolute(), _stat(path)))
     text = path.read_text()
     if re.match(r"\s", text[0]):
         raise Exception(f"Unexpected padding in the first column: {path}")
@@ -30,7 +150,7 @@ def _load_includes(path: Path, indent: int = 0) -> str:
         raise Exception(f'"# include:" is not alone on a line in: {path}')
     expanded_text = re.sub(
         r"^([ \t]*)#\s*include:\s*(\S+)",
-        _expand_match_generator(path.parent),
+        _expand_match_generator(path.parent, dependencies),
         text,
         flags=re.MULTILINE,
     )
@@ -42,9 +162,13 @@ def _load_includes(path: Path, indent: int = 0) -> str:
     return indented_expanded_text
 
 
-def _expand_match_generator(parent_dir: Path) -> Callable:
+def _expand_match_generator(
+    parent_dir: Path, dependencies: list[tuple[Path, tuple | None]] | None = None
+) -> Callable:
     def _expand_match(match):
-        expanded = _load_includes(parent_dir / match.group(2), indent=len(match.group(1)))
+        expanded = _load_includes(
+            parent_dir / match.group(2), indent=len(match.group(1)), dependencies=dependencies
+        )
         return expanded
 
     return _expand_match
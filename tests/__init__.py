@@ -1,7 +1,25 @@
 __all__ = ["ingest_validation_tools"]
 
+import atexit
+import shutil
 import sys
+import tempfile
+from pathlib import Path
 
 import src.ingest_validation_tools as ingest_validation_tools
 
 sys.modules["ingest_validation_tools"] = ingest_validation_tools
+
+from ingest_validation_tools.local_validation import check_factory  # noqa: E402
+
+# Tests read and write a copy of the fixture URL status cache, never the
+# one in the package directory or the checked-in fixture itself.
+_url_status_cache_dir = Path(tempfile.mkdtemp(prefix="url-status-cache-"))
+check_factory.cache_path = _url_status_cache_dir / "url-status-cache.json"
+shutil.copy(Path(__file__).parent / "fixtures/url-status-cache.json", check_factory.cache_path)
+
+
+@atexit.register
+def _remove_url_status_cache():
+    check_factory._flush_url_status_caches()
+    shutil.rmtree(_url_status_cache_dir, ignore_errors=True)
@@ -0,0 +1,97 @@
+"""
+Memory held by an upload's ErrorDict, with and without interning, for a
+large copy of examples/dataset-examples/bad-scatacseq-data: every row has
+the example's metadata errors, and every dataset its directory errors plus
+extra files that aren't allowed. Validation is offline, as in the tests:
+
+    env PYTHONPATH=/ingest-validation-tools python -m tests.manual.benchmark_error_storage
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from ingest_validation_tools.error_report import ErrorDict
+from ingest_validation_tools.upload import Upload
+from tests.test_dataset_examples import DATASET_EXAMPLES_OPTS, assaytype_side_effect
+
+EXAMPLE = Path("examples/dataset-examples/bad-scatacseq-data")
+
+
+def make_upload(upload_path: Path, rows: int, files: int) -> None:
+    shutil.copytree(EXAMPLE / "upload", upload_path)
+    tsv_path = upload_path / "scatacseq-metadata.tsv"
+    header, row = tsv_path.read_text().splitlines()[:2]
+    tsv_path.write_text(
+        "\n".join([header] + [row.replace("dataset-1", f"dataset-{i}") for i in range(rows)])
+        + "\n"
+    )
+    for i in range(rows):
+        dataset_path = upload_path / f"dataset-{i}"
+        if not dataset_path.exists():
+            shutil.copytree(upload_path / "dataset-1", dataset_path)
+        for j in range(files):
+            (dataset_path / "unexpected-directory" / f"extra-{j:03}.txt").touch()
+
+
+def validate(upload_path: Path) -> ErrorDict:
+    with (
+        patch(
+            "ingest_validation_tools.validation_utils.get_assaytype_data",
+            side_effect=lambda row, ingest_url, globus_token: assaytype_side_effect(
+                str(EXAMPLE), row, ingest_url, globus_token
+            ),
+        ),
+        patch("ingest_validation_tools.upload.Upload._online_checks"),
+    ):
+        upload = Upload(upload_path, **DATASET_EXAMPLES_OPTS, verbose=False)
+        return upload.get_errors()
+
+
+def get_deep_size(value, seen: set[int]) -> int:
+    """
+    Bytes of value and everything in it, counting shared objects once.
+    """
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(get_deep_size(k, seen) + get_deep_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(get_deep_size(item, seen) for item in value)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--files", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        upload_path = Path(tmp) / "upload"
+        make_upload(upload_path, args.rows, args.files)
+        results = {}
+        for name, intern in [("plain", lambda message, strings: message), ("interned", None)]:
+            if intern is None:
+                errors = validate(upload_path)
+            else:
+                with patch("ingest_validation_tools.error_report._intern", intern):
+                    errors = validate(upload_path)
+            results[name] = {
+                error_field.display_name: get_deep_size(error_field.value, set())
+                for error_field in errors
+                if error_field and error_field.value and not isinstance(error_field.value, str)
+            }
+    print(f"{args.rows} rows, {args.files} extra files per dataset")
+    for display_name, plain in results["plain"].items():
+        interned = results["interned"][display_name]
+        print(f"{display_name:>32}: {plain / 1e6:7.2f} MB -> {interned / 1e6:7.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
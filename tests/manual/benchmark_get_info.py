@@ -0,0 +1,44 @@
+"""
+Compare Upload.get_info with running "git rev-parse" on every call, the
+way get_info used to, for an upload without TSVs:
+
+    env PYTHONPATH=/ingest-validation-tools python -m tests.manual.benchmark_get_info
+"""
+
+import argparse
+import subprocess
+import tempfile
+import timeit
+from pathlib import Path
+
+from ingest_validation_tools.upload import Upload, get_version
+
+
+def get_info_with_git(upload: Upload):
+    upload.info.git = subprocess.check_output(
+        "git rev-parse --short HEAD".split(" "),
+        encoding="ascii",
+        stderr=subprocess.STDOUT,
+    ).strip()
+    return upload.get_info()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as upload_dir:
+        upload = Upload(Path(upload_dir), verbose=False)
+        print(f"Version: {get_version()}")
+        for name, function in [
+            ("git", lambda: get_info_with_git(upload)),
+            ("get_info", upload.get_info),
+        ]:
+            best = min(timeit.repeat(function, number=args.number, repeat=args.repeat))
+            print(f"{name:>10}: {best / args.number * 1e6:.1f}µs per call")
+
+
+if __name__ == "__main__":
+    main()
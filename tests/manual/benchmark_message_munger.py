@@ -0,0 +1,81 @@
+"""
+Compare munge with applying every pattern in pat_reps in turn, the way
+munge used to, over a report's worth of messages:
+
+    env PYTHONPATH=/ingest-validation-tools python -m tests.manual.benchmark_message_munger
+"""
+
+import argparse
+import re
+import timeit
+from pathlib import Path
+
+from ingest_validation_tools.local_validation.message_munger import (
+    _munge,
+    munge,
+    pat_reps,
+)
+
+NOTES = [
+    'constraint "pattern" is "^[A-Z]+[0-9]+$"',
+    'constraint "required" is "True"',
+    "constraint \"enum\" is \"['Yes', 'No']\"",
+    'type is "datetime/%Y-%m-%d %H:%M"',
+    'type is "number/default"',
+    'type is "integer/default"',
+    'type is "boolean/default"',
+    '"N/A" fields should just be left empty',
+    'URL returned 404: "https://dx.doi.org/10.1/fake"',
+    "there is a run of 3 sequential items: Limit is 3. If correct, reorder rows.",
+]
+
+
+def sequential_munge(message):
+    for pattern, replacement in pat_reps:
+        message = re.sub(pattern, replacement, message)
+    return message
+
+
+def get_messages(rows: int) -> list[str]:
+    """
+    Cell error messages as table_validator builds them: a handful of
+    notes, repeated down a table, plus the lines of the example reports.
+    """
+    messages = [
+        f'On row {row}, column "field_{i}", value "x{row}" fails because {note}'
+        for row in range(2, rows + 2)
+        for i, note in enumerate(NOTES)
+    ]
+    # Errors without a row, as ErrorReport passes them through recursive_munge
+    messages += NOTES * rows
+    for readme in sorted(Path("examples").glob("**/README.md")):
+        messages += readme.read_text().splitlines()
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    messages = get_messages(args.rows)
+    assert [munge(m) for m in messages] == [sequential_munge(m) for m in messages]
+
+    def run_munge():
+        _munge.cache_clear()
+        for message in messages:
+            munge(message)
+
+    def run_sequential():
+        for message in messages:
+            sequential_munge(message)
+
+    print(f"{len(messages)} messages, {len(set(messages))} distinct")
+    for name, function in [("sequential", run_sequential), ("munge", run_munge)]:
+        best = min(timeit.repeat(function, number=1, repeat=args.repeat))
+        print(f"{name:>10}: {best:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
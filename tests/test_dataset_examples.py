@@ -2,14 +2,27 @@ import difflib
 import glob
 import json
 import re
+import shutil
+import tempfile
 import unittest
-from io import TextIOWrapper
+from io import StringIO, TextIOWrapper
 from pathlib import Path
 from unittest.mock import patch
 
-from ingest_validation_tools.error_report import DictErrorType, ErrorDict, ErrorReport
-from ingest_validation_tools.schema_loader import PreflightError, SchemaVersion
+from ingest_validation_tools.error_report import (
+    DictErrorType,
+    ErrorDict,
+    ErrorReport,
+    InfoDict,
+)
+from ingest_validation_tools.schema_loader import (
+    PreflightError,
+    SchemaVersion,
+    get_schema_bundle_version,
+)
+from ingest_validation_tools.tracing import Tracer
 from ingest_validation_tools.upload import Upload
+from ingest_validation_tools.validation_utils import get_data_dir_errors
 from tests.fixtures import (
     SCATACSEQ_BOTH_VERSIONS_VALID,
     SCATACSEQ_HIGHER_VERSION_VALID,
@@ -278,26 +291,22 @@ class TestExamples(unittest.TestCase):
                     opts = {}
                 with patch("ingest_validation_tools.validation_utils.get_assaytype_data"):
                     with patch("ingest_validation_tools.upload.Upload._get_url_errors"):
-                        with patch(
-                            "ingest_validation_tools.local_validation.check_factory.cache_path",
-                            Path(__file__).parent / "fixtures/url-status-cache.json",
-                        ):
-                            try:
-                                dataset_test(
-                                    test_dir,
-                                    opts,
-                                    verbose=verbose,
-                                    offline=True,
-                                    use_online_check_fixtures=True,
-                                    full_diff=full_diff,
-                                )
-                            except MockException as e:
-                                print(e)
-                                continue
-                            except AssertionError as e:
-                                print(e)
-                                self.errors.append(test_dir)
-                                continue
+                        try:
+                            dataset_test(
+                                test_dir,
+                                opts,
+                                verbose=verbose,
+                                offline=True,
+                                use_online_check_fixtures=True,
+                                full_diff=full_diff,
+                            )
+                        except MockException as e:
+                            print(e)
+                            continue
+                        except AssertionError as e:
+                            print(e)
+                            self.errors.append(test_dir)
+                            continue
 
     @staticmethod
     def prep_offline_upload(test_dir: str, opts: dict) -> Upload:
@@ -456,7 +465,7 @@ class TestDatasetExamples(TestExamples):
             with patch("ingest_validation_tools.upload.Upload._online_checks"):
                 with patch(
                     "ingest_validation_tools.upload.get_schema_version",
-                    side_effect=lambda tsv_path, encoding, entities_url, ingest_url, globus_token, directory_path: self.get_schema_side_effect(
+                    side_effect=lambda tsv_path, encoding, entities_url, ingest_url, globus_token, directory_path, parsed_tsv=None: self.get_schema_side_effect(
                         tsv_path, encoding, entities_url, ingest_url, globus_token, directory_path
                     ),
                 ):
@@ -501,6 +510,205 @@ class TestDatasetExamples(TestExamples):
             report = ErrorReport(upload)
             self.assertEqual(report.counts, expected_counts)
 
+    def test_max_workers_matches_serial(self):
+        test_dirs = [
+            "examples/dataset-examples/bad-cedar-multi-assay-visium-bad-dir-structure",
+            "examples/dataset-examples/bad-scatacseq-data",
+            "examples/dataset-examples/bad-missing-data",
+            "examples/dataset-examples/good-cedar-multi-assay-visium",
+        ]
+        for test_dir in test_dirs:
+            serial = self.prep_offline_upload(test_dir, DATASET_EXAMPLES_OPTS | {"max_workers": 1})
+            parallel = self.prep_offline_upload(
+                test_dir, DATASET_EXAMPLES_OPTS | {"max_workers": 4}
+            )
+            self.assertEqual(
+                clean_report(ErrorReport(serial)), clean_report(ErrorReport(parallel))
+            )
+
+    def test_tsvs_read_once(self):
+        read_bytes = Path.read_bytes
+        with patch.object(
+            Path, "read_bytes", autospec=True, side_effect=lambda path: read_bytes(path)
+        ) as read_bytes_mock:
+            self.prep_offline_upload(
+                "examples/dataset-examples/good-cedar-multi-assay-visium", DATASET_EXAMPLES_OPTS
+            )
+        tsv_reads = [
+            str(call.args[0])
+            for call in read_bytes_mock.call_args_list
+            if call.args[0].suffix == ".tsv"
+        ]
+        self.assertTrue(tsv_reads)
+        self.assertEqual(len(tsv_reads), len(set(tsv_reads)))
+
+    def test_incremental_revalidation(self):
+        test_dir = "examples/dataset-examples/bad-scatacseq-data"
+
+        def validate(upload_path: Path, manifest_path: Path) -> Upload:
+            with (
+                patch(
+                    "ingest_validation_tools.validation_utils.get_assaytype_data",
+                    side_effect=lambda row, ingest_url, globus_token: assaytype_side_effect(
+                        test_dir, row, ingest_url, globus_token
+                    ),
+                ),
+            ):
+                upload = Upload(upload_path, manifest_path=manifest_path, **DATASET_EXAMPLES_OPTS)
+                upload.get_errors()
+                return upload
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            upload_path = Path(tempdir) / "upload"
+            shutil.copytree(f"{test_dir}/upload", upload_path)
+            manifest_path = Path(tempdir) / "manifest.json"
+            first = validate(upload_path, manifest_path)
+            self.assertTrue(manifest_path.exists())
+
+            with (
+                patch("ingest_validation_tools.upload.get_table_errors") as table_errors_mock,
+                patch("ingest_validation_tools.upload.get_data_dir_errors") as dir_errors_mock,
+            ):
+                unchanged = validate(upload_path, manifest_path)
+            table_errors_mock.assert_not_called()
+            dir_errors_mock.assert_not_called()
+            self.assertEqual(ErrorReport(unchanged).as_text(), ErrorReport(first).as_text())
+
+            # Fix one error in the TSV: only local validation is re-run
+            tsv_path = upload_path / "scatacseq-metadata.tsv"
+            tsv_path.write_text(
+                tsv_path.read_text().replace("10.17504/fake", "10.17504/protocols.io.menc3de")
+            )
+            with patch("ingest_validation_tools.upload.get_data_dir_errors") as dir_errors_mock:
+                edited = validate(upload_path, manifest_path)
+            dir_errors_mock.assert_not_called()
+            self.assertNotIn("invalid DOI", ErrorReport(edited).as_text())
+            self.assertIn("must be filled out", ErrorReport(edited).as_text())
+
+    def test_revalidation_after_schema_change(self):
+        test_dir = "examples/dataset-examples/bad-scatacseq-data"
+
+        def validate(upload_path: Path, manifest_path: Path) -> Upload:
+            # Computed once per process; again for each run here
+            get_schema_bundle_version.cache_clear()
+            with patch(
+                "ingest_validation_tools.validation_utils.get_assaytype_data",
+                side_effect=lambda row, ingest_url, globus_token: assaytype_side_effect(
+                    test_dir, row, ingest_url, globus_token
+                ),
+            ):
+                upload = Upload(upload_path, manifest_path=manifest_path, **DATASET_EXAMPLES_OPTS)
+                upload.get_errors()
+                return upload
+
+        self.addCleanup(get_schema_bundle_version.cache_clear)
+        with tempfile.TemporaryDirectory() as tempdir:
+            upload_path = Path(tempdir) / "upload"
+            shutil.copytree(f"{test_dir}/upload", upload_path)
+            manifest_path = Path(tempdir) / "manifest.json"
+            schemas_path = Path(tempdir) / "directory-schemas"
+            shutil.copytree("src/ingest_validation_tools/directory-schemas", schemas_path)
+            with (
+                patch(
+                    "ingest_validation_tools.schema_loader._directory_schemas_path", schemas_path
+                ),
+                patch(
+                    "ingest_validation_tools.schema_loader._get_schema_bundle", return_value=None
+                ),
+            ):
+                first = validate(upload_path, manifest_path)
+                self.assertIn("unexpected-directory/", ErrorReport(first).as_text())
+
+                # The directory schema now allows the files reported before
+                with open(schemas_path / "scatacseq-v0.0.yaml", "a") as schema_file:
+                    schema_file.write("  -\n    pattern: unexpected-directory/.*\n")
+                with patch(
+                    "ingest_validation_tools.upload.get_data_dir_errors",
+                    wraps=get_data_dir_errors,
+                ) as dir_errors_mock:
+                    edited = validate(upload_path, manifest_path)
+                dir_errors_mock.assert_called()
+                self.assertNotIn("unexpected-directory/", ErrorReport(edited).as_text())
+                self.assertIn(
+                    "not-the-file-you-are-looking-for.txt", ErrorReport(edited).as_text()
+                )
+
+    def test_tracer(self):
+        test_dir = "examples/dataset-examples/bad-scatacseq-data"
+        tracer = Tracer()
+        with (
+            patch(
+                "ingest_validation_tools.validation_utils.get_assaytype_data",
+                side_effect=lambda row, ingest_url, globus_token: assaytype_side_effect(
+                    test_dir, row, ingest_url, globus_token
+                ),
+            ),
+        ):
+            upload = Upload(Path(f"{test_dir}/upload"), tracer=tracer, **DATASET_EXAMPLES_OPTS)
+            untraced = Upload(Path(f"{test_dir}/upload"), **DATASET_EXAMPLES_OPTS)
+            self.assertEqual(
+                ErrorReport(upload).as_text_list(), ErrorReport(untraced).as_text_list()
+            )
+        trace = upload.get_info().as_dict()["Trace"]
+        self.assertLessEqual(
+            {
+                "preflight",
+                "get_upload_errors",
+                "validate_metadata",
+                "local validation",
+                "run_online_checks",
+                "get_directory_errors",
+                "directory schema check",
+                "get_reference_errors",
+                "get_file_errors",
+            },
+            set(trace["Stages (s)"]),
+        )
+        self.assertGreater(trace["Counts"]["files walked"], 0)
+        events = json.loads(json.dumps(tracer.as_chrome_trace()))["traceEvents"]
+        self.assertEqual(
+            {event["args"]["tsv"] for event in events if event["name"] == "local validation"},
+            {f"{test_dir}/upload/scatacseq-metadata.tsv"},
+        )
+        self.assertIsNone(untraced.get_info().as_dict().get("Trace"))
+
+    def test_report_writers(self):
+        def write(report: ErrorReport, method: str) -> str:
+            stream = StringIO()
+            getattr(report, method)(stream)
+            return stream.getvalue()
+
+        reports = [
+            ErrorReport(self.prep_offline_upload(test_dir, DATASET_EXAMPLES_OPTS))
+            for test_dir in [
+                "examples/dataset-examples/bad-cedar-multi-assay-visium-bad-dir-structure",
+                "examples/dataset-examples/bad-scatacseq-data",
+                "examples/dataset-examples/bad-mixed",
+                "examples/dataset-examples/good-scatacseq-metadata-v0",
+            ]
+        ]
+        errors = ErrorDict()
+        errors.metadata_validation_local.value = {
+            Path("b.tsv"): ['On row 2, column "a", value "" fails because "a" is required'],
+            Path("a.tsv"): {"2": ["x: 1", {"nested": 1.5}], 10: "Not allowed: y"},
+        }
+        reports.append(ErrorReport(errors=errors, info=InfoDict()))
+        for report in reports:
+            self.assertEqual(write(report, "write_text"), report.as_text())
+            self.assertEqual(write(report, "write_text_list"), report.as_text_list())
+            self.assertEqual(write(report, "write_yaml"), report.as_yaml())
+        records = [json.loads(line) for line in write(reports[-1], "write_jsonl").splitlines()]
+        self.assertEqual(
+            [(record["path"], record["error"]) for record in records],
+            [
+                (["a.tsv", "10"], "Not allowed: y."),
+                (["a.tsv", "2"], "x: 1."),
+                (["a.tsv", "2"], {"nested": "1.5."}),
+                (["b.tsv"], 'On row 2, column "a", value "" fails because "a" is required.'),
+            ],
+        )
+        self.assertEqual({record["type"] for record in records}, {"Local Validation Errors"})
+
 
 # if __name__ == "__main__":
 #     suite = unittest.TestLoader().loadTestsFromTestCase(TestDatasetExamples)
@@ -1,4 +1,6 @@
 import json
+import tempfile
+import time
 import unittest
 from pathlib import Path
 from unittest.mock import patch
@@ -8,7 +10,9 @@ import requests
 from parameterized import parameterized
 
 from ingest_validation_tools.enums import DatasetType, OtherTypes, Sample
+from ingest_validation_tools.error_report import ErrorDict
 from ingest_validation_tools.local_validation.table_validator import ReportType
+from ingest_validation_tools.result_cache import MemoryResultCache, SQLiteResultCache
 from ingest_validation_tools.schema_loader import EntityTypeInfo, SchemaVersion
 from ingest_validation_tools.upload import Upload
 from ingest_validation_tools.validation_utils import get_schema_version, get_tsv_errors
@@ -69,7 +73,7 @@ class TestSingleTsv(unittest.TestCase):
         payload = self.upload._construct_constraint_check(GOOD_DATASET_SCHEMA_WITH_ANCESTORS)
         assert payload == GOOD_DATASET_EXPECTED_PAYLOAD
 
-    @patch("ingest_validation_tools.upload.requests.post")
+    @patch("ingest_validation_tools.upload.http_post")
     def test_constraints_bad(self, mock_request):
         mock_request.return_value = get_mock_response(False, BAD_DATASET_CONSTRAINTS_RESPONSE)
         self.assertEqual(
@@ -82,25 +86,112 @@ class TestSingleTsv(unittest.TestCase):
         )
         mock_request.assert_any_call(
             CONSTRAINTS_URL,
+            client=self.upload.http_client,
             headers={"Authorization": "Bearer test", "Content-Type": "application/json"},
             data=json.dumps(BAD_DATASET_EXPECTED_PAYLOAD),
             params=CONSTRAINTS_URL_PARAMS,
         )
 
-    @patch("ingest_validation_tools.upload.requests.post")
+    @patch("ingest_validation_tools.upload.http_post")
     def test_constraints_good(self, mock_request):
         mock_request.return_value = get_mock_response(True, SAMPLE_BLOCK_CONSTRAINTS_RESPONSE_GOOD)
         # Shouldn't return anything
         self.upload._constraint_checks(GOOD_DATASET_SCHEMA_WITH_ANCESTORS)
         mock_request.assert_any_call(
             CONSTRAINTS_URL,
+            client=self.upload.http_client,
             headers={"Authorization": "Bearer test", "Content-Type": "application/json"},
             data=json.dumps(GOOD_DATASET_EXPECTED_PAYLOAD),
             params=CONSTRAINTS_URL_PARAMS,
         )
 
-    @patch("ingest_validation_tools.upload.requests.post")
-    @patch("ingest_validation_tools.upload.requests.get")
+    def test_url_lookups_deduplicated(self):
+        def get_entity(entity_url, entity_id, globus_token, headers=None):
+            if entity_id == "HBM000.MISS.000":
+                raise requests.HTTPError(f"404 Client Error: Not Found for url: {entity_id}")
+            return entity_api_side_effect(
+                self.entity_api_response_map, entity_url, entity_id, globus_token, headers
+            )
+
+        rows = [
+            {"parent_sample_id": "HBM724.ZQKX.379,HBM427.JWVV.723"},
+            {"parent_sample_id": "HBM724.ZQKX.379"},
+            {"parent_sample_id": "HBM000.MISS.000"},
+            {"parent_sample_id": "HBM000.MISS.000,HBM427.JWVV.723"},
+        ]
+        results = []
+        for max_workers in [1, 4]:
+            upload = self.upload
+            upload.max_workers = max_workers
+            schema = SchemaVersion("histology")
+            with patch(
+                "ingest_validation_tools.upload.get_entity_api_data", side_effect=get_entity
+            ) as entity_mock:
+                errors = upload._find_and_check_url_fields(rows, ["parent_sample_id"], schema)
+            self.assertEqual(entity_mock.call_count, 3)
+            results.append(
+                (errors, [(a.row, a.column, a.entity_id) for a in schema.ancestor_entities])
+            )
+        self.assertEqual(results[0], results[1])
+        errors, ancestors = results[0]
+        self.assertEqual(
+            ancestors,
+            [
+                (0, "parent_sample_id", "HBM724.ZQKX.379"),
+                (0, "parent_sample_id", "HBM427.JWVV.723"),
+                (1, "parent_sample_id", "HBM724.ZQKX.379"),
+                (3, "parent_sample_id", "HBM427.JWVV.723"),
+            ],
+        )
+        self.assertEqual(
+            errors,
+            [
+                f'On row {row}, column "parent_sample_id", value "HBM000.MISS.000" fails because '
+                'of error "HTTPError": 404 Client Error: Not Found for url: HBM000.MISS.000'
+                for row in [4, 5]
+            ],
+        )
+
+    def test_online_checks_merged_in_order(self):
+        def api_validation(schema):
+            # Later TSVs finish first
+            time.sleep(0.01 * (5 - int(schema.path.stem)))
+            return [f"API error in {schema.path}"]
+
+        def url_errors(tsv_path, schema, errors):
+            if tsv_path.stem == "3":
+                raise Exception("No token received to check URL fields against Entity API.")
+            errors.metadata_url_errors[tsv_path].append(f"URL error in {tsv_path}")
+
+        results = []
+        for max_workers in [1, 4]:
+            upload = self.upload
+            upload.max_workers = max_workers
+            schemas = [SchemaVersion("histology", path=Path(f"{i}.tsv")) for i in range(5)]
+            # The same TSV can be checked twice, e.g. a shared contributors.tsv
+            online_checks = [(schema.path, schema) for schema in [schemas[0], *schemas]]
+            with patch.object(Upload, "_api_validation", side_effect=api_validation):
+                with patch.object(Upload, "_get_url_errors", side_effect=url_errors):
+                    with patch.object(Upload, "_constraint_checks", return_value=None):
+                        with self.assertRaises(Exception):
+                            upload.run_online_checks(online_checks)
+            results.append(
+                (
+                    dict(upload.errors.metadata_url_errors.value),
+                    dict(upload.errors.metadata_validation_api.value),
+                )
+            )
+        self.assertEqual(results[0], results[1])
+        url_errors, api_errors = results[0]
+        self.assertEqual(
+            url_errors,
+            {Path(f"{i}.tsv"): [f"URL error in {i}.tsv"] * (2 if i == 0 else 1) for i in range(3)},
+        )
+        # Checks stop at the TSV that raised, which still gets its API errors
+        self.assertEqual(list(api_errors), [Path(f"{i}.tsv") for i in range(4)])
+
+    @patch("ingest_validation_tools.upload.http_post")
+    @patch("ingest_validation_tools.validation_utils.http_get")
     def test_expected_ancestor_entities_creation(self, mock_entity_api, mock_cedar_api):
         mock_entity_api.return_value = get_mock_response(
             True, SAMPLE_BLOCK_PARTIAL_ENTITY_API_RESPONSE
@@ -136,7 +227,7 @@ class TestSingleTsv(unittest.TestCase):
         schema_name: str,
         expected_errors_list: list[list],
     ):
-        with patch("ingest_validation_tools.upload.requests.post") as mock_constraints_response:
+        with patch("ingest_validation_tools.upload.http_post") as mock_constraints_response:
             with patch("ingest_validation_tools.upload.cedar_validation_call") as mock_cedar_call:
                 with patch(
                     "ingest_validation_tools.validation_utils.get_entity_api_data",
@@ -205,7 +296,7 @@ class TestSingleTsv(unittest.TestCase):
             EntityTypeInfo(entity_type=Sample.ORGAN)
 
     def create_upload(self, tsv_paths: list[Path], assaytype_response: dict):
-        with patch("ingest_validation_tools.upload.requests.post") as mock_constraints_response:
+        with patch("ingest_validation_tools.upload.http_post") as mock_constraints_response:
             with patch("ingest_validation_tools.upload.cedar_validation_call") as mock_cedar_call:
                 with patch(
                     "ingest_validation_tools.validation_utils.get_entity_api_data",
@@ -249,3 +340,50 @@ class TestSingleTsv(unittest.TestCase):
         path = Path("./tests/fixtures/contributors_bad.tsv")
         upload.validate_metadata({path: SchemaVersion("contributors")})
         assert upload.errors.upload_metadata.value == {path: "Empty columns: 5"}
+
+    @parameterized.expand(["memory", "sqlite"])
+    def test_get_tsv_errors_result_cache(self, backend: str):
+        path = Path("./tests/fixtures/sample-block-good.tsv")
+        with tempfile.TemporaryDirectory() as tmp:
+            if backend == "memory":
+                result_cache = MemoryResultCache(online_ttl=-1)
+            else:
+                result_cache = SQLiteResultCache(Path(tmp) / "results.sqlite", online_ttl=-1)
+            upload = Upload(directory_path=Path("."))
+            upload.errors = ErrorDict()
+            with patch(
+                "ingest_validation_tools.validation_utils._get_tsv_errors",
+                return_value=(["an error"], upload),
+            ) as mock_get_tsv_errors:
+
+                def get_errors(**kwargs) -> list:
+                    return get_tsv_errors(
+                        path, "sample-block", result_cache=result_cache, **kwargs
+                    )
+
+                assert get_errors(no_url_checks=True) == ["an error"]
+                assert get_errors(no_url_checks=True) == ["an error"]
+                assert mock_get_tsv_errors.call_count == 1
+                # Results from another version of this package aren't reused
+                with patch("ingest_validation_tools.upload.get_version", return_value="upgraded"):
+                    get_errors(no_url_checks=True)
+                assert mock_get_tsv_errors.call_count == 2
+                # A different report type is validated separately
+                get_errors(no_url_checks=True, report_type=ReportType.JSON)
+                assert mock_get_tsv_errors.call_count == 3
+                # Online results expire after online_ttl
+                get_errors()
+                get_errors()
+                assert mock_get_tsv_errors.call_count == 5
+                # Results of failed remote calls aren't kept
+                upload.errors.metadata_validation_api[path].append(RuntimeError("timed out"))
+                get_errors(no_url_checks=True, ignore_deprecation=True)
+                get_errors(no_url_checks=True, ignore_deprecation=True)
+                assert mock_get_tsv_errors.call_count == 7
+            # Paths that aren't files get their usual errors
+            for bad_path in [Path("./tests/fixtures/missing.tsv"), Path("./tests/fixtures")]:
+                assert get_tsv_errors(
+                    bad_path, "sample-block", no_url_checks=True, result_cache=result_cache
+                ) == get_tsv_errors(bad_path, "sample-block", no_url_checks=True)
+            if backend == "sqlite":
+                result_cache.close()
@@ -0,0 +1,155 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+
+from ingest_validation_tools import schema_loader
+from ingest_validation_tools.enums import ReportType
+from ingest_validation_tools.local_validation.native_validator import Unsupported
+from ingest_validation_tools.local_validation.table_validator import get_table_errors
+from ingest_validation_tools.parsed_tsv import ParsedTSV
+
+REPO_PATH = Path(__file__).parent.parent
+
+FUZZ_CELLS = [
+    "",
+    "NA",
+    "N/A",
+    "1",
+    "0",
+    "-1",
+    "1.5",
+    "NaN",
+    "Infinity",
+    " 2",
+    "1e3",
+    "1_000",
+    "abc",
+    "true",
+    "TRUE",
+    "False",
+    "yes",
+    "2020-01-01 12:00",
+    "2020-01-01",
+    "2020-13-01 12:00",
+    "2020-01-01T12:00:00",
+    "a@b.org",
+    "not an email",
+    '"q"',
+    "HBM123.ABCD.456",
+]
+
+
+class StubURLStatusCache:
+    def check(self, url):
+        return 404 if "bad" in url else 200
+
+    def check_all(self, urls):
+        pass
+
+    def flush(self):
+        pass
+
+
+def load_table_schemas() -> dict:
+    schemas = {}
+    for schema_type in ["assays", "others"]:
+        for path in sorted((schema_loader._table_schemas_path / schema_type).glob("*.yaml")):
+            try:
+                schemas[f"{schema_type}/{path.stem}"] = schema_loader._load_table_schema(
+                    schema_type, path.stem
+                )
+            except Exception:
+                # Some legacy schemas no longer load; nothing to compare
+                continue
+    return schemas
+
+
+class TestTableValidatorEngines(unittest.TestCase):
+    """
+    The native engine must give exactly the reports frictionless gives,
+    or decline with Unsupported so that get_table_errors falls back.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.schemas = load_table_schemas()
+
+    def setUp(self):
+        stub = StubURLStatusCache()
+        for target, kwargs in [
+            ("table_validator.get_url_status_cache", {"return_value": stub}),
+            ("check_factory.get_url_status_cache", {"return_value": stub}),
+            ("table_validator.prefetch_url_statuses", {}),
+        ]:
+            patcher = patch(f"ingest_validation_tools.local_validation.{target}", **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assert_engines_match(self, path: Path, schema: dict, label: str) -> bool:
+        """
+        Returns True if the native engine handled the file.
+        """
+        handled = True
+        for report_type in ReportType:
+            expected = get_table_errors(path, schema, report_type, engine="frictionless")
+            try:
+                actual = get_table_errors(path, schema, report_type, engine="native")
+            except Unsupported:
+                handled = False
+                continue
+            self.assertEqual(expected, actual, f"{label}: {path}")
+        return handled
+
+    def get_fixture_pairs(self) -> list[tuple[Path, dict, str]]:
+        pairs = []
+        for example in sorted((REPO_PATH / "examples/custom-constraint-examples").iterdir()):
+            schema = yaml.safe_load((example / "schema.yaml").read_text())
+            pairs.append((example / "input.tsv", schema, example.name))
+        schemas_by_header: dict[tuple, list[str]] = {}
+        for name, schema in self.schemas.items():
+            header = tuple(field["name"] for field in schema["fields"])
+            schemas_by_header.setdefault(header, []).append(name)
+        tsv_paths = sorted(
+            set((REPO_PATH / "examples").glob("**/*.tsv"))
+            | set((REPO_PATH / "tests/fixtures").glob("**/*.tsv"))
+        )
+        for tsv_path in tsv_paths:
+            try:
+                header = tuple(ParsedTSV(tsv_path).header or [])
+            except UnicodeDecodeError:
+                continue
+            for name in schemas_by_header.get(header, []):
+                pairs.append((tsv_path, self.schemas[name], name))
+        return pairs
+
+    def test_fixtures(self):
+        pairs = self.get_fixture_pairs()
+        handled = [self.assert_engines_match(*pair) for pair in pairs]
+        # Make sure the comparison isn't vacuous
+        self.assertGreater(sum(handled), len(pairs) / 2)
+
+    def test_fuzzed_tables(self):
+        rng = random.Random(0)
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = Path(tempdir) / "fuzzed.tsv"
+            for name, schema in self.schemas.items():
+                lines = ["\t".join(field["name"] for field in schema["fields"])]
+                for _ in range(rng.choice([1, 5, 40])):
+                    cells = []
+                    for field in schema["fields"]:
+                        choices = list(FUZZ_CELLS)
+                        choices += [str(v) for v in field.get("constraints", {}).get("enum", [])]
+                        if "example" in field:
+                            choices.append(str(field["example"]))
+                        cells.append(rng.choice(choices).replace("\t", " "))
+                    lines.append("\t".join(cells))
+                path.write_text("\n".join(lines) + "\n")
+                self.assert_engines_match(path, schema, name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,110 @@
+import json
+import os
+import re
+import sys
+import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from importlib.metadata import PackageNotFoundError
+from pathlib import Path
 from unittest.mock import patch
 
-from ingest_validation_tools.validation_utils import get_entity_api_data
+from urllib3 import HTTPResponse
+
+from ingest_validation_tools import directory_validator, schema_loader
+from ingest_validation_tools.directory_validator import DirectoryIndex, get_files
+from ingest_validation_tools.enums import ReportType
+from ingest_validation_tools.error_report import (
+    DictErrorType,
+    ErrorDict,
+    ErrorReport,
+    InfoDict,
+)
+from ingest_validation_tools.http_utils import (
+    DEFAULT_HTTP_CONFIG,
+    HttpClient,
+    get_current_http_client,
+    get_http_client,
+    http_get,
+    use_http_client,
+)
+from ingest_validation_tools.local_validation.check_factory import URLStatusCache
+from ingest_validation_tools.local_validation.message_munger import munge, pat_reps
+from ingest_validation_tools.local_validation.table_validator import (
+    get_table_errors,
+    iter_table_errors,
+)
+from ingest_validation_tools.plugin_validator import validation_error_iter
+from ingest_validation_tools.tracing import with_tracer
+from ingest_validation_tools.upload import Upload, get_version
+from ingest_validation_tools.upload_manifest import UploadManifest
+from ingest_validation_tools.validation_utils import (
+    clear_assaytype_cache,
+    get_assaytype_data,
+    get_data_dir_errors,
+    get_entity_api_data,
+)
+from ingest_validation_tools.yaml_include_loader import (
+    cache_clear,
+    cache_info,
+    load_yaml,
+)
+from tests.fixtures import SCATACSEQ_LOWER_VERSION_VALID
+
+PLUGIN_MODULE = """
+class Validator:
+    description = "Test plugin"
+
+    def __init__(self, paths, *args, **kwargs):
+        self.paths = paths
+
+
+class PathsValidator(Validator):
+    def collect_errors(self):
+        return [f"bad: {path.name}" for path in self.paths if "bad" in path.name] or [None]
+
+
+class FailingValidator(Validator):
+    def collect_errors(self):
+        raise ValueError("broken plugin")
+
+
+class IrrelevantValidator(Validator):
+    def collect_errors(self):
+        return []
+
+
+def validation_class_iter():
+    return [PathsValidator, FailingValidator, IrrelevantValidator]
+"""
+
+PATH_PLUGIN_MODULE = """
+class FlakyValidator:
+    description = "Fails on some paths"
+
+    def __init__(self, paths, *args, **kwargs):
+        self.paths = paths
+        self.directory_indexes = kwargs.get("directory_indexes", {})
+
+    def collect_errors(self):
+        if any("flaky" in path.name for path in self.paths):
+            raise ValueError("boom")
+        return [
+            f"{path.name} sees {sorted(p.name for p in self.directory_indexes)}"
+            for path in self.paths
+            if "bad" in path.name
+        ] or [None]
+
+
+def validation_class_iter():
+    return [FlakyValidator]
+"""
 
 
 class TestUtils(unittest.TestCase):
 
-    @patch("ingest_validation_tools.validation_utils.requests.get")
+    @patch("ingest_validation_tools.validation_utils.http_get")
     def test_get_entity_api_data_url(self, req_mock):
         test_entity_url = "https://entity.api.hubmapconsortium.org/entities/"
         test_token = "test_token"
@@ -16,3 +114,533 @@ class TestUtils(unittest.TestCase):
             test_entity_url + test_id + "?exclude=direct_ancestors.files",
             headers={"Authorization": f"Bearer {test_token}"},
         )
+
+    @patch("ingest_validation_tools.validation_utils.http_post")
+    def test_get_assaytype_data_memoized(self, post_mock):
+        post_mock.return_value.json.side_effect = lambda: {"assaytype": "AF"}
+        clear_assaytype_cache()
+        row = {"dataset_type": "Auto-fluorescence", "lab_id": "1", "data_path": "./1"}
+        data = get_assaytype_data(row, "http://ingest_test/", "token")
+        data["assaytype"] = "modified"
+        # Only identifiers and paths differ
+        row = {"dataset_type": "Auto-fluorescence", "lab_id": "2", "data_path": "./2"}
+        self.assertEqual(
+            get_assaytype_data(row, "http://ingest_test/", "token"), {"assaytype": "AF"}
+        )
+        self.assertEqual(post_mock.call_count, 1)
+        get_assaytype_data({"dataset_type": "Histology"}, "http://ingest_test/", "token")
+        self.assertEqual(post_mock.call_count, 2)
+        with patch("ingest_validation_tools.validation_utils.ASSAYTYPE_CACHE_TTL", -1):
+            clear_assaytype_cache()
+            get_assaytype_data(row, "http://ingest_test/", "token")
+            get_assaytype_data(row, "http://ingest_test/", "token")
+        self.assertEqual(post_mock.call_count, 4)
+        clear_assaytype_cache()
+
+    def test_parallel_plugins(self):
+        paths = [Path("good-1"), Path("bad-2"), Path("good-3")]
+        with tempfile.TemporaryDirectory() as plugin_dir:
+            (Path(plugin_dir) / "validator.py").write_text(PLUGIN_MODULE)
+            try:
+
+                def run(**kwargs) -> list:
+                    return [
+                        (val_class.__name__, err)
+                        for val_class, err in validation_error_iter(
+                            paths, "test", plugin_dir, [], **kwargs
+                        )
+                    ]
+
+                with self.assertRaises(ValueError):
+                    run()
+                expected = [
+                    ("PathsValidator", "bad: bad-2"),
+                    ("FailingValidator", "FailingValidator failed: ValueError: broken plugin"),
+                ]
+                with self.assertLogs(level="ERROR"):
+                    self.assertEqual(run(plugin_workers=2), expected)
+                    self.assertEqual(run(plugin_workers=2, plugin_parallel_paths=True), expected)
+                    paths.remove(Path("bad-2"))
+                    self.assertEqual(
+                        run(plugin_workers=2, plugin_parallel_paths=True)[0],
+                        ("PathsValidator", None),
+                    )
+            finally:
+                sys.modules.pop("validator", None)
+
+    def test_parallel_paths_mixed_results(self):
+        with tempfile.TemporaryDirectory() as plugin_dir:
+            (Path(plugin_dir) / "validator.py").write_text(PATH_PLUGIN_MODULE)
+            try:
+
+                def run(paths: list[Path], **kwargs) -> list:
+                    return [
+                        (val_class.__name__, err)
+                        for val_class, err in validation_error_iter(
+                            paths,
+                            "test",
+                            plugin_dir,
+                            [],
+                            plugin_workers=2,
+                            directory_indexes={path: [] for path in paths},
+                            **kwargs,
+                        )
+                    ]
+
+                failed = ("FlakyValidator", "FlakyValidator failed: ValueError: boom")
+                with self.assertLogs(level="ERROR"):
+                    # Passes on one path and raises on the other
+                    self.assertEqual(run([Path("good-1"), Path("flaky-2")]), [failed])
+                    self.assertEqual(
+                        run([Path("good-1"), Path("flaky-2")], plugin_parallel_paths=True),
+                        [failed],
+                    )
+                    self.assertEqual(
+                        run([Path("bad-1"), Path("flaky-2")], plugin_parallel_paths=True),
+                        [("FlakyValidator", "bad-1 sees ['bad-1']"), failed],
+                    )
+                self.assertEqual(
+                    run([Path("bad-1"), Path("good-2")], plugin_parallel_paths=True),
+                    [("FlakyValidator", "bad-1 sees ['bad-1']")],
+                )
+                self.assertEqual(
+                    run([Path("bad-1"), Path("good-2")]),
+                    [("FlakyValidator", "bad-1 sees ['bad-1', 'good-2']")],
+                )
+            finally:
+                sys.modules.pop("validator", None)
+
+    def test_plugin_stats(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            plugin_dir = Path(tmp) / "plugins"
+            plugin_dir.mkdir()
+            (plugin_dir / "validator.py").write_text(
+                PLUGIN_MODULE.replace("FailingValidator, ", "")
+            )
+            paths = [Path(tmp) / "good-1", Path(tmp) / "bad-2"]
+            for i, path in enumerate(paths):
+                (path / "raw").mkdir(parents=True)
+                (path / "raw" / "a.fastq").write_bytes(b"@" * (i + 1))
+            log_path = Path(tmp) / "timing.jsonl"
+            try:
+                for kwargs in [{}, {"plugin_workers": 2, "plugin_parallel_paths": True}]:
+                    info = InfoDict()
+                    list(
+                        validation_error_iter(
+                            paths,
+                            "test",
+                            str(plugin_dir),
+                            [],
+                            plugin_stats=info.plugin_stats,
+                            plugin_timing_log=log_path,
+                            **kwargs,
+                        )
+                    )
+                    stats = info.as_dict()["Plugin Stats"]
+                    by_plugin = {}
+                    for plugin_stats in stats:
+                        by_plugin.setdefault(plugin_stats["Plugin"], []).append(plugin_stats)
+                    # One run per plugin, or per plugin and path
+                    runs = len(paths) if kwargs else 1
+                    self.assertEqual(
+                        {name: len(records) for name, records in by_plugin.items()},
+                        {"PathsValidator": runs, "IrrelevantValidator": runs},
+                    )
+                    self.assertEqual(sum(s["Files"] for s in by_plugin["PathsValidator"]), 2)
+                    self.assertEqual(sum(s["Bytes"] for s in by_plugin["PathsValidator"]), 3)
+                    self.assertEqual(sum(s["Errors"] for s in by_plugin["PathsValidator"]), 1)
+                    self.assertEqual(
+                        [s["Ran"] for s in by_plugin["IrrelevantValidator"]], [False] * runs
+                    )
+            finally:
+                sys.modules.pop("validator", None)
+            self.assertEqual(len(log_path.read_text().splitlines()), 6)
+
+    def test_data_dir_walked_once(self):
+        with tempfile.TemporaryDirectory() as upload_dir:
+            dataset = Path(upload_dir) / "dataset-1"
+            dataset.mkdir()
+            (dataset / "reads.fastq.gz").touch()
+            index_cache: dict[Path, DirectoryIndex] = {}
+            with patch(
+                "ingest_validation_tools.validation_utils.get_possible_directory_schemas",
+                return_value=SCATACSEQ_LOWER_VERSION_VALID,
+            ):
+                with patch(
+                    "ingest_validation_tools.directory_validator.os.walk", wraps=os.walk
+                ) as walk_mock:
+                    for _ in range(2):
+                        errors = get_data_dir_errors(
+                            "test-schema",
+                            Path(upload_dir),
+                            Path("dataset-1"),
+                            index_cache=index_cache,
+                        )
+                        # v0.1 fails (extras/ missing), v0.0 passes
+                        self.assertEqual(errors, {"test-schema-v0.0": {}})
+                    walk_mock.assert_called_once_with(dataset)
+            self.assertEqual(index_cache[dataset].files, ["reads.fastq.gz"])
+
+    def test_get_files_threads(self):
+        with tempfile.TemporaryDirectory() as dataset_dir:
+            dataset = Path(dataset_dir)
+            (dataset / "reads.fastq.gz").touch()
+            index_cache: dict[Path, DirectoryIndex] = {}
+            with patch(
+                "ingest_validation_tools.directory_validator.os.walk", wraps=os.walk
+            ) as walk_mock:
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    indexes = list(
+                        executor.map(lambda _: get_files([dataset], index_cache), range(32))
+                    )
+            walk_mock.assert_called_once_with(dataset)
+            self.assertEqual({tuple(index.files) for index in indexes}, {("reads.fastq.gz",)})
+            # No lock is kept for a path once nothing is walking it
+            self.assertEqual(directory_validator._walk_locks, {})
+
+    def test_load_yaml_cache(self):
+        with tempfile.TemporaryDirectory() as schema_dir:
+            schema_path = Path(schema_dir) / "schema.yaml"
+            include_path = Path(schema_dir) / "field.yaml"
+            schema_path.write_text("fields:\n  # include: field.yaml\n")
+            include_path.write_text("- name: a\n")
+            cache_clear()
+            schema = load_yaml(schema_path)
+            self.assertEqual(schema, {"fields": [{"name": "a"}]})
+            # Callers get their own copy
+            schema["fields"].append({"name": "mutated"})
+            self.assertEqual(load_yaml(schema_path), {"fields": [{"name": "a"}]})
+            self.assertEqual(cache_info()[:3], (1, 1, 1))
+            # Editing an included file invalidates the entry
+            include_path.write_text("- name: b\n")
+            os.utime(include_path, ns=(0, 0))
+            self.assertEqual(load_yaml(schema_path), {"fields": [{"name": "b"}]})
+            self.assertEqual(cache_info()[:3], (1, 2, 1))
+            cache_clear()
+            self.assertEqual(cache_info(), (0, 0, 0, 0))
+
+    def test_schema_bundle(self):
+        schema_versions = schema_loader.list_table_schema_versions()[:10]
+
+        def load_all():
+            return [
+                schema_loader.get_table_schema(sv, no_url_checks=no_url_checks, keep_headers=kh)
+                for sv in schema_versions
+                for no_url_checks in [False, True]
+                for kh in [False, True]
+            ] + [schema_loader.get_possible_directory_schemas("scatacseq")]
+
+        with tempfile.TemporaryDirectory() as bundle_dir:
+            bundle_path = Path(bundle_dir) / "schema-bundle.pickle"
+            with patch.object(schema_loader, "_schema_bundle_path", bundle_path):
+                schema_loader._get_schema_bundle.cache_clear()
+                from_yaml = load_all()
+                schema_loader.build_schema_bundle(bundle_path)
+                self.assertIsNotNone(schema_loader._get_schema_bundle())
+                self.assertEqual(load_all(), from_yaml)
+                # Bundles built from other sources are ignored
+                schema_loader._get_schema_bundle.cache_clear()
+                with patch.object(schema_loader, "schema_sources_digest", return_value=""):
+                    with self.assertLogs(level="WARNING"):
+                        self.assertIsNone(schema_loader._get_schema_bundle())
+        schema_loader._get_schema_bundle.cache_clear()
+
+    def test_http_client_config(self):
+        client = HttpClient(
+            {"timeout": [2, 10], "timeouts": {"https://slow.org/": 120}, "retries": 1}
+        )
+        retries = client.session.get_adapter("https://entity.api.hubmapconsortium.org").max_retries
+        self.assertEqual(retries.total, 1)
+        self.assertIn(503, retries.status_forcelist)
+        with patch.object(client.session, "request") as request_mock:
+            client.request("GET", "https://entity.api.hubmapconsortium.org/entities/x")
+            client.request("POST", "https://slow.org/validate", data="{}")
+            client.request("GET", "https://slow.org/other", timeout=1)
+        self.assertEqual(
+            [call.kwargs.get("timeout") for call in request_mock.call_args_list], [(2, 10), 120, 1]
+        )
+        self.assertTrue(retries.is_retry("GET", 503))
+        self.assertFalse(retries.is_retry("POST", 503))
+        response = HTTPResponse(status=429, headers={"Retry-After": "3600"})
+        self.assertEqual(retries.get_retry_after(response), 60)
+        self.assertEqual(retries.increment("GET", "/").get_retry_after(response), 60)
+
+    def test_http_client_per_upload(self):
+        retry_once, default = Upload.__new__(Upload), Upload.__new__(Upload)
+        retry_once.get_app_context({"http": {"retries": 1}})
+        default.get_app_context({})
+        self.assertEqual(retry_once.http_client.config["retries"], 1)
+        self.assertIs(default.http_client, get_http_client())
+        self.assertEqual(get_http_client().config, DEFAULT_HTTP_CONFIG)
+        # Uploads with the same settings share a client
+        other = Upload.__new__(Upload)
+        other.get_app_context({"http": {"retries": 1}})
+        self.assertIs(other.http_client, retry_once.http_client)
+
+        # Concurrent validations each use their own client, on any thread
+        def get_url(upload: Upload) -> HttpClient:
+            with use_http_client(upload.http_client):
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    return executor.submit(with_tracer(http_get), "https://a.org/").result()
+
+        with patch.object(HttpClient, "request", autospec=True) as request_mock:
+            request_mock.side_effect = lambda client, method, url: client
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                clients = list(executor.map(get_url, [retry_once, default] * 4))
+        self.assertEqual(clients, [retry_once.http_client, default.http_client] * 4)
+        self.assertIs(get_current_http_client(), get_http_client())
+
+    def test_url_status_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = Path(cache_dir) / "url-status-cache.json"
+            # Expiry times inside the status map, as earlier versions wrote them
+            path.write_text(
+                json.dumps(
+                    {
+                        "https://legacy.org/": 200,
+                        "https://expired.org/": 200,
+                        URLStatusCache.LEGACY_EXPIRES_KEY: {
+                            "https://expired.org/": time.time() - 1
+                        },
+                    }
+                )
+            )
+            url_status_cache = URLStatusCache(path)
+            with patch(
+                "ingest_validation_tools.local_validation.check_factory.http_get"
+            ) as http_get_mock:
+                http_get_mock.return_value.status_code = 404
+                url_status_cache.check_all(
+                    ["https://legacy.org/", "https://expired.org/", "https://new.org/"] * 3
+                )
+                self.assertEqual(
+                    sorted(call.args[0] for call in http_get_mock.call_args_list),
+                    ["https://expired.org/", "https://new.org/"],
+                )
+                self.assertEqual(url_status_cache.check("https://legacy.org/"), 200)
+                self.assertEqual(url_status_cache.check("https://new.org/"), 404)
+            # Another process adds an entry before this one flushes
+            contents = json.loads(path.read_text())
+            contents["https://other.org/"] = 200
+            path.write_text(json.dumps(contents))
+            url_status_cache.flush()
+            self.assertEqual(
+                json.loads(path.read_text()),
+                {
+                    "https://legacy.org/": 200,
+                    "https://expired.org/": 404,
+                    "https://new.org/": 404,
+                    "https://other.org/": 200,
+                },
+            )
+            self.assertEqual(
+                sorted(json.loads(url_status_cache.expires_path.read_text())),
+                ["https://expired.org/", "https://new.org/"],
+            )
+            self.assertEqual(url_status_cache.get("https://other.org/"), 200)
+
+    def test_iter_table_errors(self):
+        schema = {
+            "fields": [
+                {
+                    "name": "na_forbidden",
+                    "type": "string",
+                    "custom_constraints": {"forbid_na": True},
+                },
+                {"name": "na_allowed", "type": "string"},
+            ]
+        }
+        with tempfile.TemporaryDirectory() as tsv_dir:
+            tsv_path = Path(tsv_dir) / "big.tsv"
+            tsv_path.write_text("na_forbidden\tna_allowed\n" + "NA\tNA\nok\tNA\n" * 5000)
+            all_errors = get_table_errors(tsv_path, schema)
+            self.assertEqual(len(all_errors), 1000)  # frictionless' default limit
+            self.assertEqual(list(iter_table_errors(tsv_path, schema))[:1000], all_errors)
+            with patch(
+                "ingest_validation_tools.local_validation.table_validator.prefetch_url_statuses"
+            ) as prefetch_mock:
+                first_errors = list(iter_table_errors(tsv_path, schema, max_errors=10))
+            self.assertEqual(first_errors, all_errors[:10])
+            # Stopped within the first batch of rows
+            self.assertEqual(prefetch_mock.call_count, 1)
+
+    def test_error_messages_interned(self):
+        errors = ErrorDict()
+        plain = ErrorDict()
+        for dataset in ["ds-1", "ds-2"]:
+            for name in ["a.jpg", "b.jpg", "a.jpg"]:
+                errors.directory[dataset].append(f"Not allowed: extras/{name}")
+                plain.directory.value.setdefault(dataset, []).append(f"Not allowed: extras/{name}")
+        errors.upload_metadata.update({"contributors.tsv": ["".join(["No ", "primary contact."])]})
+        plain.upload_metadata.value["contributors.tsv"] = ["No primary contact."]
+        self.assertIs(errors.directory["ds-1"][0], errors.directory["ds-2"][2])
+        # Nested, as directory validation stores them
+        for dataset in ["ds-3 (as x)", "ds-4 (as x)"]:
+            not_allowed = {"Not allowed": [f"extras/{name}" for name in ["a.jpg", "c.jpg"]]}
+            errors.directory[dataset] = not_allowed
+            plain.directory.value[dataset] = {"Not allowed": list(not_allowed["Not allowed"])}
+        self.assertIs(
+            errors.directory["ds-3 (as x)"]["Not allowed"][1],
+            errors.directory["ds-4 (as x)"]["Not allowed"][1],
+        )
+        # Stored, not copied: appending after assigning still counts
+        local_errors = ['On row 2, column "a", value "" fails because it is required.']
+        errors.metadata_validation_local["a.tsv"] = local_errors
+        plain.metadata_validation_local.value["a.tsv"] = list(local_errors)
+        local_errors.append('On row 3, column "a", value "" fails because it is required.')
+        plain.metadata_validation_local.value["a.tsv"].append(local_errors[-1])
+        self.assertIs(errors.metadata_validation_local["a.tsv"], local_errors)
+        self.assertEqual(errors.as_dict(), plain.as_dict())
+        # Interned in a table shared by the report's fields, not process-wide
+        self.assertIs(errors.directory.strings, errors.upload_metadata.strings)
+        self.assertIn("No primary contact.", errors.directory.strings)
+        self.assertIsNot(
+            plain.upload_metadata.value["contributors.tsv"][0],
+            errors.upload_metadata["contributors.tsv"][0],
+        )
+        self.assertEqual(ErrorDict().directory.strings, {})
+        for report_type in ReportType:
+            with self.subTest(report_type=report_type):
+                report = ErrorReport(errors=errors)
+                report.report_type = report_type
+                plain_report = ErrorReport(errors=plain)
+                plain_report.report_type = report_type
+                self.assertEqual(report.as_text(), plain_report.as_text())
+                self.assertEqual(report.counts, plain_report.counts)
+
+    def test_error_views_cached_until_changed(self):
+        errors = ErrorDict()
+        errors.directory["ds-1"].append("Not allowed: a.jpg")
+        with patch.object(
+            DictErrorType, "recursive_cleanup", autospec=True, side_effect=lambda _, value: value
+        ) as cleanup_mock:
+            first = errors.as_dict()
+            self.assertTrue(errors)
+            self.assertEqual(errors.as_dict(), first)
+            self.assertEqual(cleanup_mock.call_count, 1)
+        # What callers get back is theirs to change: the cached views are not
+        first["Directory Errors"]["ds-1"].append("Changed by caller")
+        errors.as_dict()["Directory Errors"].clear()
+        errors.errors_by_path("ds-1", [errors.directory])["Directory Errors"].append("Changed")
+        errors.directory.cleaned_value["ds-1"].clear()
+        self.assertEqual(errors.as_dict()["Directory Errors"], {"ds-1": ["Not allowed: a.jpg"]})
+        self.assertEqual(
+            errors.errors_by_path("ds-1", [errors.directory]),
+            {"Directory Errors": ["Not allowed: a.jpg"]},
+        )
+        changes = [
+            lambda: errors.directory["ds-1"].append("Not allowed: b.jpg"),
+            lambda: errors.directory.update({"ds-2": ["Missing: c.tsv"]}),
+            lambda: errors.directory.pop("ds-1"),
+            lambda: setattr(errors.directory, "value", {"ds-3": ["Missing: d.tsv"]}),
+        ]
+        for change in changes:
+            change()
+            self.assertEqual(
+                errors.as_dict()["Directory Errors"],
+                errors.sort_val(errors.directory.recursive_cleanup(errors.directory.value)),
+            )
+        self.assertEqual(errors.as_dict()["Directory Errors"], {"ds-3": ["Missing: d.tsv"]})
+
+    def test_errors_by_path_index(self):
+        def scan(errors: ErrorDict, path: str) -> dict:
+            # errors_by_path before the index
+            found = {}
+            for error_field in [errors.metadata_validation_local, errors.upload_metadata]:
+                for key, value in error_field.cleaned_value.items():
+                    if Path(path).resolve() == Path(key).resolve() or path in key:
+                        found[error_field.display_name] = value
+                        break
+            return found
+
+        errors = ErrorDict()
+        errors.metadata_validation_local.update(
+            {
+                "upload/a-metadata.tsv (as a)": ["Missing: x"],
+                Path("upload/a-metadata.tsv").resolve(): ["Missing: y"],
+                "upload/b-metadata.tsv": ["Missing: z"],
+            }
+        )
+        errors.upload_metadata["./upload/b-metadata.tsv"].append("No primary contact.")
+        selected_fields = [errors.metadata_validation_local, errors.upload_metadata]
+        paths = [
+            "upload/a-metadata.tsv",
+            str(Path("upload/a-metadata.tsv").resolve()),
+            "upload/b-metadata.tsv",
+            "b-metadata.tsv",
+            "upload/c-metadata.tsv",
+        ]
+        errors.errors_by_path(paths[0], selected_fields)
+        resolve = Path.resolve
+        with patch.object(
+            Path, "resolve", autospec=True, side_effect=lambda path: resolve(path)
+        ) as resolve_mock:
+            for path in paths:
+                self.assertEqual(errors.errors_by_path(path, selected_fields), scan(errors, path))
+                resolve_mock.reset_mock()
+                errors.errors_by_path(path, selected_fields)
+                self.assertEqual(resolve_mock.call_count, 1, path)
+
+    def test_get_version(self):
+        get_version.cache_clear()
+        self.addCleanup(get_version.cache_clear)
+        with (
+            patch("ingest_validation_tools.upload.version", side_effect=PackageNotFoundError),
+            patch(
+                "ingest_validation_tools.upload.subprocess.check_output",
+                side_effect=FileNotFoundError("git"),
+            ) as git_mock,
+        ):
+            with self.assertLogs(level="WARNING"):
+                self.assertIsNone(get_version())
+            self.assertIsNone(get_version())
+        self.assertEqual(git_mock.call_count, 1)
+        get_version.cache_clear()
+        with patch("ingest_validation_tools.upload.version", return_value="1.1.9"):
+            self.assertEqual(get_version(), "1.1.9")
+
+    def test_upload_manifest_ttl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "manifest.json"
+            manifest = UploadManifest(path)
+            manifest.reuse_or_run("online", {"tsv": "abc"}, lambda: ["first"], ttl=60)
+            manifest.reuse_or_run("local", {"tsv": "abc"}, lambda: ["first"])
+            manifest.save()
+            manifest = UploadManifest(path)
+            self.assertEqual(
+                manifest.reuse_or_run("online", {"tsv": "abc"}, lambda: ["rerun"], ttl=60),
+                ["first"],
+            )
+            manifest.reuse_or_run("local", {"tsv": "abc"}, lambda: ["rerun"])
+            manifest.save()
+            with patch(
+                "ingest_validation_tools.upload_manifest.time.time",
+                return_value=time.time() + 61,
+            ):
+                manifest = UploadManifest(path)
+                self.assertEqual(
+                    manifest.reuse_or_run("online", {"tsv": "abc"}, lambda: ["rerun"], ttl=60),
+                    ["rerun"],
+                )
+                self.assertEqual(
+                    manifest.reuse_or_run("local", {"tsv": "abc"}, lambda: ["rerun"]), ["first"]
+                )
+
+    def test_munge_matches_sequential_rules(self):
+        def sequential_munge(message):
+            for pattern, replacement in pat_reps:
+                message = re.sub(pattern, replacement, message)
+            return message
+
+        messages = [
+            "Metadata TSV Errors: examples/upload/codex-metadata.tsv (as codex-v0): Missing: x",
+            "Directory Errors: ds/fake (as fake): row 2, field fake_path: Not allowed: nope.txt",
+            "Reference Errors: Multiple References: dataset-1: upload/a-metadata.tsv",
+            'On row 2, column "x", value "y" fails because constraint "enum" is "[\'a\', \'b\']"',
+            'value "<y>" fails because type is "datetime/%Y-%m-%d %H:%M"',
+            "400 Client Error: Bad Request for url: https://x.org/1.",
+        ]
+        for readme in Path("examples").glob("**/README.md"):
+            messages += readme.read_text().splitlines()
+        for message in messages:
+            self.assertEqual(munge(message), sequential_munge(message), message)